@@ -21,6 +21,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # day partitions of driver_pings are created at runtime by the telemetry writer
+    if type_ == "table" and name.startswith("driver_pings_p"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +55,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_server_default=True,
         compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -71,6 +80,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_server_default=True,
             compare_type=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,112 @@
+import time
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from app.telemetry.spatial import EARTH_RADIUS_KM
+
+
+class Assignment(NamedTuple):
+    # column of costs every row went to, -1 for rows left unassigned
+    cols: np.ndarray
+    # False when the time budget ran out and the remainder was assigned greedily
+    optimal: bool
+
+
+def haversine_matrix(latitudes_a, longitudes_a, latitudes_b, longitudes_b) -> np.ndarray:
+    """(len(a), len(b)) great-circle distances in km, computed in one broadcast."""
+    lat_a = np.radians(np.asarray(latitudes_a, dtype=np.float64))[:, None]
+    lon_a = np.radians(np.asarray(longitudes_a, dtype=np.float64))[:, None]
+    lat_b = np.radians(np.asarray(latitudes_b, dtype=np.float64))[None, :]
+    lon_b = np.radians(np.asarray(longitudes_b, dtype=np.float64))[None, :]
+    a = np.sin((lat_b - lat_a) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def min_cost_assignment(
+        costs: np.ndarray,
+        capacity: np.ndarray,
+        unassigned_cost: float,
+        deadline: Optional[float] = None
+) -> Assignment:
+    """
+    Assign rows to columns, column j taking at most capacity[j] rows, at minimum total cost.
+
+    A row may also stay unassigned at unassigned_cost; np.inf marks pairs
+    that are not allowed. Solved as a min-cost flow by successive shortest
+    paths with dual potentials (Jonker-Volgenant, with columns of any
+    capacity instead of one row each): every row starts on its cheapest
+    column if that has room, the rest are added one augmenting path at a
+    time. A Dijkstra step expands one full column and relaxes all of its
+    rows in a single vectorised pass, so the Python loop runs at most once
+    per column per row. Once time.monotonic() passes deadline the rows
+    placed so far stay optimal among themselves and the rest are assigned
+    greedily.
+    """
+    n_rows, n_real = costs.shape
+    # the extra column is "unassigned", with room for every row
+    costs = np.hstack([costs, np.full((n_rows, 1), unassigned_cost)])
+    capacity = np.append(np.asarray(capacity, dtype=np.intp), n_rows)
+    n_cols = n_real + 1
+    u = np.zeros(n_rows)
+    v = np.zeros(n_cols)
+    col4row = np.full(n_rows, -1, dtype=np.intp)
+    rows4col: List[List[int]] = [[] for _ in range(n_cols)]
+
+    # cheapest column first: tight under u = row minimum, v = 0, as the augmentations require
+    cheapest = np.argmin(costs, axis=1)
+    u[:] = costs[np.arange(n_rows), cheapest]
+    for row, col in enumerate(cheapest.tolist()):
+        if len(rows4col[col]) < capacity[col]:
+            rows4col[col].append(row)
+            col4row[row] = col
+
+    optimal = True
+    for cur_row in np.flatnonzero(col4row == -1).tolist():
+        if deadline is not None and time.monotonic() > deadline:
+            optimal = False
+            break
+        shortest = np.full(n_cols, np.inf)
+        path = np.full(n_cols, -1, dtype=np.intp)
+        scanned = np.zeros(n_cols, dtype=bool)
+        visited = [np.array([cur_row])]
+        rows, min_val = visited[0], 0.0
+        while True:
+            if len(rows):
+                reduced = min_val + costs[rows] - u[rows, None] - v
+                best = np.argmin(reduced, axis=0)
+                reduced = reduced[best, np.arange(n_cols)]
+                better = (reduced < shortest) & ~scanned
+                path[better] = rows[best[better]]
+                shortest[better] = reduced[better]
+            col = int(np.argmin(np.where(scanned, np.inf, shortest)))
+            min_val = shortest[col]
+            scanned[col] = True
+            if len(rows4col[col]) < capacity[col]:
+                break
+            rows = np.array(rows4col[col], dtype=np.intp)
+            visited.append(rows)
+
+        others = np.concatenate(visited[1:] or [np.empty(0, dtype=np.intp)])
+        u[cur_row] += min_val
+        u[others] += min_val - shortest[col4row[others]]
+        v[scanned] -= min_val - shortest[scanned]
+        # walk the path back: every row on it moves to the column it was reached through
+        while True:
+            row = path[col]
+            previous = col4row[row]
+            rows4col[col].append(row)
+            col4row[row] = col
+            if previous == -1:
+                break
+            rows4col[previous].remove(row)
+            col = previous
+
+    if not optimal:
+        load = np.array([len(rows) for rows in rows4col])
+        for row in np.flatnonzero(col4row == -1).tolist():
+            col = int(np.argmin(np.where(load < capacity, costs[row], np.inf)))
+            col4row[row] = col
+            load[col] += 1
+
+    return Assignment(np.where(col4row == n_real, -1, col4row), optimal)
@@ -1,16 +1,83 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.settings import settings
+from app.utils.db_instrumentation import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine
+)
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    query = dict(url.query)
+    # asyncpg has no sslmode parameter, it takes the same values as `ssl`
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    url = url.set(drivername=ASYNC_DRIVERS[backend], query=query)
+    return url.render_as_string(hide_password=False)
+
+
+def sql_echo() -> bool:
+    if settings.database.database_echo is not None:
+        return settings.database.database_echo
+    return settings.app.environment == "development"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    config = settings.database
+    options = {"echo": sql_echo(), "pool_pre_ping": config.database_pool_pre_ping}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_timeout=config.database_pool_timeout,
+        pool_recycle=config.database_pool_recycle,
+    )
+    if backend == "postgresql" and config.database_statement_timeout_ms:
+        timeout = str(config.database_statement_timeout_ms)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
 
 DATABASE_URL = settings.database.database_connection_string
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL, echo=True, future=True)
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+instrument_engine(engine, "sync", settings.database.database_slow_query_ms)
+instrument_engine(async_engine.sync_engine, "async", settings.database.database_slow_query_ms)
+
 
 def get_db():
     db = SessionLocal()
@@ -18,3 +85,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,15 +1,30 @@
-from fastapi import Depends, HTTPException, WebSocket, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 
+from app.sessions import get_revocation_list
 from app.utils.jwt import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+def verified_claims(token: str) -> Optional[dict]:
+    # signature and expiry come from the token cache, revocation from memory: no database either way
     payload = decode_access_token(token)
-    if not payload or "sub" not in payload:
+    if not payload or "sub" not in payload or get_revocation_list().is_revoked(payload.get("jti")):
+        return None
+    return payload
+
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    payload = verified_claims(token)
+    if payload is None:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    return payload
+
+
+async def get_current_user(payload: dict = Depends(get_token_claims)):
     return {"id": payload["id"], "email": payload["sub"], "type": payload["type"]}
 
 
@@ -31,9 +46,25 @@ async def get_current_user_from_ws(websocket: WebSocket):
     if token.startswith("Bearer "):
         token = token[7:]
 
-    payload = decode_access_token(token)
-    if not payload or "sub" not in payload:
+    payload = verified_claims(token)
+    if payload is None:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         raise HTTPException(status_code=403, detail="Invalid token")
 
-    return {"id": payload["id"], "email": payload["sub"], "type": payload["type"]}
+    # long-lived connections remember their token, so revoking it can close them
+    return {"id": payload["id"], "email": payload["sub"], "type": payload["type"], "jti": payload.get("jti")}
+
+
+async def get_current_user_from_stream(request: Request):
+    # EventSource cannot set headers, so streams also accept ?token=
+    token = request.query_params.get("token")
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        token = authorization[7:]
+    if token and token.startswith("Bearer "):
+        token = token[7:]
+
+    payload = verified_claims(token) if token else None
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    return {"id": payload["id"], "email": payload["sub"], "type": payload["type"], "jti": payload.get("jti")}
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from typing import Optional
+
+from app.db import SessionLocal
+from app.geocoding.cache import CachedGeocoder, Geocoder, LRUCache
+from app.geocoding.nominatim import NominatimGeocoder
+from app.geocoding.offline import OfflineGeocoder
+from app.geocoding.rate_limit import RateLimitedGeocoder
+from app.geocoding.stub import StubGeocoder
+from app.geocoding.worker import GeocodingWorker
+from app.outbound import get_http_client
+from app.settings import settings
+
+_geocoder: Optional[Geocoder] = None
+_worker: Optional[GeocodingWorker] = None
+
+
+def get_geocoder() -> Geocoder:
+    global _geocoder
+    if _geocoder is None:
+        config = settings.geocoding
+        if config.geocoding_backend == "stub" or settings.app.environment == "test":
+            _geocoder = StubGeocoder()
+        elif config.geocoding_backend == "offline":
+            if not config.geocoding_gazetteer_path:
+                raise RuntimeError("GEOCODING_GAZETTEER_PATH is required for the offline geocoder")
+            _geocoder = OfflineGeocoder.from_gazetteer(
+                config.geocoding_gazetteer_path,
+                max_distance_km=config.geocoding_offline_max_distance_km
+            )
+        else:
+            _geocoder = CachedGeocoder(
+                RateLimitedGeocoder(NominatimGeocoder(client=get_http_client()), config.geocoding_rate_limit_per_second),
+                SessionLocal,
+                precision=config.geocoding_cache_precision,
+                ttl=timedelta(days=config.geocoding_cache_ttl_days),
+                lru_size=config.geocoding_lru_size
+            )
+    return _geocoder
+
+
+def get_geocoding_worker() -> GeocodingWorker:
+    global _worker
+    if _worker is None:
+        config = settings.geocoding
+        _worker = GeocodingWorker(
+            get_geocoder(),
+            SessionLocal,
+            workers=config.geocoding_workers,
+            batch_size=config.geocoding_batch_size,
+            max_attempts=config.geocoding_max_attempts,
+            sweep_interval=config.geocoding_sweep_interval_seconds,
+            claim_timeout=config.geocoding_claim_timeout_seconds,
+            retry_delay=config.geocoding_retry_delay_seconds
+        )
+    return _worker
+
+
+def enqueue_geocoding(*location_ids: int) -> None:
+    get_geocoding_worker().enqueue(*location_ids)
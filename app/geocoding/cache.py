@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Protocol
+
+from sqlalchemy.orm import Session
+
+from app.geocoding import geohash
+from app.repositories.geocode_cache_repository import GeocodeCacheRepository
+from app.utils.metrics import registry
+
+cache_lookups = registry.counter(
+    "geocode_cache_lookups_total",
+    "Reverse geocoding cache lookups by tier and result"
+)
+
+
+class Geocoder(Protocol):
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        ...
+
+
+class LRUCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedGeocoder:
+    def __init__(
+            self,
+            backend: Geocoder,
+            session_factory: Callable[[], Session],
+            precision: int = 9,
+            ttl: timedelta = timedelta(days=90),
+            lru_size: int = 10000
+    ):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.precision = precision
+        self.ttl = ttl
+        self.lru = LRUCache(lru_size, ttl.total_seconds())
+
+    def key(self, latitude: float, longitude: float) -> str:
+        return geohash.encode(latitude, longitude, self.precision)
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        key = self.key(latitude, longitude)
+
+        address = self.lru.get(key)
+        if address is not None:
+            cache_lookups.inc(tier="memory", result="hit")
+            return address
+        cache_lookups.inc(tier="memory", result="miss")
+
+        with self.session_factory() as db:
+            entry = GeocodeCacheRepository(db).get_fresh(key, datetime.now() - self.ttl)
+            address = entry.address if entry is not None else None
+        if address is not None:
+            cache_lookups.inc(tier="db", result="hit")
+            self.lru.set(key, address)
+            return address
+        cache_lookups.inc(tier="db", result="miss")
+
+        # the connection is released before the backend call so a slow
+        # provider does not pin a pool slot
+        address = self.backend.reverse(latitude, longitude)
+        if address is not None:
+            with self.session_factory() as db:
+                GeocodeCacheRepository(db).upsert(key, address)
+            self.lru.set(key, address)
+        return address
+
+    def stats(self) -> dict:
+        return {
+            f"{tier}_{result}": int(cache_lookups.value(tier=tier, result=result))
+            for tier in ("memory", "db")
+            for result in ("hit", "miss")
+        }
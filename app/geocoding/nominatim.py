@@ -0,0 +1,38 @@
+from typing import Optional
+
+from app.outbound.client import HttpClient
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+USER_AGENT = "drivetrack/1.0"
+
+
+def format_address(addr: dict) -> str:
+    road = addr.get("road") or addr.get("street") or ""
+    house_number = addr.get("house_number") or ""
+    city = addr.get("city") or addr.get("town") or addr.get("village") or ""
+    district = addr.get("district") or ""
+    state = addr.get("state") or ""
+    country = addr.get("country") or ""
+
+    parts = [road, house_number, city, district, state, country]
+    return ", ".join(part for part in parts if part)
+
+
+class NominatimGeocoder:
+    def __init__(self, url: str = NOMINATIM_URL, timeout: float = 10.0, client: Optional[HttpClient] = None):
+        self.url = url
+        self.timeout = timeout
+        self.client = client or HttpClient()
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        params = {
+            "lat": latitude,
+            "lon": longitude,
+            "format": "json"
+        }
+        headers = {"User-Agent": USER_AGENT}
+        response = self.client.get(self.url, upstream="nominatim", params=params, headers=headers, timeout=self.timeout)
+        if response.status_code != 200:
+            return None
+
+        return format_address(response.json().get("address", {}))
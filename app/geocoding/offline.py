@@ -0,0 +1,215 @@
+import csv
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+INDEX_VERSION = 1
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(min(chord / 2, 1.0))
+
+
+class KDTree:
+    """Static KD-tree over 3D unit vectors, stored implicitly in array order.
+
+    Node [lo, hi) keeps its splitting point at mid = (lo + hi) // 2 and its
+    children in [lo, mid) and [mid + 1, hi), split on axis depth % 3, so the
+    tree needs no node objects and can be memory-mapped straight from disk.
+    """
+
+    def __init__(self, points: np.ndarray, index: np.ndarray, leaf_size: int = 64):
+        self.points = points
+        self.index = index
+        self.leaf_size = leaf_size
+
+    @classmethod
+    def build(cls, points: np.ndarray, leaf_size: int = 64) -> "KDTree":
+        points = np.array(points, dtype=np.float64)
+        index = np.arange(len(points), dtype=np.int64)
+        stack = [(0, len(points), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= leaf_size:
+                continue
+            axis = depth % 3
+            mid = (lo + hi) // 2
+            order = np.argpartition(points[lo:hi, axis], mid - lo)
+            points[lo:hi] = points[lo:hi][order]
+            index[lo:hi] = index[lo:hi][order]
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+        return cls(points, index, leaf_size)
+
+    def nearest(self, point: np.ndarray) -> tuple[int, float]:
+        points = self.points
+        leaf_size = self.leaf_size
+        query = np.asarray(point, dtype=np.float64)
+        q = (float(query[0]), float(query[1]), float(query[2]))
+        best_i, best_d = -1, np.inf
+        stack = [(0, len(points), 0, 0.0)]
+
+        while stack:
+            lo, hi, depth, bound = stack.pop()
+            if bound >= best_d or lo >= hi:
+                continue
+            if hi - lo <= leaf_size:
+                distances = ((points[lo:hi] - query) ** 2).sum(axis=1)
+                i = int(distances.argmin())
+                if distances[i] < best_d:
+                    best_i, best_d = lo + i, float(distances[i])
+                continue
+
+            mid = (lo + hi) // 2
+            x, y, z = points[mid]
+            d = (x - q[0]) ** 2 + (y - q[1]) ** 2 + (z - q[2]) ** 2
+            if d < best_d:
+                best_i, best_d = mid, d
+
+            diff = q[depth % 3] - (x, y, z)[depth % 3]
+            near, far = ((mid + 1, hi), (lo, mid)) if diff >= 0 else ((lo, mid), (mid + 1, hi))
+            # far side first so the near side is popped (and tightens best_d) first
+            stack.append((far[0], far[1], depth + 1, diff * diff))
+            stack.append((near[0], near[1], depth + 1, 0.0))
+
+        return int(self.index[best_i]), float(np.sqrt(best_d))
+
+
+@contextmanager
+def _exclusive(lock_path: Path) -> Iterator[None]:
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_gazetteer(path: Path) -> Iterator[tuple[float, float, str]]:
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Reading Parquet gazetteers requires pyarrow") from e
+        table = pq.read_table(path, columns=["latitude", "longitude", "address"])
+        for row in table.to_pylist():
+            yield float(row["latitude"]), float(row["longitude"]), row["address"]
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield float(row["latitude"]), float(row["longitude"]), row["address"]
+
+
+class OfflineGeocoder:
+    def __init__(self, tree: KDTree, offsets: np.ndarray, names: np.ndarray, max_distance_km: float = 5.0):
+        self.tree = tree
+        self.offsets = offsets
+        self.names = names
+        self.max_distance_km = max_distance_km
+
+    @classmethod
+    def from_gazetteer(cls, path: str, max_distance_km: float = 5.0) -> "OfflineGeocoder":
+        source = Path(path)
+        index_dir = source.with_name(source.name + ".kdtree")
+        # the first worker builds while the others wait, then they all map the same version
+        with _exclusive(source.with_name(source.name + ".kdtree.lock")):
+            if not cls._index_is_current(source, index_dir):
+                cls._build_index(source, index_dir)
+            return cls.load(index_dir.resolve(), max_distance_km)
+
+    @classmethod
+    def load(cls, index_dir: Path, max_distance_km: float = 5.0) -> "OfflineGeocoder":
+        meta = json.loads((index_dir / "meta.json").read_text())
+        # mmap_mode="r" lets every worker process share the same page cache
+        tree = KDTree(
+            np.load(index_dir / "points.npy", mmap_mode="r"),
+            np.load(index_dir / "index.npy", mmap_mode="r"),
+            meta["leaf_size"]
+        )
+        offsets = np.load(index_dir / "offsets.npy", mmap_mode="r")
+        names = np.load(index_dir / "names.npy", mmap_mode="r")
+        return cls(tree, offsets, names, max_distance_km)
+
+    @staticmethod
+    def _index_is_current(source: Path, index_dir: Path) -> bool:
+        meta_path = index_dir / "meta.json"
+        if not meta_path.exists():
+            return False
+        meta = json.loads(meta_path.read_text())
+        stat = source.stat()
+        return meta.get("version") == INDEX_VERSION \
+            and meta.get("source_mtime") == stat.st_mtime \
+            and meta.get("source_size") == stat.st_size
+
+    @staticmethod
+    def _build_index(source: Path, index_dir: Path, leaf_size: int = 64) -> None:
+        latitudes, longitudes, encoded = [], [], []
+        for latitude, longitude, address in read_gazetteer(source):
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            encoded.append(address.encode("utf-8"))
+
+        tree = KDTree.build(to_unit_vectors(latitudes, longitudes), leaf_size)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        names = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        # index_dir is a symlink to a versioned directory: the new version is written in full
+        # first and the link is swapped with a rename, so readers see the old index or the new one
+        version_dir = Path(tempfile.mkdtemp(prefix=index_dir.name + ".", dir=index_dir.parent))
+        np.save(version_dir / "points.npy", tree.points)
+        np.save(version_dir / "index.npy", tree.index)
+        np.save(version_dir / "offsets.npy", offsets)
+        np.save(version_dir / "names.npy", names)
+        stat = source.stat()
+        (version_dir / "meta.json").write_text(json.dumps({
+            "version": INDEX_VERSION,
+            "leaf_size": leaf_size,
+            "source_mtime": stat.st_mtime,
+            "source_size": stat.st_size
+        }))
+
+        previous = index_dir.resolve() if index_dir.is_symlink() else None
+        if index_dir.is_dir() and not index_dir.is_symlink():
+            # built before the index was versioned
+            shutil.rmtree(index_dir)
+        link = version_dir.with_name(version_dir.name + ".link")
+        os.symlink(version_dir.name, link)
+        os.replace(link, index_dir)
+        # mapped files outlive their directory entries, so workers still on it are unaffected
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self.tree.points)
+
+    def name(self, i: int) -> str:
+        return bytes(self.names[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def nearest(self, latitude: float, longitude: float) -> tuple[Optional[str], float]:
+        if not len(self):
+            return None, np.inf
+        i, chord = self.tree.nearest(to_unit_vectors([latitude], [longitude])[0])
+        return self.name(i), chord_to_km(chord)
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        name, distance_km = self.nearest(latitude, longitude)
+        if distance_km > self.max_distance_km:
+            return None
+        return name
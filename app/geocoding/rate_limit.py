@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from app.geocoding.cache import Geocoder
+
+
+class TokenBucket:
+    def __init__(
+            self,
+            rate: float,
+            capacity: float = 1,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class RateLimitedGeocoder:
+    def __init__(self, backend: Geocoder, rate: float):
+        self.backend = backend
+        self.bucket = TokenBucket(rate)
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        self.bucket.acquire()
+        return self.backend.reverse(latitude, longitude)
@@ -0,0 +1,9 @@
+from typing import Optional
+
+
+class StubGeocoder:
+    def __init__(self, address: Optional[str] = "Test Address"):
+        self.address = address
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        return self.address
@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.geocoding.cache import Geocoder
+from app.models.location import GeocodeStatus
+from app.repositories.location_repository import LocationRepository
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.geocoding")
+
+geocoding_results = registry.counter(
+    "geocoding_results_total",
+    "Background reverse geocoding attempts by outcome"
+)
+geocoding_queue_depth = registry.gauge(
+    "geocoding_queue_depth",
+    "Location ids waiting for the geocoding workers"
+)
+
+Listener = Callable[[list[dict]], None]
+
+
+class GeocodingWorker:
+    def __init__(
+            self,
+            geocoder: Geocoder,
+            session_factory: Callable[[], Session],
+            workers: int = 2,
+            batch_size: int = 25,
+            max_attempts: int = 5,
+            sweep_interval: float = 30.0,
+            max_queue_size: int = 10000,
+            claim_timeout: float = 300.0,
+            retry_delay: float = 30.0
+    ):
+        self.geocoder = geocoder
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        # a crashed worker's claim lapses after claim_timeout; failures wait retry_delay, doubling per attempt
+        self.claim_timeout = timedelta(seconds=claim_timeout)
+        self.retry_delay = retry_delay
+        self._queue: queue.Queue[Optional[int]] = queue.Queue(maxsize=max_queue_size)
+        self._in_flight: set[int] = set()
+        self._in_flight_lock = threading.Lock()
+        self._listeners: list[Listener] = []
+        self._threads: list[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def enqueue(self, *location_ids: int) -> None:
+        for location_id in location_ids:
+            try:
+                self._queue.put_nowait(location_id)
+            except queue.Full:
+                # the periodic sweep picks up whatever does not fit
+                break
+        geocoding_queue_depth.set(self._queue.qsize())
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"geocoding-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _next_batch(self) -> list[int]:
+        try:
+            batch = [self._queue.get(timeout=self.sweep_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        batch = [location_id for location_id in batch if location_id is not None]
+        geocoding_queue_depth.set(self._queue.qsize())
+        return batch
+
+    def _run(self) -> None:
+        last_sweep = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                batch = self._next_batch()
+                if batch:
+                    self.process_batch(batch)
+                if self._stopping.is_set():
+                    break
+                # retries and rows enqueued by other processes are picked up here
+                if not batch or time.monotonic() - last_sweep >= self.sweep_interval:
+                    last_sweep = time.monotonic()
+                    self.sweep()
+            except Exception:
+                logger.exception("Geocoding batch failed")
+
+    def sweep(self) -> int:
+        # rows claimed by any process, this one included, are skipped
+        with self.session_factory() as db:
+            pending = LocationRepository(db).claim_pending(self.batch_size, self.max_attempts, self.claim_timeout)
+        return len(self._process([tuple(location) for location in pending]))
+
+    def _claim(self, ids: Iterable[int]) -> list[int]:
+        # saves a round trip for ids this process is already working on
+        with self._in_flight_lock:
+            claimed = [i for i in dict.fromkeys(ids) if i not in self._in_flight]
+            self._in_flight.update(claimed)
+        return claimed
+
+    def process_batch(self, ids: Iterable[int]) -> list[dict]:
+        ids = self._claim(ids)
+        if not ids:
+            return []
+        try:
+            with self.session_factory() as db:
+                pending = LocationRepository(db).claim_pending(
+                    len(ids), self.max_attempts, self.claim_timeout, ids=ids
+                )
+        except Exception:
+            self._release(ids)
+            raise
+        claimed = {location.id for location in pending}
+        self._release([location_id for location_id in ids if location_id not in claimed])
+        return self._process([tuple(location) for location in pending])
+
+    def _release(self, ids: Iterable[int]) -> None:
+        with self._in_flight_lock:
+            self._in_flight.difference_update(ids)
+
+    def _process(self, pending: list[tuple]) -> list[dict]:
+        # pending is (id, latitude, longitude, attempts) of rows claimed in the table
+        if not pending:
+            return []
+        try:
+            rows = [self._resolve(*location) for location in pending]
+
+            with self.session_factory() as db:
+                rows = LocationRepository(db).apply_geocoding_results(rows)
+        finally:
+            self._release([location[0] for location in pending])
+
+        resolved = [row for row in rows if row["geocode_status"] == GeocodeStatus.RESOLVED]
+        if resolved:
+            for listener in self._listeners:
+                try:
+                    listener(resolved)
+                except Exception:
+                    logger.exception("Geocoding listener failed")
+        return rows
+
+    def _resolve(self, location_id: int, latitude: float, longitude: float, attempts: int) -> dict:
+        address: Optional[str] = None
+        try:
+            address = self.geocoder.reverse(latitude, longitude)
+        except Exception:
+            logger.warning("Reverse geocoding failed for location %s", location_id, exc_info=True)
+
+        if address is not None:
+            geocoding_results.inc(outcome="resolved")
+            return {
+                "id": location_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "address": address,
+                "geocode_status": GeocodeStatus.RESOLVED,
+                "geocode_attempts": attempts + 1,
+                "geocode_next_attempt_at": None
+            }
+
+        attempts += 1
+        status = GeocodeStatus.FAILED if attempts >= self.max_attempts else GeocodeStatus.PENDING
+        geocoding_results.inc(outcome="failed" if status == GeocodeStatus.FAILED else "retry")
+        next_attempt_at = None
+        if status == GeocodeStatus.PENDING:
+            next_attempt_at = datetime.now() + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+        return {
+            "id": location_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "geocode_status": status,
+            "geocode_attempts": attempts,
+            "geocode_next_attempt_at": next_attempt_at
+        }
@@ -1,16 +1,76 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.geocoding import get_geocoding_worker
+from app.notifications import get_email_dispatcher
+from app.outbound import close_async_http_client
+from app.passwords import PasswordPoolOverloaded, start_password_pool
+from app.realtime import get_connection_manager, get_event_bus, get_message_writer
+from app.sessions import get_revocation_list
+from app.telemetry import get_position_table, get_telemetry_writer
 from app.routers import auth, dispatchers, drivers, vehicles, clients, deliveries, log_breaks, websocket, messages, \
-    reviews
+    reviews, metrics, events, telemetry
+from app.utils.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # also picks the bcrypt cost, which takes a few hashes
+    password_pool = await asyncio.to_thread(start_password_pool)
+    geocoding_worker = get_geocoding_worker()
+    geocoding_worker.subscribe(websocket.location_geocoded_listener(asyncio.get_running_loop()))
+    geocoding_worker.start()
+    message_writer = get_message_writer()
+    message_writer.start()
+    telemetry_writer = get_telemetry_writer()
+    telemetry_writer.start()
+    email_dispatcher = get_email_dispatcher()
+    email_dispatcher.start()
+    connection_manager = get_connection_manager()
+    await connection_manager.start()
+    get_event_bus().bind(connection_manager, asyncio.get_running_loop())
+    get_position_table().bind(connection_manager, asyncio.get_running_loop())
+    revocations = get_revocation_list()
+    # subscribe before loading, so a revocation committed in between is relayed rather than lost
+    revocations.bind(connection_manager, asyncio.get_running_loop())
+    revocations.listen(websocket.revoked_token_listener(asyncio.get_running_loop()))
+    await asyncio.to_thread(revocations.start)
+    yield
+    await connection_manager.stop()
+    # drain chat messages that were accepted but not written yet
+    await message_writer.stop()
+    await telemetry_writer.stop()
+    await asyncio.to_thread(geocoding_worker.stop)
+    await asyncio.to_thread(email_dispatcher.stop)
+    await close_async_http_client()
+    await asyncio.to_thread(password_pool.stop)
+    await asyncio.to_thread(revocations.stop)
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(PasswordPoolOverloaded)
+async def password_pool_overloaded_handler(request: Request, exc: PasswordPoolOverloaded):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 app.include_router(auth.router)
 app.include_router(dispatchers.router)
 app.include_router(drivers.router)
@@ -21,3 +81,6 @@ app.include_router(log_breaks.router)
 app.include_router(websocket.router)
 app.include_router(messages.router)
 app.include_router(reviews.router)
+app.include_router(metrics.router)
+app.include_router(events.router)
+app.include_router(telemetry.router)
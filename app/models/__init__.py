@@ -9,3 +9,11 @@ from .log_break import LogBreak
 from .review import Review
 from .message import Message
 from .location import Location
+from .geocode_cache import GeocodeCacheEntry
+from .websocket_presence import WebsocketPresence
+from .delivery_event import DeliveryEvent
+from .driver_ping import DriverPing
+from .delivery_track import DeliveryTrack
+from .email_outbox import EmailOutbox
+from .auth_session import AuthSession
+from .revoked_token import RevokedToken
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class AuthSession(Base):
+    __tablename__ = 'auth_sessions'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True, nullable=False)
+    # sha256 of the current refresh token; the token itself only ever goes to the client
+    refresh_token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    # the last access token issued in this session, revoked together with it
+    access_jti: Mapped[str] = mapped_column(String(32), nullable=False)
+    access_expires_at: Mapped[datetime] = mapped_column(nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import ForeignKey, Index, Text, Enum as SQLEnum, text
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from app.db import Base
@@ -16,6 +16,17 @@ class DeliveryStatus(str, Enum):
 
 class Delivery(Base):
     __tablename__ = 'deliveries'
+    __table_args__ = (
+        # keyset pagination keys for the list endpoints
+        Index('ix_deliveries_created_at_id', 'created_at', 'id'),
+        Index('ix_deliveries_driver_id_created_at_id', 'driver_id', 'created_at', 'id'),
+        Index('ix_deliveries_client_id_created_at_id', 'client_id', 'created_at', 'id'),
+        Index(
+            'ix_deliveries_driver_id_status_active',
+            'driver_id', 'status',
+            postgresql_where=text("status IN ('PENDING', 'IN_TRANSIT')")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     driver_id: Mapped[int | None] = mapped_column(ForeignKey('drivers.id'), nullable=True)
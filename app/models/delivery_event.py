@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Index, JSON, String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class DeliveryEvent(Base):
+    __tablename__ = 'delivery_events'
+    __table_args__ = (
+        # resuming a driver's or client's stream reads one contiguous range
+        Index('ix_delivery_events_driver_id_id', 'driver_id', 'id'),
+        Index('ix_delivery_events_client_id_id', 'client_id', 'id'),
+        # a delivery's history, for its track timeline
+        Index('ix_delivery_events_delivery_id_id', 'delivery_id', 'id'),
+    )
+
+    # no foreign keys: the event log outlives deleted deliveries and users
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    type: Mapped[str] = mapped_column(String(50), nullable=False)
+    delivery_id: Mapped[int] = mapped_column(nullable=False)
+    driver_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    client_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "delivery_id": self.delivery_id,
+            "driver_id": self.driver_id,
+            "client_id": self.client_id,
+            "data": self.data,
+            "created_at": self.created_at.isoformat(),
+        }
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, LargeBinary
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class DeliveryTrack(Base):
+    __tablename__ = 'delivery_tracks'
+
+    # one row per resolution tier, built from driver_pings once the delivery is finished
+    delivery_id: Mapped[int] = mapped_column(ForeignKey('deliveries.id', ondelete='CASCADE'), primary_key=True)
+    tier: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    tolerance_m: Mapped[float] = mapped_column(nullable=False)
+    point_count: Mapped[int] = mapped_column(nullable=False)
+    # float64 (unix seconds, latitude, longitude) triples, see app.tracks.store
+    points: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    built_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class DriverPing(Base):
+    __tablename__ = 'driver_pings'
+    # one partition per UTC day, created on demand by app.telemetry.writer.TelemetryWriter;
+    # old days are dropped as whole partitions instead of with DELETE
+    __table_args__ = {'postgresql_partition_by': 'RANGE (recorded_at)'}
+
+    # no foreign key: written with COPY at high rate and kept after a driver is removed.
+    # The primary key doubles as the index for reading one driver's track over a time range.
+    driver_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    speed: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    heading: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    accuracy: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import JSON, Enum as SQLEnum, Index, String, Text, text
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(Base):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # the dispatcher only ever reads due pending rows
+        Index('ix_email_outbox_due', 'next_attempt_at', 'id', postgresql_where=text("status = 'PENDING'")),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # a second message with the same key is never queued, e.g. one email per delivery status
+    dedup_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    template: Mapped[str] = mapped_column(String(50), nullable=False)
+    recipient_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    recipient_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    variables: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    status: Mapped[OutboxStatus] = mapped_column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING,
+                                                 nullable=False)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = 'geocode_cache'
+
+    geohash: Mapped[str] = mapped_column(String(12), primary_key=True)
+    address: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
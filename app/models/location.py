@@ -1,21 +1,38 @@
 from datetime import datetime
+from enum import Enum
 from typing import List
 
-import requests
-from sqlalchemy import Float, String
+from sqlalchemy import Float, Index, String, Enum as SQLEnum, text
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from app.db import Base
-from app.settings import settings
+
+
+class GeocodeStatus(str, Enum):
+    PENDING = "pending"
+    RESOLVED = "resolved"
+    FAILED = "failed"
 
 
 class Location(Base):
     __tablename__ = 'locations'
+    __table_args__ = (
+        # the geocoding sweep only ever looks at the (few) pending rows
+        Index('ix_locations_geocode_pending', 'id', postgresql_where=text("geocode_status = 'PENDING'")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     latitude: Mapped[float] = mapped_column(Float, nullable=False)
     longitude: Mapped[float] = mapped_column(Float, nullable=False)
     address: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    geocode_status: Mapped[GeocodeStatus] = mapped_column(
+        SQLEnum(GeocodeStatus),
+        default=GeocodeStatus.PENDING,
+        nullable=False
+    )
+    geocode_attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    # a pending row is due once this has passed: it doubles as the worker's claim and the retry backoff
+    geocode_next_attempt_at: Mapped[datetime | None] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
     pickup_deliveries: Mapped[List["Delivery"]] = relationship(
         "Delivery",
@@ -33,28 +50,6 @@ class Location(Base):
     )
 
     def get_address(self) -> str:
-        if settings.app.environment == "test":
-            return "Test Address"
-        url = "https://nominatim.openstreetmap.org/reverse"
-        params = {
-            "lat": self.latitude,
-            "lon": self.longitude,
-            "format": "json"
-        }
-        headers = {"User-Agent": "drivetrack/1.0"}
-        response = requests.get(url, params=params, headers=headers)
-        if response.status_code != 200:
-            return "Unknown location"
-
-        data = response.json()
-        addr = data.get("address", {})
-
-        road = addr.get("road") or addr.get("street") or ""
-        house_number = addr.get("house_number") or ""
-        city = addr.get("city") or addr.get("town") or addr.get("village") or ""
-        district = addr.get("district") or ""
-        state = addr.get("state") or ""
-        country = addr.get("country") or ""
-
-        parts = [road, house_number, city, district, state, country]
-        return ", ".join(part for part in parts if part)
+        from app.geocoding import get_geocoder
+
+        return get_geocoder().reverse(self.latitude, self.longitude) or "Unknown location"
@@ -1,11 +1,14 @@
 from datetime import datetime
-from sqlalchemy import DateTime, Float, ForeignKey, Integer
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db import Base
 
 
 class LogBreak(Base):
     __tablename__ = 'log_breaks'
+    __table_args__ = (
+        Index('ix_log_breaks_delivery_id_created_at_id', 'delivery_id', 'created_at', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     location_id: Mapped[int] = mapped_column(ForeignKey('locations.id'), nullable=False)
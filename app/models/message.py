@@ -1,18 +1,40 @@
 import datetime
-from sqlalchemy import ForeignKey, Text
+from typing import Optional
+
+from sqlalchemy import BigInteger, Computed, ForeignKey, Index, Text
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from app.db import Base
 
 
 class Message(Base):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # a conversation is one contiguous range, newest first when scanned backwards
+        Index('ix_messages_conversation_key_created_at_id', 'conversation_key', 'created_at', 'id'),
+        Index('ix_messages_sender_id_created_at_id', 'sender_id', 'created_at', 'id'),
+        Index('ix_messages_receiver_id_created_at_id', 'receiver_id', 'created_at', 'id'),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     sender_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
     receiver_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=True)
+    # both participants packed into one value regardless of direction;
+    # NULL for driver messages addressed to all dispatchers
+    conversation_key: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        Computed(
+            "CASE WHEN receiver_id IS NOT NULL "
+            "THEN (LEAST(sender_id, receiver_id)::bigint << 32) | GREATEST(sender_id, receiver_id) END",
+            persisted=True
+        )
+    )
     created_at: Mapped[datetime.datetime] = mapped_column(
         default=datetime.datetime.now,
         nullable=False
     )
     sender: Mapped["User"] = relationship(foreign_keys=[sender_id])
     receiver: Mapped["User"] = relationship(foreign_keys=[receiver_id])
+
+    @staticmethod
+    def conversation_key_for(user_id: int, other_user_id: int) -> int:
+        return (min(user_id, other_user_id) << 32) | max(user_id, other_user_id)
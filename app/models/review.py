@@ -10,7 +10,7 @@ class Review(Base):
     __tablename__ = 'reviews'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    delivery_id: Mapped[int] = mapped_column(ForeignKey('deliveries.id'), nullable=False)
+    delivery_id: Mapped[int] = mapped_column(ForeignKey('deliveries.id'), nullable=False, unique=True)
     text: Mapped[str | None] = mapped_column(Text, nullable=True)
     rating: Mapped[int] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = 'revoked_tokens'
+
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # once the token would have expired anyway the row is purged
+    expires_at: Mapped[datetime] = mapped_column(index=True, nullable=False)
@@ -1,5 +1,6 @@
 import datetime
 
+from sqlalchemy import Index
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from app.db import Base
@@ -7,6 +8,10 @@ from app.db import Base
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_type', 'type'),
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
     email: Mapped[str] = mapped_column(unique=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(nullable=False)
     id: Mapped[int] = mapped_column(primary_key=True)
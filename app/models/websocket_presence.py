@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import Index, String
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.db import Base
+
+
+class WebsocketPresence(Base):
+    __tablename__ = 'websocket_presence'
+
+    # written by app.realtime.broker.PostgresBroker, which worker holds each user's socket
+    role: Mapped[str] = mapped_column(String(20), primary_key=True)
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    worker_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_websocket_presence_worker_id", "worker_id"),
+    )
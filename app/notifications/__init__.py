@@ -0,0 +1,44 @@
+from typing import Optional
+
+from app.db import SessionLocal
+from app.notifications.dispatcher import EmailDispatcher
+from app.notifications.mailgun import Mailer, MailgunMailer, StubMailer
+from app.outbound import get_http_client
+from app.settings import settings
+
+_mailer: Optional[Mailer] = None
+_dispatcher: Optional[EmailDispatcher] = None
+
+
+def get_mailer() -> Mailer:
+    global _mailer
+    if _mailer is None:
+        config = settings.mailgun
+        if settings.app.environment == "test":
+            _mailer = StubMailer()
+        else:
+            _mailer = MailgunMailer(
+                config.mailgun_api_key,
+                config.mailgun_domain,
+                config.mailgun_sender,
+                url=config.mailgun_url,
+                timeout=config.mailgun_timeout_seconds,
+                client=get_http_client()
+            )
+    return _mailer
+
+
+def get_email_dispatcher() -> EmailDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        config = settings.mailgun
+        _dispatcher = EmailDispatcher(
+            get_mailer(),
+            SessionLocal,
+            batch_size=config.mailgun_batch_size,
+            poll_interval=config.mailgun_poll_interval_seconds,
+            max_attempts=config.mailgun_max_attempts,
+            retry_base=config.mailgun_retry_base_seconds,
+            retry_max=config.mailgun_retry_max_seconds
+        )
+    return _dispatcher
@@ -0,0 +1,160 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import OutboxStatus
+from app.notifications.mailgun import MailError, Mailer, Recipient
+from app.notifications.templates import TEMPLATES
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.notifications")
+
+emails_dispatched = registry.counter(
+    "emails_dispatched_total",
+    "Outbox emails handed to the mail provider, by outcome"
+)
+email_batch_seconds = registry.histogram(
+    "email_batch_seconds",
+    "Time to send one batch of emails"
+)
+
+
+class EmailDispatcher:
+    """
+    Sends queued outbox emails from a background thread, in batches.
+
+    Each pass claims up to batch_size due messages, groups them by template
+    into as few provider calls as possible and records the outcome. A batch
+    that fails with a retryable error is retried after an exponential,
+    jittered backoff; after max_attempts its messages are marked failed. A
+    batch rejected outright is split in halves until the rejected messages
+    are isolated, and only those are marked failed.
+    """
+
+    def __init__(
+            self,
+            mailer: Mailer,
+            session_factory: Callable[[], Session],
+            batch_size: int = 500,
+            poll_interval: float = 1.0,
+            max_attempts: int = 5,
+            retry_base: float = 30.0,
+            retry_max: float = 3600.0,
+            lease: float = 300.0
+    ):
+        self.mailer = mailer
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = timedelta(seconds=lease)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        # called after a commit that queued mail, so it goes out without waiting for the next poll
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                while self.dispatch() == self.batch_size and not self._stopping.is_set():
+                    pass
+            except Exception:
+                logger.exception("Email dispatch failed")
+
+    def dispatch(self) -> int:
+        with self.session_factory() as db:
+            messages = EmailOutboxRepository(db).claim_due(self.batch_size, self.lease)
+        if not messages:
+            return 0
+
+        results = []
+        for template, batch in self._batches(messages):
+            started = time.perf_counter()
+            if template not in TEMPLATES:
+                error = MailError(f"Unknown email template {template!r}", retryable=False)
+                logger.warning("Sending %d %s emails failed: %s", len(batch), template, error)
+                results.extend(self._failed(message, error) for message in batch)
+            else:
+                results.extend(self._send(template, batch))
+            email_batch_seconds.observe(time.perf_counter() - started)
+
+        with self.session_factory() as db:
+            EmailOutboxRepository(db).apply_results(results)
+        return len(messages)
+
+    def _send(self, template: str, batch: List[dict]) -> List[dict]:
+        subject, text = TEMPLATES[template]
+        try:
+            self.mailer.send_batch(subject, text, [
+                Recipient(message["recipient_email"], message["recipient_name"], message["variables"])
+                for message in batch
+            ])
+        except MailError as exc:
+            if not exc.retryable and len(batch) > 1:
+                # usually one bad address rejects the whole request: halve until it is on its own
+                middle = len(batch) // 2
+                return self._send(template, batch[:middle]) + self._send(template, batch[middle:])
+            logger.warning("Sending %d %s emails failed: %s", len(batch), template, exc)
+            return [self._failed(message, exc) for message in batch]
+        now = datetime.now()
+        emails_dispatched.inc(len(batch), outcome="sent")
+        return [
+            {"id": message["id"], "status": OutboxStatus.SENT, "next_attempt_at": now,
+             "last_error": None, "sent_at": now}
+            for message in batch
+        ]
+
+    def _batches(self, messages: List[dict]):
+        # one provider call per template, split where an address repeats (recipient-variables
+        # is keyed by address) or the provider's recipient limit is reached
+        by_template: Dict[str, List[List[dict]]] = {}
+        for message in messages:
+            batches = by_template.setdefault(message["template"], [])
+            for batch in batches:
+                if len(batch) < self.mailer.max_recipients and all(
+                        other["recipient_email"] != message["recipient_email"] for other in batch):
+                    batch.append(message)
+                    break
+            else:
+                batches.append([message])
+        for template, batches in by_template.items():
+            for batch in batches:
+                yield template, batch
+
+    def _failed(self, message: dict, error: MailError) -> dict:
+        if not error.retryable or message["attempts"] >= self.max_attempts:
+            emails_dispatched.inc(outcome="failed")
+            return {"id": message["id"], "status": OutboxStatus.FAILED, "next_attempt_at": datetime.now(),
+                    "last_error": str(error), "sent_at": None}
+        delay = min(self.retry_max, self.retry_base * 2 ** (message["attempts"] - 1))
+        emails_dispatched.inc(outcome="retry")
+        return {"id": message["id"], "status": OutboxStatus.PENDING,
+                "next_attempt_at": datetime.now() + timedelta(seconds=delay * random.uniform(0.5, 1.0)),
+                "last_error": str(error), "sent_at": None}
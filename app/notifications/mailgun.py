@@ -0,0 +1,81 @@
+import json
+from email.utils import formataddr
+from typing import List, NamedTuple, Optional, Protocol
+
+import requests
+
+from app.outbound.client import HttpClient, UpstreamUnavailable
+
+MAILGUN_URL = "https://api.mailgun.net/v3"
+
+
+class Recipient(NamedTuple):
+    email: str
+    name: str
+    # substituted for %recipient.<name>% in the subject and text
+    variables: dict
+
+
+class MailError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Mailer(Protocol):
+    max_recipients: int
+
+    def send_batch(self, subject: str, text: str, recipients: List[Recipient]) -> None:
+        ...
+
+
+class MailgunMailer:
+    """
+    Mailgun's messages API over the shared outbound client.
+
+    send_batch() is a single request for up to max_recipients people: every
+    address goes in "to" and Mailgun sends each one its own copy, filled in
+    from recipient-variables.
+    """
+
+    max_recipients = 1000
+
+    def __init__(self, api_key: str, domain: str, sender: str, url: str = MAILGUN_URL, timeout: float = 10.0,
+                 client: Optional[HttpClient] = None):
+        self.endpoint = f"{url.rstrip('/')}/{domain}/messages"
+        self.sender = sender
+        self.timeout = timeout
+        self.auth = ("api", api_key)
+        self.client = client or HttpClient()
+
+    def send_batch(self, subject: str, text: str, recipients: List[Recipient]) -> None:
+        data = {
+            "from": self.sender,
+            "to": [formataddr((recipient.name, recipient.email)) for recipient in recipients],
+            "subject": subject,
+            "text": text,
+            "recipient-variables": json.dumps({recipient.email: recipient.variables for recipient in recipients}),
+        }
+        try:
+            response = self.client.post(
+                self.endpoint, upstream="mailgun", data=data, auth=self.auth, timeout=self.timeout
+            )
+        except (requests.RequestException, UpstreamUnavailable) as exc:
+            raise MailError(f"Mailgun unreachable: {exc}") from exc
+        # a bad key or a suspended account is fixed on our side, not in the messages: keep them queued
+        if response.status_code in (401, 403, 429) or response.status_code >= 500:
+            raise MailError(f"Mailgun answered {response.status_code}: {response.text[:200]}")
+        if response.status_code >= 400:
+            # bad address or parameters: sending again will not help
+            raise MailError(f"Mailgun rejected the batch with {response.status_code}: {response.text[:200]}",
+                            retryable=False)
+
+
+class StubMailer:
+    max_recipients = 1000
+
+    def __init__(self):
+        self.sent: List[tuple] = []
+
+    def send_batch(self, subject: str, text: str, recipients: List[Recipient]) -> None:
+        self.sent.append((subject, text, list(recipients)))
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+
+from app.models import Delivery, DeliveryEvent
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+
+
+def queue_status_email(db: Session, delivery: Delivery, status_event: DeliveryEvent) -> None:
+    # written with the status change, so the email goes out exactly when the change commits
+    if delivery.client is None:
+        return
+    if status_event.id is None:
+        db.flush()
+    # one email per change: a delivery that comes back to a status is announced again
+    EmailOutboxRepository(db).add_message(
+        dedup_key=f"delivery_event:{status_event.id}",
+        template="delivery_status",
+        recipient_email=delivery.client.email,
+        recipient_name=f"{delivery.client.first_name} {delivery.client.last_name}",
+        variables={"status": delivery.status.value, "delivery_id": delivery.id}
+    )
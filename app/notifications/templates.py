@@ -0,0 +1,7 @@
+# subject and text per outbox template; %recipient.<variable>% is filled in by Mailgun
+TEMPLATES = {
+    "delivery_status": (
+        "Delivery Status Update",
+        "Your delivery status has been updated to: %recipient.status%",
+    ),
+}
@@ -0,0 +1,40 @@
+from typing import Optional
+
+from app.outbound.client import AsyncHttpClient, HttpClient, UpstreamUnavailable
+from app.settings import settings
+
+_client: Optional[HttpClient] = None
+_async_client: Optional[AsyncHttpClient] = None
+
+
+def _options() -> dict:
+    config = settings.outbound
+    return dict(
+        max_connections=config.outbound_max_connections_per_host,
+        timeout=config.outbound_timeout_seconds,
+        connect_timeout=config.outbound_connect_timeout_seconds,
+        failure_threshold=config.outbound_breaker_failures,
+        reset_timeout=config.outbound_breaker_reset_seconds
+    )
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    if _client is None:
+        _client = HttpClient(**_options())
+    return _client
+
+
+def get_async_http_client() -> AsyncHttpClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncHttpClient(**_options())
+    return _async_client
+
+
+async def close_async_http_client() -> None:
+    # its connections belong to the event loop that is shutting down
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.aclose()
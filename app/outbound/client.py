@@ -0,0 +1,219 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.outbound.breaker import CircuitBreaker
+from app.utils.metrics import registry
+
+request_seconds = registry.histogram(
+    "outbound_request_seconds",
+    "Outbound HTTP call latency by upstream, connection setup included"
+)
+requests_total = registry.counter(
+    "outbound_requests_total",
+    "Outbound HTTP calls by upstream and outcome (status class, timeout, connection_error, circuit_open, busy)"
+)
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not made: the host's circuit is open or none of its slots freed up in time."""
+
+
+def is_failure(status_code: int) -> bool:
+    # rate limiting counts too: hammering a host that asked us to back off only makes it worse
+    return status_code >= 500 or status_code == 429
+
+
+class _Host:
+    def __init__(self, name: str, breaker: CircuitBreaker, slots):
+        self.name = name
+        self.breaker = breaker
+        self.slots = slots
+
+
+class _BaseClient:
+    def __init__(
+            self,
+            max_connections: int,
+            timeout: float,
+            connect_timeout: float,
+            failure_threshold: int,
+            reset_timeout: float,
+            clock: Callable[[], float]
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._hosts: Dict[str, _Host] = {}
+        self._lock = threading.Lock()
+
+    def _slots(self):
+        raise NotImplementedError
+
+    def host(self, url: str) -> _Host:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        host = self._hosts.get(key)
+        if host is None:
+            with self._lock:
+                host = self._hosts.get(key)
+                if host is None:
+                    breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+                    host = self._hosts[key] = _Host(parts.netloc, breaker, self._slots())
+        return host
+
+    def _busy(self, upstream: str):
+        requests_total.inc(upstream=upstream, outcome="busy")
+        return UpstreamUnavailable(f"{upstream}: all {self.max_connections} connections stayed busy")
+
+    def _begin(self, host: _Host, upstream: str) -> float:
+        if not host.breaker.allow():
+            requests_total.inc(upstream=upstream, outcome="circuit_open")
+            raise UpstreamUnavailable(f"{upstream}: circuit open after repeated failures")
+        return time.perf_counter()
+
+    def _failed(self, host: _Host, upstream: str, started: float, outcome: str) -> None:
+        request_seconds.observe(time.perf_counter() - started, upstream=upstream)
+        requests_total.inc(upstream=upstream, outcome=outcome)
+        host.breaker.record_failure()
+
+    def _completed(self, host: _Host, upstream: str, started: float, status_code: int) -> None:
+        request_seconds.observe(time.perf_counter() - started, upstream=upstream)
+        requests_total.inc(upstream=upstream, outcome=f"{status_code // 100}xx")
+        if is_failure(status_code):
+            host.breaker.record_failure()
+        else:
+            host.breaker.record_success()
+
+
+class HttpClient(_BaseClient):
+    """
+    Outbound HTTP for the integrations, over one requests.Session.
+
+    urllib3 keeps a keep-alive pool per host inside the session. On top of it
+    every host gets max_connections slots (a call waits up to connect_timeout
+    for one) and a circuit breaker, and every call is timed into
+    outbound_request_seconds under its upstream name.
+    """
+
+    def __init__(
+            self,
+            max_connections: int = 10,
+            timeout: float = 10.0,
+            connect_timeout: float = 3.0,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(max_connections, timeout, connect_timeout, failure_threshold, reset_timeout, clock)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _slots(self):
+        return threading.BoundedSemaphore(self.max_connections)
+
+    def request(self, method: str, url: str, upstream: Optional[str] = None, timeout: Optional[float] = None,
+                **kwargs) -> requests.Response:
+        host = self.host(url)
+        upstream = upstream or host.name
+        if not host.slots.acquire(timeout=self.connect_timeout):
+            raise self._busy(upstream)
+        try:
+            started = self._begin(host, upstream)
+            try:
+                response = self.session.request(
+                    method, url, timeout=(self.connect_timeout, timeout or self.timeout), **kwargs
+                )
+            except requests.Timeout:
+                self._failed(host, upstream, started, "timeout")
+                raise
+            except requests.ConnectionError:
+                self._failed(host, upstream, started, "connection_error")
+                raise
+            except BaseException:
+                host.breaker.cancel()
+                raise
+            self._completed(host, upstream, started, response.status_code)
+            return response
+        finally:
+            host.slots.release()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHttpClient(_BaseClient):
+    """HttpClient for coroutines, over one httpx.AsyncClient; the same limits, breakers and metrics."""
+
+    def __init__(
+            self,
+            max_connections: int = 10,
+            timeout: float = 10.0,
+            connect_timeout: float = 3.0,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(max_connections, timeout, connect_timeout, failure_threshold, reset_timeout, clock)
+        # connections per host are already capped by the host slots
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        )
+
+    def _slots(self):
+        return asyncio.Semaphore(self.max_connections)
+
+    async def request(self, method: str, url: str, upstream: Optional[str] = None, timeout: Optional[float] = None,
+                      **kwargs) -> httpx.Response:
+        host = self.host(url)
+        upstream = upstream or host.name
+        try:
+            await asyncio.wait_for(host.slots.acquire(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise self._busy(upstream) from None
+        try:
+            started = self._begin(host, upstream)
+            if timeout is not None:
+                kwargs["timeout"] = httpx.Timeout(timeout, connect=self.connect_timeout)
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                self._failed(host, upstream, started, "timeout")
+                raise
+            except httpx.TransportError:
+                self._failed(host, upstream, started, "connection_error")
+                raise
+            except BaseException:
+                host.breaker.cancel()
+                raise
+            self._completed(host, upstream, started, response.status_code)
+            return response
+        finally:
+            host.slots.release()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
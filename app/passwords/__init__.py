@@ -0,0 +1,38 @@
+import logging
+from typing import Optional
+
+from app.passwords.pool import PasswordPool, PasswordPoolOverloaded
+from app.settings import settings
+
+logger = logging.getLogger("app.passwords")
+
+# bcrypt.gensalt()'s own default
+DEFAULT_ROUNDS = 12
+
+_pool: Optional[PasswordPool] = None
+
+
+def get_password_pool() -> PasswordPool:
+    global _pool
+    if _pool is None:
+        config = settings.password
+        _pool = PasswordPool(
+            workers=config.password_workers,
+            max_pending=config.password_max_pending,
+            rounds=config.password_bcrypt_rounds or DEFAULT_ROUNDS
+        )
+    return _pool
+
+
+def start_password_pool() -> PasswordPool:
+    pool = get_password_pool()
+    pool.start()
+    config = settings.password
+    if config.password_bcrypt_rounds is None and settings.app.environment != "test":
+        rounds = pool.calibrate(
+            config.password_target_verify_ms / 1000,
+            config.password_min_rounds,
+            config.password_max_rounds
+        )
+        logger.info("bcrypt cost %d selected for a %.0f ms verify target", rounds, config.password_target_verify_ms)
+    return pool
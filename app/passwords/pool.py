@@ -0,0 +1,98 @@
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.utils.metrics import registry
+from app.utils.security import hash_password, hash_rounds, time_hash, verify_password
+
+password_seconds = registry.histogram(
+    "password_operation_seconds",
+    "bcrypt hash/verify latency, queueing for a worker included",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+password_rejected = registry.counter(
+    "password_operations_rejected_total",
+    "Password operations shed with 503 because the queue was full"
+)
+password_pending = registry.gauge(
+    "password_operations_pending",
+    "Password operations running or waiting for a worker"
+)
+password_rounds = registry.gauge(
+    "password_bcrypt_rounds",
+    "bcrypt cost factor used for new hashes"
+)
+
+
+class PasswordPoolOverloaded(Exception):
+    pass
+
+
+class PasswordPool:
+    """
+    bcrypt hashing and verification in a few dedicated worker processes.
+
+    Each call blocks the calling request thread until a worker is done. No more
+    than max_pending calls may be queued or running; the next one raises
+    PasswordPoolOverloaded. A login burst is therefore shed with 503 instead of
+    tying up the threadpool that every other sync endpoint runs on.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32, rounds: int = 12):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        password_rounds.set(rounds)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: forking a process that runs threads can copy a held lock into the child
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _run(self, operation: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            password_rejected.inc(operation=operation)
+            raise PasswordPoolOverloaded(f"{self.max_pending} password operations are already waiting")
+        password_pending.inc()
+        started = time.perf_counter()
+        try:
+            self.start()
+            return self._executor.submit(fn, *args).result()
+        finally:
+            password_seconds.observe(time.perf_counter() - started, operation=operation)
+            password_pending.dec()
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", hash_password, password, self.rounds)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run("verify", verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # only ever upgraded: a slower machine is no reason to weaken stored hashes
+        return hash_rounds(hashed_password) < self.rounds
+
+    def calibrate(self, target_seconds: float, min_rounds: int, max_rounds: int) -> int:
+        """Pick the highest cost whose verify stays within target_seconds on these workers."""
+        self.start()
+        # the first call pays for starting the worker process
+        elapsed = min(self._executor.submit(time_hash, min_rounds).result() for _ in range(3))
+        # every extra round doubles the work
+        extra = math.floor(math.log2(target_seconds / elapsed)) if elapsed > 0 else max_rounds - min_rounds
+        self.rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+        password_rounds.set(self.rounds)
+        return self.rounds
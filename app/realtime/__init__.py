@@ -0,0 +1,70 @@
+from typing import Optional
+
+from sqlalchemy import make_url
+
+from app.db import AsyncSessionLocal
+from app.realtime.broker import Broker, MemoryBroker, PostgresBroker, RedisBroker
+from app.realtime.connections import ConnectionManager
+from app.realtime.events import EventBus
+from app.realtime.message_writer import MessageWriter
+from app.settings import settings
+
+_manager: Optional[ConnectionManager] = None
+_message_writer: Optional[MessageWriter] = None
+_event_bus: Optional[EventBus] = None
+
+
+def get_broker() -> Broker:
+    config = settings.websocket
+    if config.websocket_broker == "postgres":
+        url = make_url(config.websocket_broker_url or settings.database.database_connection_string)
+        # asyncpg takes a plain libpq-style URL
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBroker(
+            dsn,
+            channel_prefix=config.websocket_channel_prefix,
+            presence_ttl=config.websocket_presence_ttl_seconds
+        )
+    if config.websocket_broker == "redis":
+        if not config.websocket_broker_url:
+            raise RuntimeError("WEBSOCKET_BROKER_URL is required for the redis broker")
+        return RedisBroker(
+            config.websocket_broker_url,
+            channel_prefix=config.websocket_channel_prefix,
+            presence_ttl=config.websocket_presence_ttl_seconds
+        )
+    return MemoryBroker()
+
+
+def get_connection_manager() -> ConnectionManager:
+    global _manager
+    if _manager is None:
+        config = settings.websocket
+        _manager = ConnectionManager(
+            max_queue_size=config.websocket_send_queue_size,
+            policy=config.websocket_overflow_policy,
+            send_timeout=config.websocket_send_timeout_seconds,
+            broker=get_broker(),
+            heartbeat_interval=config.websocket_presence_ttl_seconds / 3
+        )
+    return _manager
+
+
+def get_message_writer() -> MessageWriter:
+    global _message_writer
+    if _message_writer is None:
+        config = settings.websocket
+        _message_writer = MessageWriter(
+            AsyncSessionLocal,
+            batch_size=config.websocket_message_batch_size,
+            flush_interval=config.websocket_message_flush_interval_ms / 1000,
+            max_pending=config.websocket_message_max_pending
+        )
+    return _message_writer
+
+
+def get_event_bus() -> EventBus:
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus(max_queue_size=settings.event_stream.event_stream_queue_size)
+    return _event_bus
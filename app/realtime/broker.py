@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Protocol, Set, Tuple
+
+import asyncpg
+
+from app.realtime.resp import RespConnection, as_str
+
+logger = logging.getLogger("app.realtime")
+
+Handler = Callable[[dict], Awaitable[None]]
+# (role, user_id) pairs with a socket on the calling worker
+Presence = Iterable[Tuple[str, int]]
+
+UPSERT_PRESENCE = """
+    INSERT INTO websocket_presence (role, user_id, worker_id, updated_at)
+    VALUES ($1, $2, $3, now())
+    ON CONFLICT (role, user_id)
+    DO UPDATE SET worker_id = excluded.worker_id, updated_at = excluded.updated_at
+"""
+
+
+class Broker(Protocol):
+    async def start(self, worker_id: str, handler: Handler) -> None: ...
+
+    async def stop(self) -> None: ...
+
+    # worker_id=None broadcasts to every worker
+    async def publish(self, worker_id: Optional[str], envelope: dict) -> None: ...
+
+    async def set_presence(self, role: str, user_id: int, worker_id: str) -> None: ...
+
+    async def clear_presence(self, role: str, user_id: int, worker_id: str) -> None: ...
+
+    async def owner(self, role: str, user_id: int) -> Optional[str]: ...
+
+    async def online(self, role: str) -> Set[int]: ...
+
+    async def heartbeat(self, worker_id: str, present: Presence) -> None: ...
+
+
+class MemoryBroker:
+    """Single-process broker; several managers may share one instance."""
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+        self._presence: Dict[Tuple[str, int], str] = {}
+
+    async def start(self, worker_id: str, handler: Handler) -> None:
+        self._handlers[worker_id] = handler
+
+    async def stop(self) -> None:
+        # other managers may still be using this instance
+        pass
+
+    async def publish(self, worker_id: Optional[str], envelope: dict) -> None:
+        if worker_id is None:
+            handlers = list(self._handlers.values())
+        else:
+            handlers = [self._handlers[worker_id]] if worker_id in self._handlers else []
+        for handler in handlers:
+            await handler(envelope)
+
+    async def set_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        self._presence[(role, user_id)] = worker_id
+
+    async def clear_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        if self._presence.get((role, user_id)) == worker_id:
+            del self._presence[(role, user_id)]
+
+    async def owner(self, role: str, user_id: int) -> Optional[str]:
+        return self._presence.get((role, user_id))
+
+    async def online(self, role: str) -> Set[int]:
+        return {user_id for (r, user_id) in self._presence if r == role}
+
+    async def heartbeat(self, worker_id: str, present: Presence) -> None:
+        for role, user_id in present:
+            self._presence[(role, user_id)] = worker_id
+
+
+class PostgresBroker:
+    """LISTEN/NOTIFY for messages, the websocket_presence table for presence."""
+
+    # NOTIFY payloads are capped at 8000 bytes by the server
+    max_payload_bytes = 7999
+
+    def __init__(self, dsn: str, channel_prefix: str = "driverhub", presence_ttl: float = 30.0):
+        self.dsn = dsn
+        self.channel_prefix = channel_prefix
+        self.presence_ttl = presence_ttl
+        self.worker_id: Optional[str] = None
+        self._handler: Optional[Handler] = None
+        self._listener = None
+        self._pool = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def channel(self, worker_id: Optional[str]) -> str:
+        if worker_id is None:
+            return f"{self.channel_prefix}_ws"
+        return f"{self.channel_prefix}_ws_{worker_id}"
+
+    async def start(self, worker_id: str, handler: Handler) -> None:
+        self.worker_id = worker_id
+        self._handler = handler
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4)
+        # LISTEN needs a connection of its own that never goes back to a pool
+        self._listener = await asyncpg.connect(self.dsn)
+        await self._listener.add_listener(self.channel(None), self._on_notify)
+        await self._listener.add_listener(self.channel(worker_id), self._on_notify)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        if self._pool is not None:
+            await self._pool.execute("DELETE FROM websocket_presence WHERE worker_id = $1", self.worker_id)
+            await self._pool.close()
+            self._pool = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        task = asyncio.create_task(self._dispatch(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, payload: str) -> None:
+        try:
+            await self._handler(json.loads(payload))
+        except Exception:
+            logger.exception("Failed to deliver broker message")
+
+    async def publish(self, worker_id: Optional[str], envelope: dict) -> None:
+        payload = json.dumps(envelope, default=str)
+        if len(payload.encode()) > self.max_payload_bytes:
+            raise ValueError("Websocket message is too large for NOTIFY")
+        await self._pool.execute("SELECT pg_notify($1, $2)", self.channel(worker_id), payload)
+
+    async def set_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        await self._pool.execute(UPSERT_PRESENCE, role, user_id, worker_id)
+
+    async def clear_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        # another worker may own the user by now, leave its row alone
+        await self._pool.execute(
+            "DELETE FROM websocket_presence WHERE role = $1 AND user_id = $2 AND worker_id = $3",
+            role, user_id, worker_id
+        )
+
+    async def owner(self, role: str, user_id: int) -> Optional[str]:
+        return await self._pool.fetchval(
+            """
+            SELECT worker_id FROM websocket_presence
+            WHERE role = $1 AND user_id = $2 AND updated_at > now() - make_interval(secs => $3)
+            """,
+            role, user_id, self.presence_ttl
+        )
+
+    async def online(self, role: str) -> Set[int]:
+        rows = await self._pool.fetch(
+            """
+            SELECT user_id FROM websocket_presence
+            WHERE role = $1 AND updated_at > now() - make_interval(secs => $2)
+            """,
+            role, self.presence_ttl
+        )
+        return {row["user_id"] for row in rows}
+
+    async def heartbeat(self, worker_id: str, present: Presence) -> None:
+        # re-assert every local socket, which also repairs rows lost to races or restarts
+        rows = [(role, user_id, worker_id) for role, user_id in present]
+        if rows:
+            await self._pool.executemany(UPSERT_PRESENCE, rows)
+
+
+class RedisBroker:
+    """PUBLISH/SUBSCRIBE for messages, hashes for presence; any RESP server will do."""
+
+    def __init__(self, url: str, channel_prefix: str = "driverhub", presence_ttl: float = 30.0):
+        self.url = url
+        self.channel_prefix = channel_prefix
+        self.presence_ttl = presence_ttl
+        self.worker_id: Optional[str] = None
+        self._handler: Optional[Handler] = None
+        self._commands: Optional[RespConnection] = None
+        self._subscriber: Optional[RespConnection] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    def channel(self, worker_id: Optional[str]) -> str:
+        if worker_id is None:
+            return f"{self.channel_prefix}:ws"
+        return f"{self.channel_prefix}:ws:{worker_id}"
+
+    def _presence_key(self, role: str) -> str:
+        return f"{self.channel_prefix}:presence:{role}"
+
+    def _worker_key(self, worker_id: str) -> str:
+        return f"{self.channel_prefix}:worker:{worker_id}"
+
+    async def start(self, worker_id: str, handler: Handler) -> None:
+        self.worker_id = worker_id
+        self._handler = handler
+        self._commands = await RespConnection.open(self.url)
+        self._subscriber = await RespConnection.open(self.url)
+        await self._subscriber.subscribe(self.channel(None), self.channel(worker_id))
+        await self._mark_alive(worker_id)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._subscriber is not None:
+            await self._subscriber.close()
+            self._subscriber = None
+        if self._commands is not None:
+            # without the liveness key every presence entry of this worker reads as offline
+            await self._commands.execute("DEL", self._worker_key(self.worker_id))
+            await self._commands.close()
+            self._commands = None
+
+    async def _read_loop(self) -> None:
+        while True:
+            _, data = await self._subscriber.next_message()
+            try:
+                await self._handler(json.loads(data))
+            except Exception:
+                logger.exception("Failed to deliver broker message")
+
+    async def _mark_alive(self, worker_id: str) -> None:
+        await self._commands.execute(
+            "SET", self._worker_key(worker_id), "1", "PX", max(1, int(self.presence_ttl * 1000))
+        )
+
+    async def _alive(self, worker_ids: Iterable[str]) -> Set[str]:
+        alive = set()
+        for worker_id in set(worker_ids):
+            if await self._commands.execute("EXISTS", self._worker_key(worker_id)):
+                alive.add(worker_id)
+        return alive
+
+    async def publish(self, worker_id: Optional[str], envelope: dict) -> None:
+        await self._commands.execute("PUBLISH", self.channel(worker_id), json.dumps(envelope, default=str))
+
+    async def set_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        await self._commands.execute("HSET", self._presence_key(role), user_id, worker_id)
+
+    async def clear_presence(self, role: str, user_id: int, worker_id: str) -> None:
+        # not atomic; a lost entry of another worker comes back with its next heartbeat
+        if as_str(await self._commands.execute("HGET", self._presence_key(role), user_id)) == worker_id:
+            await self._commands.execute("HDEL", self._presence_key(role), user_id)
+
+    async def owner(self, role: str, user_id: int) -> Optional[str]:
+        worker_id = as_str(await self._commands.execute("HGET", self._presence_key(role), user_id))
+        if worker_id is None or not await self._alive([worker_id]):
+            return None
+        return worker_id
+
+    async def online(self, role: str) -> Set[int]:
+        reply = await self._commands.execute("HGETALL", self._presence_key(role))
+        entries = {int(reply[i]): as_str(reply[i + 1]) for i in range(0, len(reply), 2)}
+        alive = await self._alive(entries.values())
+        return {user_id for user_id, worker_id in entries.items() if worker_id in alive}
+
+    async def heartbeat(self, worker_id: str, present: Presence) -> None:
+        await self._mark_alive(worker_id)
+        for role, user_id in present:
+            await self.set_presence(role, user_id, worker_id)
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from enum import Enum
+from itertools import count
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Set
+
+from fastapi import WebSocket, status
+from starlette.websockets import WebSocketState
+
+from app.realtime.broker import Broker, MemoryBroker
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.realtime")
+
+# every live connection, for the per-socket gauges below
+_connections: "weakref.WeakSet[Connection]" = weakref.WeakSet()
+
+websocket_queue_depth = registry.gauge(
+    "websocket_queue_depth",
+    "Messages waiting in each socket's send queue",
+    lambda: [(connection.labels, len(connection)) for connection in list(_connections)]
+)
+websocket_queue_lag = registry.gauge(
+    "websocket_queue_lag_seconds",
+    "Age of the oldest message waiting in each socket's send queue",
+    lambda: [(connection.labels, connection.lag()) for connection in list(_connections)]
+)
+websocket_send_lag = registry.histogram(
+    "websocket_send_lag_seconds",
+    "Time from queueing a websocket message to handing it to the socket"
+)
+websocket_messages_dropped = registry.counter(
+    "websocket_messages_dropped_total",
+    "Websocket messages dropped or replaced before they were sent"
+)
+websocket_slow_disconnects = registry.counter(
+    "websocket_slow_disconnects_total",
+    "Sockets closed because they could not keep up"
+)
+websocket_broker_messages = registry.counter(
+    "websocket_broker_messages_total",
+    "Websocket messages exchanged with other workers through the broker"
+)
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    # keyed messages replace a queued one with the same key, otherwise drop oldest
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class Connection:
+    def __init__(
+            self,
+            websocket: WebSocket,
+            user: dict,
+            max_queue_size: int = 256,
+            policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+            send_timeout: float = 10.0,
+            on_close=None
+    ):
+        self.websocket = websocket
+        self.user = user
+        self.max_queue_size = max_queue_size
+        self.policy = OverflowPolicy(policy)
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._on_close = on_close
+        self._queue: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+        self._sequence = count()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Task] = None
+        _connections.add(self)
+
+    @property
+    def labels(self) -> dict:
+        return {"role": self.user["type"], "user_id": self.user["id"]}
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def lag(self) -> float:
+        if not self._queue:
+            return 0.0
+        enqueued_at, _ = next(iter(self._queue.values()))
+        return time.monotonic() - enqueued_at
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def send(self, message: dict, coalesce_key: Optional[Hashable] = None) -> bool:
+        # never blocks: the writer task drains the queue at the socket's own pace
+        if self.closed:
+            return False
+
+        key: Hashable = next(self._sequence)
+        if self.policy == OverflowPolicy.COALESCE and coalesce_key is not None:
+            key = ("coalesce", coalesce_key)
+            if key in self._queue:
+                enqueued_at, _ = self._queue[key]
+                self._queue[key] = (enqueued_at, message)
+                websocket_messages_dropped.inc(role=self.user["type"], reason="coalesced")
+                return True
+
+        if len(self._queue) >= self.max_queue_size:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                websocket_slow_disconnects.inc(role=self.user["type"], reason="overflow")
+                self._closing = asyncio.get_running_loop().create_task(
+                    self.close(status.WS_1013_TRY_AGAIN_LATER)
+                )
+                return False
+            self._queue.popitem(last=False)
+            websocket_messages_dropped.inc(role=self.user["type"], reason="overflow")
+
+        self._queue[key] = (time.monotonic(), message)
+        self._wakeup.set()
+        return True
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                _, (enqueued_at, message) = self._queue.popitem(last=False)
+                await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+                websocket_send_lag.observe(time.monotonic() - enqueued_at, role=self.user["type"])
+        except asyncio.TimeoutError:
+            logger.info("Closing websocket for %s %s: send timed out", self.user["type"], self.user["id"])
+            websocket_slow_disconnects.inc(role=self.user["type"], reason="timeout")
+            self._closing = asyncio.create_task(self.close(status.WS_1013_TRY_AGAIN_LATER))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # the peer went away; the receive loop sees the disconnect on its side
+            self._closing = asyncio.create_task(self.close())
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        _connections.discard(self)
+        if self._on_close:
+            await self._on_close(self)
+
+        writer = self._writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await asyncio.wait_for(self.websocket.close(code), self.send_timeout)
+            except Exception:
+                pass
+
+
+class ConnectionManager:
+    def __init__(
+            self,
+            max_queue_size: int = 256,
+            policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+            send_timeout: float = 10.0,
+            broker: Optional[Broker] = None,
+            worker_id: Optional[str] = None,
+            heartbeat_interval: float = 10.0
+    ):
+        self.max_queue_size = max_queue_size
+        self.policy = OverflowPolicy(policy)
+        self.send_timeout = send_timeout
+        self.broker = broker if broker is not None else MemoryBroker()
+        self.worker_id = worker_id or uuid.uuid4().hex[:16]
+        self.heartbeat_interval = heartbeat_interval
+        self.active_dispatchers: Dict[int, Connection] = {}
+        self.active_drivers: Dict[int, Connection] = {}
+        # every open socket, including roles that have no presence slot
+        self._open: Set[Connection] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._topics: Dict[str, Callable[[Any], None]] = {}
+
+    async def start(self) -> None:
+        await self.broker.start(self.worker_id, self._deliver)
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        for connection in list(self.connections()):
+            await connection.close(status.WS_1001_GOING_AWAY)
+        await self.broker.stop()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            present = [(c.user["type"], c.user["id"]) for c in self.connections()]
+            try:
+                await self.broker.heartbeat(self.worker_id, present)
+            except Exception:
+                logger.exception("Websocket presence heartbeat failed")
+
+    def _active(self, role: str) -> Optional[Dict[int, Connection]]:
+        if role == "dispatcher":
+            return self.active_dispatchers
+        if role == "driver":
+            return self.active_drivers
+        return None
+
+    async def connect(self, user: dict, websocket: WebSocket) -> Connection:
+        await websocket.accept()
+        connection = Connection(
+            websocket,
+            user,
+            max_queue_size=self.max_queue_size,
+            policy=self.policy,
+            send_timeout=self.send_timeout,
+            on_close=self._forget
+        )
+        self._open.add(connection)
+        active = self._active(user["type"])
+        if active is not None:
+            active[user["id"]] = connection
+            try:
+                await self.broker.set_presence(user["type"], user["id"], self.worker_id)
+            except Exception:
+                logger.exception("Failed to record websocket presence")
+        connection.start()
+        return connection
+
+    async def _forget(self, connection: Connection) -> None:
+        self._open.discard(connection)
+        active = self._active(connection.user["type"])
+        # a newer socket for the same user may already have taken the slot
+        if active is not None and active.get(connection.user["id"]) is connection:
+            del active[connection.user["id"]]
+            try:
+                await self.broker.clear_presence(connection.user["type"], connection.user["id"], self.worker_id)
+            except Exception:
+                logger.exception("Failed to clear websocket presence")
+
+    async def disconnect(self, connection: Connection) -> None:
+        await connection.close()
+
+    async def close_revoked(self, jtis: Iterable[str]) -> int:
+        # sockets opened with a token that has since been revoked
+        jtis = set(jtis)
+        revoked = [connection for connection in list(self._open) if connection.user.get("jti") in jtis]
+        for connection in revoked:
+            await connection.close(status.WS_1008_POLICY_VIOLATION)
+        return len(revoked)
+
+    def connections(self) -> Iterator[Connection]:
+        yield from list(self.active_dispatchers.values())
+        yield from list(self.active_drivers.values())
+
+    async def online(self, role: str) -> Set[int]:
+        # users with a socket on any worker
+        return await self.broker.online(role)
+
+    async def _publish(self, worker_id: Optional[str], envelope: dict) -> None:
+        try:
+            await self.broker.publish(worker_id, {"origin": self.worker_id, **envelope})
+            websocket_broker_messages.inc(direction="published", target=envelope["target"])
+        except Exception:
+            logger.exception("Failed to publish websocket message")
+
+    def on_topic(self, topic: str, callback: Callable[[Any], None]) -> None:
+        # non-socket traffic that every worker should see, e.g. delivery events
+        self._topics[topic] = callback
+
+    async def publish_topic(self, topic: str, payload: Any) -> None:
+        await self._publish(None, {"target": "topic", "topic": topic, "payload": payload})
+
+    async def _deliver(self, envelope: dict) -> None:
+        # called by the broker for messages from other workers
+        if envelope.get("origin") == self.worker_id:
+            return
+        websocket_broker_messages.inc(direction="received", target=envelope["target"])
+        coalesce_key = envelope.get("coalesce_key")
+        if isinstance(coalesce_key, list):
+            coalesce_key = tuple(coalesce_key)
+        if envelope["target"] == "driver":
+            connection = self.active_drivers.get(envelope["user_id"])
+            if connection is not None:
+                connection.send(envelope["message"], coalesce_key)
+        elif envelope["target"] == "dispatchers":
+            self._send_to_local_dispatchers(envelope["message"], coalesce_key)
+        elif envelope["target"] == "topic":
+            if callback := self._topics.get(envelope["topic"]):
+                callback(envelope["payload"])
+
+    def _send_to_local_dispatchers(self, message: dict, coalesce_key: Optional[Hashable]) -> None:
+        for connection in list(self.active_dispatchers.values()):
+            connection.send(message, coalesce_key)
+
+    async def send_to_driver(self, driver_id: int, message: dict, coalesce_key: Optional[Hashable] = None):
+        # an idle connection has an empty queue, so test for None rather than truthiness
+        connection = self.active_drivers.get(driver_id)
+        if connection is not None:
+            connection.send(message, coalesce_key)
+            return
+        # route to whichever worker holds the driver's socket, if any
+        try:
+            owner = await self.broker.owner("driver", driver_id)
+        except Exception:
+            logger.exception("Failed to look up websocket presence")
+            return
+        if owner is not None and owner != self.worker_id:
+            await self._publish(owner, {
+                "target": "driver",
+                "user_id": driver_id,
+                "message": message,
+                "coalesce_key": coalesce_key
+            })
+
+    async def send_to_all_dispatchers(self, message: dict, coalesce_key: Optional[Hashable] = None):
+        self._send_to_local_dispatchers(message, coalesce_key)
+        await self._publish(None, {"target": "dispatchers", "message": message, "coalesce_key": coalesce_key})
@@ -0,0 +1,261 @@
+import asyncio
+import threading
+from enum import Enum
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.models import DeliveryEvent
+from app.repositories.delivery_event_repository import DeliveryEventRepository
+from app.utils.metrics import registry
+
+# session.info keys: events added in this transaction, and their rows once flushed
+_PENDING = "delivery_events_pending"
+_FLUSHED = "delivery_events_flushed"
+
+delivery_events_published = registry.counter(
+    "delivery_events_published_total",
+    "Delivery events published to live subscribers"
+)
+delivery_event_subscribers_overflowed = registry.counter(
+    "delivery_event_subscribers_overflowed_total",
+    "Event stream subscribers cut off because they fell too far behind"
+)
+
+
+class DeliveryEventType(str, Enum):
+    CREATED = "delivery.created"
+    ASSIGNED = "delivery.assigned"
+    UNASSIGNED = "delivery.unassigned"
+    STATUS_CHANGED = "delivery.status_changed"
+    REVIEW_ADDED = "review.added"
+
+
+def visible_to(user: dict, event: dict) -> bool:
+    if user["type"] in ("dispatcher", "admin"):
+        return True
+    if user["type"] == "driver":
+        return event["driver_id"] == user["id"]
+    if user["type"] == "client":
+        return event["client_id"] == user["id"]
+    return False
+
+
+def record_delivery_event(
+        db: Session,
+        type: DeliveryEventType,
+        delivery_id: int,
+        driver_id: Optional[int],
+        client_id: Optional[int],
+        **data
+) -> DeliveryEvent:
+    # written in the caller's transaction and published only once it commits
+    delivery_event = DeliveryEvent(
+        type=type.value,
+        delivery_id=delivery_id,
+        driver_id=driver_id,
+        client_id=client_id,
+        data=data
+    )
+    db.add(delivery_event)
+    db.info.setdefault(_PENDING, []).append(delivery_event)
+    return delivery_event
+
+
+def record_delivery_events(db: Session, rows: List[dict]) -> None:
+    # bulk variant for imports: one INSERT ... RETURNING for the whole chunk
+    if not rows:
+        return
+    inserted = DeliveryEventRepository(db).bulk_insert_events([
+        {**row, "type": row["type"].value, "data": row.get("data", {})} for row in rows
+    ])
+    db.info.setdefault(_FLUSHED, []).extend(delivery_event.to_dict() for delivery_event in inserted)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_events(session: Session, flush_context) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        session.info.setdefault(_FLUSHED, []).extend(delivery_event.to_dict() for delivery_event in pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_events(session: Session) -> None:
+    flushed = session.info.pop(_FLUSHED, None)
+    if flushed:
+        from app.realtime import get_event_bus
+        get_event_bus().publish(flushed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_FLUSHED, None)
+
+
+class Subscription:
+    def __init__(self, bus: "EventBus", user: dict, max_queue_size: int):
+        self.bus = bus
+        self.user = user
+        self.loop = asyncio.get_running_loop()
+        self.max_queue_size = max_queue_size
+        # unbounded so the overflow sentinel always fits; the limit is enforced in _offer
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.overflowed = False
+        self.revoked = False
+        # the backlog replay stopped at the limit: end after it so the client resumes from there
+        self.truncated = False
+
+    def _offer(self, events: Iterable[dict]) -> None:
+        # runs on the subscriber's loop
+        for delivery_event in events:
+            if self.overflowed:
+                return
+            if not visible_to(self.user, delivery_event):
+                continue
+            if self.queue.qsize() >= self.max_queue_size:
+                # keep what is queued so the client's Last-Event-ID stays contiguous, then it
+                # reconnects and catches up from the table
+                self.overflowed = True
+                delivery_event_subscribers_overflowed.inc(role=self.user["type"])
+                self.queue.put_nowait(None)
+                return
+            self.queue.put_nowait(delivery_event)
+
+    def _revoke(self) -> None:
+        # runs on the subscriber's loop; nothing queued is delivered after this
+        self.revoked = True
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[dict]:
+        # None means the subscriber fell behind and must resume from its last event id,
+        # or that its token was revoked and it must not get anything more
+        if self.revoked or (self.overflowed and self.queue.empty()):
+            return None
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fans committed delivery events out to live subscribers; the table holds the history."""
+
+    topic = "delivery_events"
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._relay = None
+        self._relay_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listeners: List[Callable[[List[dict]], None]] = []
+
+    def bind(self, manager, loop: asyncio.AbstractEventLoop) -> None:
+        # relay through the websocket broker so subscribers on other workers see the event too
+        self._relay = manager
+        self._relay_loop = loop
+        manager.on_topic(self.topic, self.deliver)
+
+    def listen(self, listener: Callable[[List[dict]], None]) -> None:
+        # in-process consumers such as caches; called on the publishing thread, so keep it quick
+        self._listeners.append(listener)
+
+    def subscribe(self, user: dict) -> Subscription:
+        subscription = Subscription(self, user, self.max_queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, events: List[dict]) -> None:
+        # safe to call from any thread, e.g. a sync route committing in the threadpool
+        self.deliver(events)
+        delivery_events_published.inc(len(events))
+        if self._relay is not None:
+            for delivery_event in events:
+                asyncio.run_coroutine_threadsafe(
+                    self._relay.publish_topic(self.topic, [delivery_event]),
+                    self._relay_loop
+                )
+
+    def revoke(self, jtis: Iterable[str]) -> None:
+        # ends the streams opened with a since revoked token; safe to call from any thread
+        jtis = set(jtis)
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.user.get("jti") in jtis]
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._revoke)
+            except RuntimeError:
+                pass
+
+    def deliver(self, events: List[dict]) -> None:
+        for listener in self._listeners:
+            listener(events)
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, events)
+            except RuntimeError:
+                # the subscriber's loop is gone
+                self.unsubscribe(subscription)
+
+
+def _load_backlog(db: Session, user: dict, last_event_id: int, limit: int) -> Tuple[List[dict], bool]:
+    events, truncated = DeliveryEventRepository(db).backlog(last_event_id, user, max_events=limit)
+    # hand the connection back, the rest of the stream is served from memory
+    db.commit()
+    return events, truncated
+
+
+async def open_event_stream(
+        bus: EventBus,
+        db: Session,
+        user: dict,
+        last_event_id: Optional[int],
+        backlog_limit: int
+) -> Tuple[Subscription, List[dict]]:
+    # subscribe before reading the backlog so nothing committed in between is missed
+    subscription = bus.subscribe(user)
+    if last_event_id is None:
+        return subscription, []
+    try:
+        backlog, subscription.truncated = await run_in_threadpool(
+            _load_backlog, db, user, last_event_id, backlog_limit
+        )
+    except Exception:
+        subscription.close()
+        raise
+    return subscription, backlog
+
+
+async def iter_events(
+        subscription: Subscription,
+        backlog: List[dict],
+        idle_timeout: Optional[float] = None
+) -> AsyncIterator[Optional[dict]]:
+    # yields None after idle_timeout without events; ends if the subscriber overflowed or
+    # right after a truncated backlog, as live events would skip the ones left out
+    replayed = {delivery_event["id"] for delivery_event in backlog}
+    for delivery_event in backlog:
+        yield delivery_event
+    if subscription.truncated:
+        return
+    while True:
+        try:
+            delivery_event = await asyncio.wait_for(subscription.get(), idle_timeout)
+        except asyncio.TimeoutError:
+            yield None
+            continue
+        if delivery_event is None:
+            return
+        if delivery_event["id"] not in replayed:
+            yield delivery_event
@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.message import Message
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.realtime")
+
+chat_messages_pending = registry.gauge(
+    "chat_messages_pending",
+    "Chat messages accepted but not yet written to the database"
+)
+chat_message_batch_size = registry.histogram(
+    "chat_message_batch_size",
+    "Chat messages written per INSERT",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000)
+)
+chat_message_flush_seconds = registry.histogram(
+    "chat_message_flush_seconds",
+    "Time to write one batch of chat messages"
+)
+chat_messages_rejected = registry.counter(
+    "chat_messages_rejected_total",
+    "Chat messages the database refused and that were dropped"
+)
+
+
+def _is_rejected_row(error: DBAPIError) -> bool:
+    """True when the database refused the data itself, so retrying the same rows can never succeed."""
+    if isinstance(error, (DataError, IntegrityError)):
+        return True
+    # asyncpg surfaces these as a plain DBAPIError: data exceptions and integrity violations
+    # carry SQLSTATE class 22/23, arguments it cannot encode (e.g. "abc" or 2**31 for an
+    # int4 column) fail client side with a ValueError
+    sqlstate = getattr(error.orig, "sqlstate", None) or ""
+    return sqlstate[:2] in ("22", "23") or isinstance(error.orig.__cause__, ValueError)
+
+
+class MessageWriter:
+    """
+    Write-behind persistence for chat messages.
+
+    submit() hands back the stored row (id from the messages sequence and the
+    server timestamp) straight away; rows reach the table in multi-row INSERTs
+    every flush_interval seconds or batch_size messages, whichever comes first.
+
+    Durability: a message is only durable once its batch commits, so a crash
+    loses at most the messages of the last flush_interval. Database errors
+    keep the batch and retry it; rows the database rejects outright (e.g. an
+    unknown receiver or a malformed id) are dropped one by one without failing their batch.
+    stop() flushes everything still pending and is called on shutdown; if the
+    database stays unreachable for drain_attempts tries the rest is dropped
+    and logged.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            batch_size: int = 200,
+            flush_interval: float = 0.05,
+            id_block_size: int = 100,
+            max_pending: int = 10000,
+            retry_delay: float = 1.0,
+            drain_attempts: int = 3
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.id_block_size = id_block_size
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.drain_attempts = drain_attempts
+        self._pending: Deque[dict] = deque()
+        self._ids: Deque[int] = deque()
+        self._id_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+
+    async def _next_id(self) -> int:
+        async with self._id_lock:
+            if not self._ids:
+                # ids come from the table's own sequence, a block per round trip
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        text("SELECT nextval(pg_get_serial_sequence('messages', 'id')) FROM generate_series(1, :n)"),
+                        {"n": self.id_block_size}
+                    )
+                    self._ids.extend(result.scalars())
+            return self._ids.popleft()
+
+    async def submit(self, text: str, sender_id: int, receiver_id: Optional[int]) -> dict:
+        # bounded buffer: if the database falls behind, senders wait instead of growing memory
+        while len(self._pending) >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+
+        row = {
+            "id": await self._next_id(),
+            "text": text,
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "created_at": datetime.datetime.now(),
+        }
+        self._pending.append(row)
+        chat_messages_pending.set(len(self._pending))
+        if self._flusher is None:
+            logger.warning("MessageWriter is not running, message %s is only buffered", row["id"])
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return row
+
+    async def _flush_loop(self) -> None:
+        failures = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                due = False
+            except asyncio.TimeoutError:
+                due = True
+            self._wakeup.clear()
+
+            # the timer and shutdown write whatever is pending, otherwise only full batches
+            while self._pending and (due or self._stopping or len(self._pending) >= self.batch_size):
+                if await self._flush_batch():
+                    failures = 0
+                    continue
+                failures += 1
+                if self._stopping and failures >= self.drain_attempts:
+                    logger.error("Dropping %d unsaved chat messages on shutdown", len(self._pending))
+                    self._pending.clear()
+                    break
+                await asyncio.sleep(self.retry_delay)
+
+            chat_messages_pending.set(len(self._pending))
+            if len(self._pending) < self.max_pending:
+                self._space.set()
+            if self._stopping and not self._pending:
+                return
+
+    async def _flush_batch(self) -> bool:
+        batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        started = time.perf_counter()
+        try:
+            try:
+                await self._insert(batch)
+            except DBAPIError as error:
+                if not _is_rejected_row(error):
+                    raise
+                await self._insert_one_by_one(batch)
+        except Exception:
+            logger.exception("Failed to write %d chat messages, will retry", len(batch))
+            return False
+
+        for _ in batch:
+            self._pending.popleft()
+        chat_message_batch_size.observe(len(batch))
+        chat_message_flush_seconds.observe(time.perf_counter() - started)
+        return True
+
+    async def _insert(self, rows: List[dict]) -> None:
+        async with self.session_factory() as session:
+            # one INSERT ... VALUES (...), (...) statement per batch
+            await session.execute(insert(Message).values(rows))
+            await session.commit()
+
+    async def _insert_one_by_one(self, rows: List[dict]) -> None:
+        # isolate the rows that broke the batch so the rest still lands
+        for row in rows:
+            try:
+                await self._insert([row])
+            except DBAPIError as error:
+                if not _is_rejected_row(error):
+                    raise
+                logger.warning("Dropping chat message %s rejected by the database", row["id"])
+                chat_messages_rejected.inc()
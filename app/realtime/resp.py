@@ -0,0 +1,104 @@
+import asyncio
+from typing import Optional, Union
+from urllib.parse import unquote, urlparse
+
+# just enough of the Redis wire protocol (RESP2) for pub/sub and presence, so any
+# Redis-compatible server works without pulling in a client library
+
+Reply = Union[None, int, bytes, str, list]
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Reply:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Unexpected reply: {line!r}")
+
+
+class RespConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, url: str) -> "RespConnection":
+        parsed = urlparse(url)
+        reader, writer = await asyncio.open_connection(
+            parsed.hostname or "localhost",
+            parsed.port or 6379,
+            ssl=parsed.scheme == "rediss"
+        )
+        connection = cls(reader, writer)
+        if parsed.password:
+            if parsed.username:
+                await connection.execute("AUTH", unquote(parsed.username), unquote(parsed.password))
+            else:
+                await connection.execute("AUTH", unquote(parsed.password))
+        database = parsed.path.lstrip("/")
+        if database and database != "0":
+            await connection.execute("SELECT", database)
+        return connection
+
+    async def execute(self, *args) -> Reply:
+        async with self._lock:
+            self.writer.write(encode_command(*args))
+            await self.writer.drain()
+            return await read_reply(self.reader)
+
+    async def subscribe(self, *channels: str) -> None:
+        # after this the connection only carries pushed messages, read them with next_message
+        self.writer.write(encode_command("SUBSCRIBE", *channels))
+        await self.writer.drain()
+        for _ in channels:
+            await read_reply(self.reader)
+
+    async def next_message(self) -> tuple[str, bytes]:
+        while True:
+            reply = await read_reply(self.reader)
+            if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                return reply[1].decode(), reply[2]
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+def as_str(value: Optional[bytes]) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,118 @@
+from typing import Generic, TypeVar, Optional, Dict, Any
+
+from sqlalchemy import select, func, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.pagination import Page, keyset, make_page
+
+M = TypeVar('M')
+K = TypeVar('K')
+
+
+class AsyncBaseRepository(Generic[M, K]):
+    def __init__(self, db: AsyncSession, model: type[M]):
+        self.db = db
+        self.model = model
+        self._default_load_options = []
+
+    def with_load(self, *options: Any) -> 'AsyncBaseRepository':
+        self._default_load_options.extend(options)
+        return self
+
+    def _select(self):
+        query = select(self.model)
+        if self._default_load_options:
+            query = query.options(*self._default_load_options)
+        return query
+
+    async def get(self, id: K) -> Optional[M]:
+        query = self._select().filter(self.model.id == id)
+        return (await self.db.scalars(query)).unique().first()
+
+    def sort_key(self, order_by: Optional[str] = None) -> tuple:
+        column = getattr(self.model, order_by, None) if order_by else None
+        if column is None:
+            column = getattr(self.model, "created_at", None)
+        if column is None or column is self.model.id:
+            return (self.model.id,)
+        return column, self.model.id
+
+    async def paginate(
+            self,
+            query,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            order_by: Optional[str] = None,
+            desc_order: bool = False
+    ) -> Page:
+        columns = self.sort_key(order_by)
+        query = keyset(query, columns, cursor, limit, desc_order)
+        if skip and not cursor:
+            query = query.offset(skip)
+        return make_page((await self.db.scalars(query)).unique().all(), columns, limit)
+
+    async def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            order_by: Optional[str] = None,
+            desc_order: bool = False,
+            cursor: Optional[str] = None
+    ) -> Page:
+        return await self.paginate(self._select(), skip, limit, cursor, order_by, desc_order)
+
+    async def create(self, db_obj: M) -> M:
+        self.db.add(db_obj)
+        await self.db.commit()
+        await self.db.refresh(db_obj)
+        return db_obj
+
+    async def update(self, id: K, data: Dict[str, Any]) -> Optional[M]:
+        db_obj = await self.get(id)
+        if db_obj:
+            for key, value in data.items():
+                if hasattr(db_obj, key):
+                    setattr(db_obj, key, value)
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, id: K) -> bool:
+        db_obj = await self.get(id)
+        if db_obj:
+            await self.db.delete(db_obj)
+            await self.db.commit()
+            return True
+        return False
+
+    async def filter(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            **filters: Any
+    ) -> Page:
+        query = self._select()
+
+        for attr, value in filters.items():
+            if hasattr(self.model, attr):
+                if isinstance(value, list):
+                    query = query.filter(getattr(self.model, attr).in_(value))
+                else:
+                    query = query.filter(getattr(self.model, attr) == value)
+
+        return await self.paginate(query, skip, limit, cursor)
+
+    async def get_by_field(self, field_name: str, value: Any) -> Optional[M]:
+        if hasattr(self.model, field_name):
+            query = self._select().filter(getattr(self.model, field_name) == value)
+            return (await self.db.scalars(query)).unique().first()
+        return None
+
+    async def exists(self, id: K) -> bool:
+        query = select(exists().where(self.model.id == id))
+        return bool(await self.db.scalar(query))
+
+    async def count(self) -> int:
+        return await self.db.scalar(select(func.count()).select_from(self.model))
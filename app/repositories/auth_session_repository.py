@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import AuthSession
+from app.repositories.base_repository import BaseRepository
+
+
+class AuthSessionRepository(BaseRepository[AuthSession, int]):
+    def __init__(self, db: Session):
+        super().__init__(db, AuthSession)
+
+    def by_refresh_hash(self, refresh_token_hash: str) -> Optional[AuthSession]:
+        # locked so two concurrent refreshes with the same token cannot both rotate it
+        return self.db.query(self.model) \
+            .filter(self.model.refresh_token_hash == refresh_token_hash) \
+            .with_for_update() \
+            .first()
+
+    def active_for_user(self, user_id: int) -> List[AuthSession]:
+        return self.db.query(self.model) \
+            .filter(self.model.user_id == user_id,
+                    self.model.revoked_at.is_(None),
+                    self.model.expires_at > datetime.now()) \
+            .with_for_update() \
+            .all()
@@ -1,8 +1,10 @@
-from typing import Generic, TypeVar, List, Optional, Dict, Any
+from typing import Generic, TypeVar, List, Optional, Dict, Any, Iterable
 
-from sqlalchemy import asc, desc
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
+from app.utils.pagination import Page, paginate
+
 M = TypeVar('M')
 K = TypeVar('K')
 
@@ -27,25 +29,37 @@ class BaseRepository(Generic[M, K]):
         query = self._apply_load_options(query)
         return query.filter(self.model.id == id).first()
 
-    def get_all(
+    def sort_key(self, order_by: Optional[str] = None) -> tuple:
+        column = getattr(self.model, order_by, None) if order_by else None
+        if column is None:
+            column = getattr(self.model, "created_at", None)
+        if column is None or column is self.model.id:
+            return (self.model.id,)
+        # id breaks ties so the key is unique and no row is skipped between pages
+        return column, self.model.id
+
+    def paginate(
             self,
+            query,
             skip: int = 0,
             limit: int = 100,
+            cursor: Optional[str] = None,
             order_by: Optional[str] = None,
             desc_order: bool = False
-    ) -> List[M]:
+    ) -> Page:
+        return paginate(query, self.sort_key(order_by), cursor, limit, skip, desc_order)
+
+    def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            order_by: Optional[str] = None,
+            desc_order: bool = False,
+            cursor: Optional[str] = None
+    ) -> Page:
         query = self.db.query(self.model)
         query = self._apply_load_options(query)
-
-        if order_by:
-            column = getattr(self.model, order_by, None)
-            if column is not None:
-                if desc_order:
-                    query = query.order_by(desc(column))
-                else:
-                    query = query.order_by(asc(column))
-
-        return query.offset(skip).limit(limit).all()
+        return self.paginate(query, skip, limit, cursor, order_by, desc_order)
 
     def create(self, db_obj: M) -> M:
         self.db.add(db_obj)
@@ -53,6 +67,16 @@ class BaseRepository(Generic[M, K]):
         self.db.refresh(db_obj)
         return db_obj
 
+    def bulk_insert(self, rows: List[Dict[str, Any]]) -> List[K]:
+        # executemany through insertmanyvalues; ids come back in row order and
+        # nothing is added to the identity map, so the caller decides when to commit
+        if not rows:
+            return []
+        return list(self.db.scalars(
+            insert(self.model).returning(self.model.id, sort_by_parameter_order=True),
+            rows
+        ))
+
     def update(self, id: K, data: Dict[str, Any]) -> Optional[M]:
         db_obj = self.get(id)
         if db_obj:
@@ -75,8 +99,9 @@ class BaseRepository(Generic[M, K]):
             self,
             skip: int = 0,
             limit: int = 100,
+            cursor: Optional[str] = None,
             **filters: Any
-    ) -> List[M]:
+    ) -> Page:
         query = self.db.query(self.model)
         query = self._apply_load_options(query)
 
@@ -87,7 +112,7 @@ class BaseRepository(Generic[M, K]):
                 else:
                     query = query.filter(getattr(self.model, attr) == value)
 
-        return query.offset(skip).limit(limit).all()
+        return self.paginate(query, skip, limit, cursor)
 
     def get_by_field(self, field_name: str, value: Any) -> Optional[M]:
         if hasattr(self.model, field_name):
@@ -101,5 +126,11 @@ class BaseRepository(Generic[M, K]):
             self.db.query(self.model).filter_by(id=id).exists()
         ).scalar()
 
+    def existing_ids(self, ids: Iterable[K]) -> set[K]:
+        ids = list(ids)
+        if not ids:
+            return set()
+        return set(self.db.scalars(select(self.model.id).where(self.model.id.in_(ids))))
+
     def count(self) -> int:
         return self.db.query(self.model).count()
@@ -0,0 +1,48 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models import DeliveryEvent
+from app.repositories.base_repository import BaseRepository
+
+
+class DeliveryEventRepository(BaseRepository[DeliveryEvent, int]):
+    def __init__(self, db: Session):
+        super().__init__(db, DeliveryEvent)
+
+    def bulk_insert_events(self, rows: List[dict]) -> List[DeliveryEvent]:
+        return list(self.db.scalars(
+            insert(DeliveryEvent).returning(DeliveryEvent, sort_by_parameter_order=True),
+            rows
+        ))
+
+    def since(self, last_id: int, user: dict, limit: int = 500) -> List[DeliveryEvent]:
+        query = select(DeliveryEvent).where(DeliveryEvent.id > last_id)
+        if user["type"] == "driver":
+            query = query.where(DeliveryEvent.driver_id == user["id"])
+        elif user["type"] == "client":
+            query = query.where(DeliveryEvent.client_id == user["id"])
+        elif user["type"] not in ("dispatcher", "admin"):
+            return []
+        return list(self.db.scalars(query.order_by(DeliveryEvent.id).limit(limit)))
+
+    def backlog(
+            self,
+            last_id: int,
+            user: dict,
+            page_size: int = 500,
+            max_events: Optional[int] = None
+    ) -> Tuple[List[dict], bool]:
+        # returns the events after last_id and whether newer ones were left out at max_events
+        events: List[dict] = []
+        while True:
+            # one row past max_events tells whether anything was left out
+            limit = page_size if max_events is None else min(page_size, max_events + 1 - len(events))
+            page = self.since(last_id, user, limit)
+            events.extend(event.to_dict() for event in page)
+            if max_events is not None and len(events) > max_events:
+                return events[:max_events], True
+            if len(page) < limit:
+                return events, False
+            last_id = page[-1].id
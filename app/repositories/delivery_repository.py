@@ -0,0 +1,50 @@
+from typing import List, Tuple
+
+from sqlalchemy import Integer, Row, column, func, select, update, values
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Delivery, Location
+from app.models.delivery import DeliveryStatus
+from app.repositories.base_repository import BaseRepository
+
+# pg_advisory_xact_lock key taken by optimizer runs that write their plan
+ASSIGNMENT_LOCK_KEY = 0x61737369676E
+
+
+class DeliveryRepository(BaseRepository[Delivery, int]):
+    def __init__(self, db: Session):
+        super().__init__(db, Delivery)
+
+    def open_for_driver(self, driver_id: int) -> List[Delivery]:
+        return list(self.db.scalars(
+            select(Delivery)
+            .options(joinedload(Delivery.pickup_location), joinedload(Delivery.dropoff_location))
+            .where(Delivery.driver_id == driver_id,
+                   Delivery.status.in_((DeliveryStatus.PENDING, DeliveryStatus.IN_TRANSIT)))
+            .order_by(Delivery.id)
+        ))
+
+    def lock_assignment_runs(self) -> None:
+        # held until the transaction ends, so the next run waits and then reads the capacity this one used up
+        self.db.execute(select(func.pg_advisory_xact_lock(ASSIGNMENT_LOCK_KEY)))
+
+    def unassigned_pickups(self, lock: bool = False) -> List[Row]:
+        """id, client_id and pickup coordinates of every pending delivery without a driver."""
+        query = (
+            select(Delivery.id, Delivery.client_id, Location.latitude, Location.longitude)
+            .join(Location, Delivery.pickup_location_id == Location.id)
+            .where(Delivery.status == DeliveryStatus.PENDING, Delivery.driver_id.is_(None))
+            .order_by(Delivery.id)
+        )
+        if lock:
+            # rows another dispatcher is assigning right now are left to them
+            query = query.with_for_update(of=Delivery, skip_locked=True)
+        return list(self.db.execute(query))
+
+    def assign_drivers(self, assignments: List[Tuple[int, int]]) -> None:
+        # a single UPDATE ... FROM (VALUES ...) instead of one statement per delivery
+        planned = values(column("id", Integer), column("driver_id", Integer), name="planned").data(assignments)
+        self.db.execute(
+            update(Delivery).where(Delivery.id == planned.c.id).values(driver_id=planned.c.driver_id),
+            execution_options={"synchronize_session": False}
+        )
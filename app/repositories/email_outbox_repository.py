@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import EmailOutbox
+from app.models.email_outbox import OutboxStatus
+from app.repositories.base_repository import BaseRepository
+
+
+class EmailOutboxRepository(BaseRepository[EmailOutbox, int]):
+    def __init__(self, db: Session):
+        super().__init__(db, EmailOutbox)
+
+    def add_message(self, dedup_key: str, template: str, recipient_email: str, recipient_name: str,
+                    variables: dict) -> None:
+        # part of the caller's transaction; a duplicate key is silently skipped
+        self.db.execute(
+            insert(EmailOutbox)
+            .values(dedup_key=dedup_key, template=template, recipient_email=recipient_email,
+                    recipient_name=recipient_name, variables=variables, status=OutboxStatus.PENDING,
+                    attempts=0, next_attempt_at=datetime.now(), created_at=datetime.now())
+            .on_conflict_do_nothing(index_elements=[EmailOutbox.dedup_key])
+        )
+
+    def claim_due(self, limit: int, lease: timedelta) -> List[dict]:
+        """
+        Due pending messages, pushed lease into the future so no other dispatcher picks them up.
+
+        A dispatcher that dies mid-send leaves them to be retried once the
+        lease runs out, so delivery is at least once.
+        """
+        now = datetime.now()
+        rows = self.db.execute(
+            select(EmailOutbox.id, EmailOutbox.template, EmailOutbox.recipient_email,
+                   EmailOutbox.recipient_name, EmailOutbox.variables, EmailOutbox.attempts)
+            .where(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if rows:
+            self.db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([row.id for row in rows]))
+                .values(attempts=EmailOutbox.attempts + 1, next_attempt_at=now + lease),
+                execution_options={"synchronize_session": False}
+            )
+        self.db.commit()
+        return [{**row._asdict(), "attempts": row.attempts + 1} for row in rows]
+
+    def apply_results(self, rows: List[dict]) -> None:
+        if rows:
+            self.db.execute(update(EmailOutbox), rows)
+        self.db.commit()
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import GeocodeCacheEntry
+from app.repositories.base_repository import BaseRepository
+
+
+class GeocodeCacheRepository(BaseRepository[GeocodeCacheEntry, str]):
+    def __init__(self, db: Session):
+        super().__init__(db, GeocodeCacheEntry)
+
+    def get_fresh(self, geohash: str, not_before: datetime) -> Optional[GeocodeCacheEntry]:
+        return self.db.query(self.model) \
+            .filter(self.model.geohash == geohash, self.model.created_at >= not_before) \
+            .first()
+
+    def upsert(self, geohash: str, address: str) -> None:
+        now = datetime.now()
+        statement = insert(self.model).values(geohash=geohash, address=address, created_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.geohash],
+            set_={"address": address, "created_at": now}
+        )
+        self.db.execute(statement)
+        self.db.commit()
@@ -1,9 +1,67 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Row, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.models import Location
+from app.models.location import GeocodeStatus
 from app.repositories.base_repository import BaseRepository
 
 
 class LocationRepository(BaseRepository[Location, int]):
     def __init__(self, db: Session):
         super().__init__(db, Location)
+
+    def claim_pending(
+            self,
+            limit: int,
+            max_attempts: int,
+            lease: timedelta,
+            ids: Optional[Iterable[int]] = None
+    ) -> list[Row]:
+        """
+        Claims up to limit due pending rows (of ids, if given) for lease and
+        returns their (id, latitude, longitude, geocode_attempts).
+
+        SKIP LOCKED keeps concurrent claimers, in this process or another,
+        off each other's rows; the pushed back geocode_next_attempt_at keeps
+        them off until the claimer is done or the lease runs out.
+        """
+        now = datetime.now()
+        due = select(self.model.id) \
+            .where(self.model.geocode_status == GeocodeStatus.PENDING,
+                   self.model.geocode_attempts < max_attempts,
+                   or_(self.model.geocode_next_attempt_at.is_(None), self.model.geocode_next_attempt_at <= now))
+        if ids is not None:
+            due = due.where(self.model.id.in_(list(ids)))
+        due = due.order_by(self.model.id).limit(limit).with_for_update(skip_locked=True)
+        claimed = self.db.execute(
+            update(self.model)
+            .where(self.model.id.in_(due.scalar_subquery()))
+            .values(geocode_next_attempt_at=now + lease)
+            .returning(self.model.id, self.model.latitude, self.model.longitude, self.model.geocode_attempts)
+            .execution_options(synchronize_session=False)
+        ).all()
+        self.db.commit()
+        return sorted(claimed)
+
+    def apply_geocoding_results(self, rows: list[dict]) -> list[dict]:
+        # a location moved while it was being geocoded is pending again for its new coordinates,
+        # so a result only lands on the coordinates it was computed for; returns the rows applied
+        applied = []
+        for row in rows:
+            values = {key: value for key, value in row.items() if key not in ("id", "latitude", "longitude")}
+            result = self.db.execute(
+                update(self.model)
+                .where(self.model.id == row["id"],
+                       self.model.latitude == row["latitude"],
+                       self.model.longitude == row["longitude"],
+                       self.model.geocode_status == GeocodeStatus.PENDING)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                applied.append(row)
+        self.db.commit()
+        return applied
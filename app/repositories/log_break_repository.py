@@ -1,7 +1,8 @@
-from typing import List, Optional, Type
+from typing import Optional
 from sqlalchemy.orm import Session, joinedload
 from app.models import LogBreak, Delivery
 from app.repositories.base_repository import BaseRepository
+from app.utils.pagination import Page
 
 
 class LogBreakRepository(BaseRepository[LogBreak, int]):
@@ -12,10 +13,14 @@ class LogBreakRepository(BaseRepository[LogBreak, int]):
             joinedload(LogBreak.delivery)
         )
 
-    def get_for_driver(self, driver_id: int, skip: int = 0, limit: int = 100) -> list[Type[LogBreak]]:
-        return self.db.query(self.model)\
+    def get_for_driver(
+            self,
+            driver_id: int,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None
+    ) -> Page:
+        query = self.db.query(self.model)\
             .join(Delivery, self.model.delivery_id == Delivery.id)\
-            .filter(Delivery.driver_id == driver_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
\ No newline at end of file
+            .filter(Delivery.driver_id == driver_id)
+        return self.paginate(query, skip, limit, cursor)
\ No newline at end of file
@@ -1,9 +1,10 @@
-from typing import Optional, Type
+from typing import Optional
 
 from sqlalchemy.orm import Session, joinedload
 
 from app.models import Review
 from app.repositories.base_repository import BaseRepository
+from app.utils.pagination import Page
 
 
 class ReviewRepository(BaseRepository[Review, int]):
@@ -21,12 +22,16 @@ class ReviewRepository(BaseRepository[Review, int]):
             .exists()
         ).scalar()
 
-    def get_by_client(self, client_id: int, skip: int = 0, limit: int = 100) -> list[Type[Review]]:
-        return (
+    def get_by_client(
+            self,
+            client_id: int,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None
+    ) -> Page:
+        query = (
             self.db.query(Review)
             .join(Review.delivery)
             .filter_by(client_id=client_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self.paginate(query, skip, limit, cursor)
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import RevokedToken
+from app.repositories.base_repository import BaseRepository
+
+
+class RevokedTokenRepository(BaseRepository[RevokedToken, str]):
+    def __init__(self, db: Session):
+        super().__init__(db, RevokedToken)
+
+    def add(self, entries: Iterable[Tuple[str, float]]) -> None:
+        # part of the caller's transaction; (jti, expiry in unix seconds)
+        rows = [{"jti": jti, "expires_at": datetime.fromtimestamp(expires_at)} for jti, expires_at in entries]
+        if rows:
+            self.db.execute(insert(RevokedToken).values(rows).on_conflict_do_nothing(index_elements=[RevokedToken.jti]))
+
+    def unexpired(self) -> List[Tuple[str, float]]:
+        rows = self.db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > datetime.now())
+        )
+        return [(jti, expires_at.timestamp()) for jti, expires_at in rows]
+
+    def purge_expired(self) -> int:
+        result = self.db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now()))
+        self.db.commit()
+        return result.rowcount
@@ -2,20 +2,25 @@ from fastapi import Depends, HTTPException, APIRouter, status
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.dependencies import get_current_user, require_role
+from app.dependencies import get_current_user, get_token_claims, require_role
 from app.models import User, Client
+from app.passwords import get_password_pool
 from app.schemas.client import ClientSignup
-from app.schemas.user import UserLogin, UserRead
-from app.utils.jwt import create_access_token
-from app.utils.security import hash_password, verify_password
+from app.schemas.user import TokenRefresh, UserLogin, UserRead
+from app.services.session_service import SessionService
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 def authenticate_user(email: str, password: str, db: Session):
     user = db.query(User).filter_by(email=email).first()
-    if not user or not verify_password(password, user.password_hash):
+    pool = get_password_pool()
+    if not user or not pool.verify(password, user.password_hash):
         return None
+    if pool.needs_rehash(user.password_hash):
+        # hashed at a lower cost than this server now uses: upgrade while the password is at hand
+        user.password_hash = pool.hash(password)
+        db.commit()
     return user
 
 
@@ -24,12 +29,9 @@ def login(form_data: UserLogin, db: Session = Depends(get_db)):
     user = authenticate_user(form_data.email, form_data.password, db)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(
-        {"id": user.id, "sub": user.email, "type": user.type}
-    )
+    tokens = SessionService(db).start(user)
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **tokens,
         "user": {
             "id": user.id,
             "email": user.email,
@@ -40,13 +42,35 @@ def login(form_data: UserLogin, db: Session = Depends(get_db)):
     }
 
 
+@router.post("/refresh")
+def refresh(body: TokenRefresh, db: Session = Depends(get_db)):
+    try:
+        return SessionService(db).refresh(body.refresh_token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(claims: dict = Depends(get_token_claims), db: Session = Depends(get_db)):
+    SessionService(db).end(claims)
+
+
+@router.post("/users/{user_id}/revoke", dependencies=[Depends(require_role("admin"))])
+def revoke_user_sessions(user_id: int, db: Session = Depends(get_db)):
+    sessions = SessionService(db)
+    revocations = sessions.revoke_user(user_id)
+    db.commit()
+    sessions.publish(revocations)
+    return {"revoked_tokens": len(revocations)}
+
+
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 def signup(client: ClientSignup, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.email == client.email).first()
     if db_user:
         raise HTTPException(status_code=400, detail="A user with this email already exists")
 
-    hashed_password = hash_password(client.password)
+    hashed_password = get_password_pool().hash(client.password)
 
     new_user = Client(
         email=client.email,
@@ -1,13 +1,15 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.dependencies import require_role
 from app.models import Client, User
+from app.passwords import get_password_pool
 from app.schemas.client import ClientOut, ClientUpdate
-from app.utils.security import hash_password
+from app.services.session_service import SessionService
+from app.utils.pagination import paginate, with_next_cursor
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -15,8 +17,14 @@ router = APIRouter(prefix="/clients", tags=["clients"])
 @router.get("/",
             response_model=List[ClientOut],
             dependencies=[Depends(require_role("dispatcher"))])
-def list_clients(db: Session = Depends(get_db)):
-    return db.query(Client).all()
+def list_clients(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        db: Session = Depends(get_db)
+):
+    page = paginate(db.query(Client), (Client.created_at, Client.id), cursor, limit)
+    return with_next_cursor(response, page)
 
 
 @router.get("/{client_id}",
@@ -55,7 +63,7 @@ def update_client(
     if client_update.phone_number is not None:
         client.phone_number = client_update.phone_number
     if client_update.password is not None:
-        client.password_hash = hash_password(client_update.password)
+        client.password_hash = get_password_pool().hash(client_update.password)
 
     db.commit()
     db.refresh(client)
@@ -70,5 +78,9 @@ def delete_client(client_id: int, db: Session = Depends(get_db)):
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
 
+    # their access tokens would otherwise stay valid until they expire
+    sessions = SessionService(db)
+    revocations = sessions.revoke_user(client_id)
     db.delete(client)
     db.commit()
+    sessions.publish(revocations)
@@ -1,22 +1,81 @@
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from anyio import from_thread, to_thread
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.db import get_db
 from app.dependencies import require_role, get_current_user
-from app.models import Delivery, Driver, Location
+from app.geocoding import enqueue_geocoding
+from app.models import Delivery, Driver, Location, Client
+from app.models.delivery import DeliveryStatus
+from app.notifications import get_email_dispatcher
+from app.notifications.outbox import queue_status_email
+from app.realtime.events import DeliveryEventType, record_delivery_event
 from app.schemas.delivery import (
     DeliveryCreate,
     DeliveryUpdate,
     DeliveryShow,
-    DeliveryStatusUpdate
+    DeliveryStatusUpdate,
+    DeliveryImportReport
 )
+from app.schemas.assignment import AssignmentOptimizeRequest, AssignmentPlan
+from app.schemas.route import RoutePlan
+from app.schemas.track import TrackOut
+from app.services.delivery_service import DeliveryService
+from app.sequencing import get_route_planner
 from app.settings import settings
-from app.utils.email import send_message
+from app.telemetry import get_driver_availability, get_position_table, get_recent_position
+from app.tracks import build_delivery_track
+from app.tracks.store import FINISHED, TrackStore, choose_tier
+from app.utils.bulk_import import CSV_CONTENT_TYPES, NDJSON_CONTENT_TYPES, read_csv_rows, read_ndjson_rows
+from app.utils.pagination import paginate, with_next_cursor
 
 router = APIRouter(prefix="/deliveries", tags=["deliveries"])
 
+DELIVERY_SORT_KEY = (Delivery.created_at, Delivery.id)
+
+
+def _get_driver(db: Session, driver_id: Optional[int]) -> Optional[Driver]:
+    if driver_id is None:
+        return None
+    driver = db.query(Driver).options(joinedload(Driver.vehicle)).filter(Driver.id == driver_id).first()
+    if not driver:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Driver not found"
+        )
+    return driver
+
+
+def _get_client(db: Session, client_id: Optional[int]) -> Optional[Client]:
+    if client_id is None:
+        return None
+    client = db.get(Client, client_id)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    return client
+
+
+def _record_changes(db: Session, delivery: Delivery, previous_driver_id: Optional[int],
+                    previous_status: DeliveryStatus) -> None:
+    if delivery.driver_id != previous_driver_id:
+        if previous_driver_id is not None:
+            record_delivery_event(db, DeliveryEventType.UNASSIGNED, delivery.id, previous_driver_id,
+                                  delivery.client_id)
+        if delivery.driver_id is not None:
+            record_delivery_event(db, DeliveryEventType.ASSIGNED, delivery.id, delivery.driver_id,
+                                  delivery.client_id, previous_driver_id=previous_driver_id)
+    if delivery.status != previous_status:
+        status_event = record_delivery_event(db, DeliveryEventType.STATUS_CHANGED, delivery.id, delivery.driver_id,
+                                             delivery.client_id, status=delivery.status.value,
+                                             previous_status=previous_status.value)
+        queue_status_email(db, delivery, status_event)
+
 
 @router.post("/",
              response_model=DeliveryShow,
@@ -26,54 +85,96 @@ def create_delivery(
         delivery_data: DeliveryCreate,
         db: Session = Depends(get_db)
 ):
-    if delivery_data.driver_id:
-        driver = db.query(Driver).filter(Driver.id == delivery_data.driver_id).first()
-        if not driver:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Driver not found"
-            )
-
-    pickup_location = Location(**delivery_data.pickup_location.model_dump())
-    pickup_location.address = pickup_location.get_address()
-    db.add(pickup_location)
-
-    dropoff_location = Location(**delivery_data.dropoff_location.model_dump())
-    dropoff_location.address = dropoff_location.get_address()
-    db.add(dropoff_location)
-
-    db.commit()
-    db.refresh(pickup_location)
-    db.refresh(dropoff_location)
+    # driver and client are loaded up front so the response below is
+    # served from the identity map instead of lazy loads after commit
+    driver = _get_driver(db, delivery_data.driver_id)
+    client = _get_client(db, delivery_data.client_id)
 
     new_delivery = Delivery(
-        **delivery_data.model_dump(exclude={"pickup_location", "dropoff_location"}),
-        pickup_location_id=pickup_location.id,
-        dropoff_location_id=dropoff_location.id
+        **delivery_data.model_dump(exclude={"pickup_location", "dropoff_location", "driver_id", "client_id"}),
+        driver=driver,
+        client=client,
+        pickup_location=Location(**delivery_data.pickup_location.model_dump()),
+        dropoff_location=Location(**delivery_data.dropoff_location.model_dump()),
+        review=None
     )
-
     db.add(new_delivery)
+    # one flush: both locations in a single INSERT ... RETURNING, then the delivery
+    db.flush()
+    record_delivery_event(
+        db, DeliveryEventType.CREATED, new_delivery.id, new_delivery.driver_id, new_delivery.client_id,
+        status=new_delivery.status.value
+    )
+
+    response = DeliveryShow.model_validate(new_delivery)
     db.commit()
-    db.refresh(new_delivery)
+    enqueue_geocoding(response.pickup_location.id, response.dropoff_location.id)
 
-    return new_delivery
+    return response
+
+
+@router.post("/bulk",
+             response_model=DeliveryImportReport,
+             dependencies=[Depends(require_role("dispatcher"))])
+async def import_deliveries(
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in CSV_CONTENT_TYPES:
+        read_rows = read_csv_rows
+    elif content_type in NDJSON_CONTENT_TYPES:
+        read_rows = read_ndjson_rows
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload deliveries as text/csv or application/x-ndjson"
+        )
+
+    stream = request.stream()
+
+    def body():
+        # pulls the upload from the event loop chunk by chunk while the
+        # parsing and inserts run in a worker thread
+        while True:
+            try:
+                yield from_thread.run(stream.__anext__)
+            except StopAsyncIteration:
+                return
+
+    return await to_thread.run_sync(lambda: DeliveryService(db).import_rows(read_rows(body())))
+
+
+@router.post("/assign/optimize",
+             response_model=AssignmentPlan,
+             dependencies=[Depends(require_role("dispatcher"))])
+def optimize_assignments(
+        options: AssignmentOptimizeRequest = AssignmentOptimizeRequest(),
+        db: Session = Depends(get_db)
+):
+    fresh_since = datetime.now(timezone.utc) - timedelta(seconds=settings.telemetry.telemetry_position_max_age_seconds)
+    return DeliveryService(db).optimize_assignments(
+        options, get_position_table().all(since=fresh_since), get_driver_availability()
+    )
 
 
 @router.get("/",
             response_model=List[DeliveryShow],
             dependencies=[Depends(require_role("dispatcher"))])
 def list_deliveries(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         db: Session = Depends(get_db)
 ):
-    return (db.query(Delivery)
-            .options(joinedload(Delivery.review),
-                     joinedload(Delivery.driver),
-                     joinedload(Delivery.client),
-                     joinedload(Delivery.pickup_location),
-                     joinedload(Delivery.dropoff_location))
-            .offset(skip).limit(limit).all())
+    query = (db.query(Delivery)
+             .options(joinedload(Delivery.review),
+                      joinedload(Delivery.driver),
+                      joinedload(Delivery.client),
+                      joinedload(Delivery.pickup_location),
+                      joinedload(Delivery.dropoff_location)))
+    return with_next_cursor(response, paginate(query, DELIVERY_SORT_KEY, cursor, limit, skip))
 
 
 @router.get("/{delivery_id}",
@@ -105,51 +206,57 @@ def get_delivery(
 def update_delivery(
         delivery_id: int,
         delivery_data: DeliveryUpdate,
+        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db)
 ):
-    delivery = db.query(Delivery).filter(Delivery.id == delivery_id).first()
+    delivery = (db.query(Delivery)
+                .filter(Delivery.id == delivery_id)
+                .options(joinedload(Delivery.review),
+                         joinedload(Delivery.driver).joinedload(Driver.vehicle),
+                         joinedload(Delivery.client),
+                         joinedload(Delivery.pickup_location),
+                         joinedload(Delivery.dropoff_location)).first()
+                )
     if not delivery:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Delivery not found"
         )
 
+    previous_driver_id, previous_status = delivery.driver_id, delivery.status
+
     if 'driver_id' in delivery_data.model_fields_set:
-        if delivery_data.driver_id is not None:
-            driver = db.query(Driver).filter(Driver.id == delivery_data.driver_id).first()
-            if not driver:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Driver not found"
-                )
-        delivery.driver_id = delivery_data.driver_id
+        if delivery_data.driver_id != delivery.driver_id:
+            delivery.driver = _get_driver(db, delivery_data.driver_id)
 
     if 'client_id' in delivery_data.model_fields_set:
-        delivery.client_id = delivery_data.client_id
+        if delivery_data.client_id != delivery.client_id:
+            delivery.client = _get_client(db, delivery_data.client_id)
 
     if delivery_data.pickup_location:
-        pickup_location = Location(**delivery_data.pickup_location.model_dump())
-        pickup_location.address = pickup_location.get_address()
-        db.add(pickup_location)
-        db.commit()
-        db.refresh(pickup_location)
-        delivery.pickup_location_id = pickup_location.id
+        delivery.pickup_location = Location(**delivery_data.pickup_location.model_dump())
 
     if delivery_data.dropoff_location:
-        dropoff_location = Location(**delivery_data.dropoff_location.model_dump())
-        dropoff_location.address = dropoff_location.get_address()
-        db.add(dropoff_location)
-        db.commit()
-        db.refresh(dropoff_location)
-        delivery.dropoff_location_id = dropoff_location.id
+        delivery.dropoff_location = Location(**delivery_data.dropoff_location.model_dump())
 
     for field, value in delivery_data.model_dump(exclude_unset=True).items():
         if field not in ['driver_id', 'client_id', 'pickup_location', 'dropoff_location']:
             setattr(delivery, field, value)
 
+    new_locations = [location for location in db.new if isinstance(location, Location)]
+    db.flush()
+    _record_changes(db, delivery, previous_driver_id, previous_status)
+
+    response = DeliveryShow.model_validate(delivery)
+    new_location_ids = [location.id for location in new_locations]
+    status_changed = delivery.status != previous_status
+    if delivery.status in FINISHED and previous_status not in FINISHED:
+        background_tasks.add_task(build_delivery_track, delivery.id)
     db.commit()
-    db.refresh(delivery)
-    return delivery
+    enqueue_geocoding(*new_location_ids)
+    if status_changed:
+        get_email_dispatcher().wake()
+    return response
 
 
 @router.patch("/{delivery_id}/status",
@@ -158,10 +265,18 @@ def update_delivery(
 def update_delivery_status(
         delivery_id: int,
         new_status: DeliveryStatusUpdate,
+        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
-    delivery = db.query(Delivery).filter(Delivery.id == delivery_id).options(joinedload(Delivery.client)).first()
+    delivery = (db.query(Delivery)
+                .filter(Delivery.id == delivery_id)
+                .options(joinedload(Delivery.review),
+                         joinedload(Delivery.driver).joinedload(Driver.vehicle),
+                         joinedload(Delivery.client),
+                         joinedload(Delivery.pickup_location),
+                         joinedload(Delivery.dropoff_location)).first()
+                )
     if not delivery:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,21 +289,66 @@ def update_delivery_status(
             detail="You can only update status for your assigned deliveries"
         )
 
+    previous_status = delivery.status
     delivery.status = new_status.new_status
+    # the client's email goes into the outbox in this transaction; the dispatcher sends it
+    _record_changes(db, delivery, delivery.driver_id, previous_status)
+    response = DeliveryShow.model_validate(delivery)
+    status_changed = delivery.status != previous_status
+    if delivery.status in FINISHED and previous_status not in FINISHED:
+        # simplify the finished track once instead of on every read
+        background_tasks.add_task(build_delivery_track, delivery.id)
     db.commit()
-    db.refresh(delivery)
-    if settings.app.environment != "test":
-        try:
-            send_message(
-                delivery.client.first_name,
-                delivery.client.last_name,
-                delivery.client.email,
-                "Delivery Status Update",
-                f"Your delivery status has been updated to: {delivery.status.value}"
-            )
-        except:
-            print("Error sending email")
-    return delivery
+    if status_changed:
+        get_email_dispatcher().wake()
+    return response
+
+
+def _can_view_track(user: dict, delivery: Delivery) -> bool:
+    if user["type"] == "driver":
+        return delivery.driver_id == user["id"]
+    if user["type"] == "client":
+        return delivery.client_id == user["id"]
+    return user["type"] in ("dispatcher", "admin")
+
+
+@router.get("/{delivery_id}/track", response_model=TrackOut)
+def get_delivery_track(
+        delivery_id: int,
+        zoom: Optional[int] = Query(None, ge=0, le=22),
+        max_points: Optional[int] = Query(1000, ge=2, le=20000),
+        db: Session = Depends(get_db),
+        current_user: dict = Depends(get_current_user)
+):
+    delivery = (db.query(Delivery)
+                .filter(Delivery.id == delivery_id)
+                .options(joinedload(Delivery.pickup_location),
+                         joinedload(Delivery.dropoff_location)).first()
+                )
+    if not delivery:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Delivery not found"
+        )
+    if not _can_view_track(current_user, delivery):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view the track of your own deliveries"
+        )
+
+    store = TrackStore(db)
+    tiers = store.tiers(delivery)
+    tier = choose_tier(tiers, zoom, max_points)
+    return {
+        "delivery_id": delivery.id,
+        "tier": tier.tier,
+        "tolerance_m": tier.tolerance_m,
+        "points": tier.points.tolist(),
+        "pickup_location": delivery.pickup_location,
+        "dropoff_location": delivery.dropoff_location,
+        # positions on the timeline come from the finest tier, not the one being drawn
+        "timeline": store.timeline(delivery, tiers[0].points),
+    }
 
 
 @router.delete("/{delivery_id}",
@@ -213,36 +373,46 @@ def delete_delivery(
             response_model=List[DeliveryShow],
             dependencies=[Depends(require_role("driver"))])
 def get_my_deliveries(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         db: Session = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
-    return db.query(Delivery) \
+    query = db.query(Delivery) \
         .options(joinedload(Delivery.driver),
                  joinedload(Delivery.client),
                  joinedload(Delivery.pickup_location),
                  joinedload(Delivery.dropoff_location)) \
-        .filter(Delivery.driver_id == current_user["id"]) \
-        .offset(skip) \
-        .limit(limit) \
-        .all()
+        .filter(Delivery.driver_id == current_user["id"])
+    return with_next_cursor(response, paginate(query, DELIVERY_SORT_KEY, cursor, limit, skip))
+
+
+@router.get("/driver/me/route",
+            response_model=RoutePlan,
+            dependencies=[Depends(require_role("driver"))])
+def get_my_route(
+        db: Session = Depends(get_db),
+        current_user: dict = Depends(get_current_user)
+):
+    return get_route_planner().plan(db, current_user["id"], get_recent_position(current_user["id"]))
 
 
 @router.get("/client/me",
             response_model=List[DeliveryShow],
             dependencies=[Depends(require_role("client"))])
 def get_my_deliveries(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         db: Session = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
-    return db.query(Delivery) \
+    query = db.query(Delivery) \
         .options(joinedload(Delivery.review),
                  joinedload(Delivery.pickup_location),
                  joinedload(Delivery.dropoff_location)) \
-        .filter(Delivery.client_id == current_user["id"]) \
-        .offset(skip) \
-        .limit(limit) \
-        .all()
+        .filter(Delivery.client_id == current_user["id"])
+    return with_next_cursor(response, paginate(query, DELIVERY_SORT_KEY, cursor, limit, skip))
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db import get_db
 from app.dependencies import require_role
 from app.models import Dispatcher, User
+from app.passwords import get_password_pool
 from app.schemas.dispatcher import DispatcherCreate, DispatcherRead, DispatcherUpdate
-from app.utils.security import hash_password
+from app.services.session_service import SessionService
+from app.utils.pagination import paginate, with_next_cursor
 
 router = APIRouter(prefix="/dispatchers", tags=["dispatchers"])
 
@@ -20,7 +22,7 @@ def create_dispatcher(dispatcher: DispatcherCreate, db: Session = Depends(get_db
     if db_user:
         raise HTTPException(status_code=400, detail="A user with this email already exists")
 
-    hashed_password = hash_password(dispatcher.password)
+    hashed_password = get_password_pool().hash(dispatcher.password)
 
     new_user = Dispatcher(
         email=dispatcher.email,
@@ -38,8 +40,14 @@ def create_dispatcher(dispatcher: DispatcherCreate, db: Session = Depends(get_db
 
 @router.get("/", response_model=List[DispatcherRead],
             dependencies=[Depends(require_role("admin"))])
-def list_dispatchers(db: Session = Depends(get_db)):
-    return db.query(Dispatcher).all()
+def list_dispatchers(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        db: Session = Depends(get_db)
+):
+    page = paginate(db.query(Dispatcher), (Dispatcher.created_at, Dispatcher.id), cursor, limit)
+    return with_next_cursor(response, page)
 
 
 @router.get("/{dispatcher_id}", response_model=DispatcherRead,
@@ -75,5 +83,9 @@ def delete_dispatcher(dispatcher_id: int, db: Session = Depends(get_db)):
     if not dispatcher:
         raise HTTPException(status_code=404, detail="Dispatcher not found")
 
+    # their access tokens would otherwise stay valid until they expire
+    sessions = SessionService(db)
+    revocations = sessions.revoke_user(dispatcher_id)
     db.delete(dispatcher)
     db.commit()
+    sessions.publish(revocations)
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 
 from app.db import get_db
 from app.dependencies import require_role
 from app.models import Driver, User, Vehicle
-from app.schemas.driver import DriverCreate, DriverRead, DriverUpdate
-from app.utils.security import hash_password
+from app.passwords import get_password_pool
+from app.schemas.driver import DriverCreate, DriverRead, DriverUpdate, NearbyDriver
+from app.schemas.route import RoutePlan
+from app.sequencing import get_route_planner
+from app.services.session_service import SessionService
+from app.settings import settings
+from app.telemetry import get_driver_availability, get_driver_index, get_recent_position
+from app.telemetry.positions import Position
+from app.utils.pagination import paginate, with_next_cursor
 
 router = APIRouter(prefix="/drivers", tags=["drivers"])
 
@@ -29,7 +38,7 @@ def create_driver(driver: DriverCreate, db: Session = Depends(get_db)):
         if vehicle.driver:  # Перевірка чи транспорт вже прив'язаний до іншого водія
             raise HTTPException(status_code=400, detail="Vehicle already assigned to another driver")
 
-    hashed_password = hash_password(driver.password)
+    hashed_password = get_password_pool().hash(driver.password)
 
     new_driver = Driver(
         email=driver.email,
@@ -49,8 +58,54 @@ def create_driver(driver: DriverCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[DriverRead],
             dependencies=[Depends(require_role("dispatcher"))])
-def list_drivers(db: Session = Depends(get_db)):
-    return db.query(Driver).options(joinedload(Driver.vehicle)).all()
+def list_drivers(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        db: Session = Depends(get_db)
+):
+    query = db.query(Driver).options(joinedload(Driver.vehicle))
+    page = paginate(query, (Driver.created_at, Driver.id), cursor, limit)
+    return with_next_cursor(response, page)
+
+
+@router.get("/nearest", response_model=List[NearbyDriver],
+            dependencies=[Depends(require_role("dispatcher"))])
+def nearest_drivers(
+        lat: float = Query(ge=-90, le=90),
+        lon: float = Query(ge=-180, le=180),
+        k: int = Query(5, ge=1, le=100),
+        min_free_capacity: int = Query(1, ge=0),
+        max_distance_km: float = Query(50, gt=0, le=1000),
+        db: Session = Depends(get_db)
+):
+    availability = get_driver_availability()
+    if availability.is_stale():
+        availability.refresh(db)
+    now = datetime.now()
+    fresh_since = datetime.now(timezone.utc) - timedelta(seconds=settings.telemetry.telemetry_position_max_age_seconds)
+
+    def available(position: Position) -> bool:
+        driver = availability.get(position.driver_id)
+        return (driver is not None
+                and position.recorded_at >= fresh_since
+                and driver.free_capacity >= min_free_capacity
+                and not driver.on_break(now))
+
+    nearby = []
+    for distance, position in get_driver_index().nearest(lat, lon, k, max_distance_km, available):
+        driver = availability.get(position.driver_id)
+        nearby.append(NearbyDriver(
+            driver_id=position.driver_id,
+            first_name=driver.first_name,
+            last_name=driver.last_name,
+            latitude=position.latitude,
+            longitude=position.longitude,
+            recorded_at=position.recorded_at,
+            distance_km=round(distance, 3),
+            free_capacity=driver.free_capacity
+        ))
+    return nearby
 
 
 @router.get("/{driver_id}", response_model=DriverRead,
@@ -62,6 +117,14 @@ def get_driver(driver_id: int, db: Session = Depends(get_db)):
     return driver
 
 
+@router.get("/{driver_id}/route", response_model=RoutePlan,
+            dependencies=[Depends(require_role("dispatcher"))])
+def get_driver_route(driver_id: int, db: Session = Depends(get_db)):
+    if db.get(Driver, driver_id) is None:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    return get_route_planner().plan(db, driver_id, get_recent_position(driver_id))
+
+
 @router.patch("/{driver_id}", response_model=DriverRead,
             dependencies=[Depends(require_role("dispatcher"))])
 def update_driver(driver_id: int, driver_update: DriverUpdate, db: Session = Depends(get_db)):
@@ -97,5 +160,10 @@ def delete_driver(driver_id: int, db: Session = Depends(get_db)):
     if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
 
+    # their access tokens would otherwise stay valid until they expire
+    sessions = SessionService(db)
+    revocations = sessions.revoke_user(driver_id)
     db.delete(driver)
     db.commit()
+    sessions.publish(revocations)
+    get_driver_index().remove(driver_id)
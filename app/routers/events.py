@@ -0,0 +1,59 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.dependencies import get_current_user_from_stream
+from app.realtime import get_event_bus
+from app.realtime.events import iter_events, open_event_stream
+from app.settings import settings
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+def parse_last_event_id(header: Optional[str], query: Optional[int]) -> Optional[int]:
+    # EventSource resends the header on reconnect; the query parameter is for first connects
+    if header is None:
+        return query
+    try:
+        return int(header)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID")
+
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/deliveries")
+async def delivery_events(
+        last_event_id: Optional[int] = None,
+        last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+        user: dict = Depends(get_current_user_from_stream),
+        db: Session = Depends(get_db)
+):
+    config = settings.event_stream
+    subscription, backlog = await open_event_stream(
+        get_event_bus(),
+        db,
+        user,
+        parse_last_event_id(last_event_id_header, last_event_id),
+        config.event_stream_backlog_limit
+    )
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            async for event in iter_events(subscription, backlog, config.event_stream_keepalive_seconds):
+                yield format_event(event) if event is not None else ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
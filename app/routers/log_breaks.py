@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db import get_db
 from app.dependencies import require_role, get_current_user
 from app.schemas.log_break import LogBreakCreate, LogBreakUpdate, LogBreakOut
 from app.services.log_break_service import LogBreakService
+from app.utils.pagination import with_next_cursor
 
 router = APIRouter(prefix="/log_breaks", tags=["log_breaks"])
 
@@ -33,14 +34,18 @@ def create_log_break(
 
 @router.get("/", response_model=List[LogBreakOut])
 def list_log_breaks(
+        response: Response,
         delivery_id: int | None = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         service: LogBreakService = Depends(get_log_break_service)
 ):
     if delivery_id:
-        return service.filter(delivery_id=delivery_id, skip=skip, limit=limit)
-    return service.get_all(skip=skip, limit=limit)
+        page = service.filter(delivery_id=delivery_id, skip=skip, limit=limit, cursor=cursor)
+    else:
+        page = service.get_all(skip=skip, limit=limit, cursor=cursor)
+    return with_next_cursor(response, page)
 
 
 @router.get("/{log_break_id}", response_model=LogBreakOut)
@@ -95,9 +100,12 @@ def delete_log_break(
 @router.get("/driver/me", response_model=List[LogBreakOut],
             dependencies=[Depends(require_role("driver"))])
 def get_my_log_breaks(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         service: LogBreakService = Depends(get_log_break_service),
         current_user: dict = Depends(get_current_user)
 ):
-    return service.get_driver_log_breaks(current_user["id"], skip, limit)
\ No newline at end of file
+    page = service.get_driver_log_breaks(current_user["id"], skip, limit, cursor)
+    return with_next_cursor(response, page)
\ No newline at end of file
@@ -1,40 +1,37 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import or_
 
 from app.db import get_db
 from app.dependencies import get_current_user, require_role
 from app.models import Message, User
 from app.schemas.message import MessageShow, MessageCreate
+from app.utils.pagination import paginate, with_next_cursor
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
 
 @router.get("/conversation", response_model=List[MessageShow])
 def get_conversation(
+        response: Response,
         sender_id: Optional[int] = Query(None),
         receiver_id: Optional[int] = Query(None),
+        cursor: Optional[str] = None,
+        limit: int = 100,
         db: Session = Depends(get_db)
 ):
-    query = db.query(Message)
+    query = db.query(Message).options(joinedload(Message.sender), joinedload(Message.receiver))
 
     if sender_id and receiver_id:
+        query = query.filter(Message.conversation_key == Message.conversation_key_for(sender_id, receiver_id))
+    elif sender_id or receiver_id:
+        user_id = sender_id or receiver_id
         query = query.filter(
-            or_(
-                and_(Message.sender_id == sender_id, Message.receiver_id == receiver_id),
-                and_(Message.sender_id == receiver_id, Message.receiver_id == sender_id)
-            )
-        )
-    elif sender_id:
-        query = query.filter(
-            or_(Message.sender_id == sender_id, Message.receiver_id == sender_id)
-        )
-    elif receiver_id:
-        query = query.filter(
-            or_(Message.sender_id == receiver_id, Message.receiver_id == receiver_id)
+            or_(Message.sender_id == user_id, Message.receiver_id == user_id)
         )
     else:
         return []
 
-    return query.order_by(Message.created_at.desc()).all()
+    page = paginate(query, (Message.created_at, Message.id), cursor, limit, descending=True)
+    return with_next_cursor(response, page)
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.db import get_db
 from app.dependencies import require_role, get_current_user
 from app.models import Delivery
 from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewRead
 from app.services.review_service import ReviewService
+from app.utils.pagination import with_next_cursor
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -41,15 +42,17 @@ def create_review(
             response_model=List[ReviewRead],
             dependencies=[Depends(require_role("dispatcher"))])
 def list_reviews(
+        response: Response,
         delivery_id: int | None = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         service: ReviewService = Depends(get_review_service)
 ):
     if delivery_id:
         review = service.get_by_delivery(delivery_id)
         return [review] if review else []
-    return service.get_all(skip=skip, limit=limit)
+    return with_next_cursor(response, service.get_all(skip=skip, limit=limit, cursor=cursor))
 
 
 @router.get("/{review_id}",
@@ -101,9 +104,12 @@ def delete_review(
             response_model=List[ReviewRead],
             dependencies=[Depends(require_role("client"))])
 def get_my_reviews(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         service: ReviewService = Depends(get_review_service),
         current_user: dict = Depends(get_current_user)
 ):
-    return service.get_by_client(client_id=current_user["id"], skip=skip, limit=limit)
+    page = service.get_by_client(client_id=current_user["id"], skip=skip, limit=limit, cursor=cursor)
+    return with_next_cursor(response, page)
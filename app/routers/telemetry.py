@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.dependencies import get_current_user, require_role
+from app.schemas.telemetry import DriverPosition, GpsPingBatch, TelemetryAccepted
+from app.telemetry import get_position_table, get_telemetry_writer
+from app.telemetry.writer import TelemetryOverloaded
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+
+@router.post("/pings",
+             status_code=status.HTTP_202_ACCEPTED,
+             response_model=TelemetryAccepted,
+             dependencies=[Depends(require_role("driver"))])
+async def ingest_pings(
+        batch: GpsPingBatch,
+        current_user: dict = Depends(get_current_user)
+):
+    # async and database-free: the pings are buffered and written with COPY in the background
+    try:
+        accepted, rejected = get_telemetry_writer().submit(current_user["id"], batch.pings)
+    except TelemetryOverloaded as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e),
+                            headers={"Retry-After": "1"})
+    return TelemetryAccepted(accepted=accepted, rejected=rejected)
+
+
+@router.get("/positions",
+            response_model=List[DriverPosition],
+            dependencies=[Depends(require_role("dispatcher"))])
+async def list_positions(max_age_seconds: Optional[int] = None):
+    # latest positions reported to any worker, served from memory
+    since = None
+    if max_age_seconds is not None:
+        since = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    return [position._asdict() for position in get_position_table().all(since)]
+
+
+@router.get("/positions/{driver_id}",
+            response_model=DriverPosition,
+            dependencies=[Depends(require_role("dispatcher"))])
+async def get_position(driver_id: int):
+    position = get_position_table().get(driver_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="No position reported for this driver")
+    return position._asdict()
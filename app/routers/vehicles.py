@@ -1,11 +1,12 @@
-from typing import List
-from fastapi import APIRouter, status, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, status, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.dependencies import require_role
 from app.schemas.vehicle import VehicleCreate, VehicleRead, VehicleUpdate
 from app.services.vehicle_service import VehicleService
+from app.utils.pagination import with_next_cursor
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
@@ -43,12 +44,14 @@ def get_unassigned_vehicles(
             response_model=List[VehicleRead],
             dependencies=[Depends(require_role("dispatcher"))])
 def list_vehicles(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
         service: VehicleService = Depends(get_vehicle_service)
 ):
-    vehicles = service.get_all(skip=skip, limit=limit)
-    return vehicles
+    vehicles = service.get_all(skip=skip, limit=limit, cursor=cursor)
+    return with_next_cursor(response, vehicles)
 
 
 @router.get("/{vehicle_id}",
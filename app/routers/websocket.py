@@ -1,109 +1,167 @@
-from typing import Dict, List
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter, Depends
+import asyncio
+from typing import List, Optional
+from fastapi import WebSocket, WebSocketDisconnect, APIRouter, Depends, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.dependencies import get_current_user_from_ws
 from app.db import get_db
-from app.models.message import Message
-from collections import defaultdict
-import datetime
+from app.dependencies import get_current_user_from_ws
+from app.realtime import get_connection_manager, get_event_bus, get_message_writer
+from app.realtime.events import iter_events, open_event_stream
+from app.schemas.telemetry import GpsPingBatch
+from app.settings import settings
+from app.telemetry import get_telemetry_writer
+from app.telemetry.writer import TelemetryOverloaded
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
+manager = get_connection_manager()
+writer = get_message_writer()
+telemetry_writer = get_telemetry_writer()
+
+# ids are int4 columns
+MAX_USER_ID = 2 ** 31 - 1
+
+
+def _is_user_id(value) -> bool:
+    # bool is an int subclass, "5" and 5.0 are not ids
+    return type(value) is int and 0 < value <= MAX_USER_ID
+
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_dispatchers: Dict[int, WebSocket] = {}
-        self.active_drivers: Dict[int, WebSocket] = {}
+def message_payload(message: dict) -> dict:
+    return {
+        "id": message["id"],
+        "text": message["text"],
+        "sender_id": message["sender_id"],
+        "receiver_id": message["receiver_id"],
+        "created_at": message["created_at"].isoformat(),
+        "type": "message"
+    }
 
-    async def connect(self, user: dict, websocket: WebSocket):
-        await websocket.accept()
-        if user["type"] == "dispatcher":
-            self.active_dispatchers[user["id"]] = websocket
-        elif user["type"] == "driver":
-            self.active_drivers[user["id"]] = websocket
 
-    def disconnect(self, user: dict):
-        if user["type"] == "dispatcher":
-            self.active_dispatchers.pop(user["id"], None)
-        elif user["type"] == "driver":
-            self.active_drivers.pop(user["id"], None)
+def location_geocoded_listener(loop: asyncio.AbstractEventLoop):
+    # called from the geocoding worker threads
+    def listener(rows: List[dict]):
+        for row in rows:
+            payload = {
+                "type": "location_geocoded",
+                "location_id": row["id"],
+                "address": row["address"]
+            }
+            asyncio.run_coroutine_threadsafe(
+                manager.send_to_all_dispatchers(payload, coalesce_key=("location", row["id"])),
+                loop
+            )
 
-    async def send_to_driver(self, driver_id: int, message: dict):
-        if driver_ws := self.active_drivers.get(driver_id):
-            await driver_ws.send_json(message)
+    return listener
 
-    async def send_to_all_dispatchers(self, message: dict):
-        for ws in self.active_dispatchers.values():
-            await ws.send_json(message)
 
+def revoked_token_listener(loop: asyncio.AbstractEventLoop):
+    # called on the thread that revoked the tokens, or on the loop for revocations from other workers
+    def listener(jtis: List[str]):
+        get_event_bus().revoke(jtis)
+        asyncio.run_coroutine_threadsafe(manager.close_revoked(jtis), loop)
 
-manager = ConnectionManager()
+    return listener
+
+
+def ingest_telemetry(user: dict, data: dict, connection) -> None:
+    # {"type": "telemetry", "pings": [...]}; silent on success, pings are fire-and-forget
+    if user["type"] != "driver":
+        connection.send({"error": "only drivers report telemetry"})
+        return
+    try:
+        batch = GpsPingBatch.model_validate(data)
+        telemetry_writer.submit(user["id"], batch.pings)
+    except ValidationError as e:
+        connection.send({"error": "invalid telemetry", "detail": e.errors(include_url=False, include_context=False)})
+    except TelemetryOverloaded:
+        connection.send({"error": "telemetry overloaded, retry later"})
 
 
 @router.websocket("/chat")
-async def websocket_chat(
-        websocket: WebSocket,
-        db: Session = Depends(get_db)
-):
+async def websocket_chat(websocket: WebSocket):
+    # no session for the socket's lifetime: the message writer borrows a connection per batch
     user = await get_current_user_from_ws(websocket)
-    await manager.connect(user, websocket)
+    connection = await manager.connect(user, websocket)
 
     try:
         while True:
             data = await websocket.receive_json()
+            if data.get("type") == "telemetry":
+                ingest_telemetry(user, data, connection)
+                continue
+
             text = data.get("message")
             target_driver_id = data.get("driver_id")
 
+            # messages are written behind, so reject what the table would refuse up front
+            if not isinstance(text, str) or not text:
+                connection.send({"error": "message is required"})
+                continue
+
             if user["type"] == "dispatcher":
                 if not target_driver_id:
-                    await websocket.send_json({"error": "driver_id is required"})
+                    connection.send({"error": "driver_id is required"})
+                    continue
+                if not _is_user_id(target_driver_id):
+                    connection.send({"error": "driver_id must be a positive integer"})
                     continue
 
-                message = Message(
-                    text=text,
-                    sender_id=user["id"],
-                    receiver_id=target_driver_id
-                )
-                db.add(message)
-                db.commit()
-                db.refresh(message)
-
-                payload = {
-                    "id": message.id,
-                    "text": message.text,
-                    "sender_id": message.sender_id,
-                    "receiver_id": message.receiver_id,
-                    "created_at": message.created_at.isoformat(),
-                    "type": "message"
-                }
+                message = await writer.submit(text, user["id"], target_driver_id)
+                payload = message_payload(message)
 
                 await manager.send_to_driver(target_driver_id, payload)
-                await websocket.send_json(payload)
+                connection.send(payload)
 
             elif user["type"] == "driver":
-                message = Message(
-                    text=text,
-                    sender_id=user["id"],
-                    receiver_id=None
-                )
-                db.add(message)
-                db.commit()
-                db.refresh(message)
-
-                payload = {
-                    "id": message.id,
-                    "text": message.text,
-                    "sender_id": message.sender_id,
-                    "receiver_id": message.receiver_id,
-                    "created_at": message.created_at.isoformat(),
-                    "type": "message"
-                }
+                message = await writer.submit(text, user["id"], None)
+                payload = message_payload(message)
 
                 await manager.send_to_all_dispatchers(payload)
-                await websocket.send_json(payload)  # 👈 водію назад
+                connection.send(payload)  # 👈 водію назад
 
 
     except WebSocketDisconnect:
-        manager.disconnect(user)
+        pass
+    finally:
+        await manager.disconnect(connection)
+
+
+@router.websocket("/events")
+async def websocket_events(
+        websocket: WebSocket,
+        last_event_id: Optional[int] = None,
+        db: Session = Depends(get_db)
+):
+    # same stream as GET /events/deliveries, for clients that already hold a socket
+    user = await get_current_user_from_ws(websocket)
+    await websocket.accept()
+    subscription, backlog = await open_event_stream(
+        get_event_bus(), db, user, last_event_id, settings.event_stream.event_stream_backlog_limit
+    )
+
+    async def forward():
+        async for event in iter_events(subscription, backlog):
+            await websocket.send_json(event)
+        if subscription.revoked:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        # fell behind or the backlog was truncated: the client reconnects with the last id it saw
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+    async def drain():
+        # nothing is expected from the client, this only notices the disconnect
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
     finally:
-        db.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        subscription.close()
@@ -0,0 +1,28 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class AssignmentOptimizeRequest(BaseModel):
+    # False only returns the plan
+    apply: bool = False
+    # farthest a driver is sent to a pickup
+    max_distance_km: float = Field(default=50, gt=0, le=1000)
+    time_budget_ms: int = Field(default=5000, ge=10, le=60000)
+
+
+class PlannedAssignment(BaseModel):
+    delivery_id: int
+    driver_id: int
+    distance_km: float
+
+
+class AssignmentPlan(BaseModel):
+    assignments: List[PlannedAssignment] = []
+    unassigned: List[int] = []
+    total_distance_km: float = 0
+    drivers_considered: int = 0
+    # False when the time budget ran out before the plan was proven optimal
+    optimal: bool = True
+    applied: bool = False
+    elapsed_ms: float = 0
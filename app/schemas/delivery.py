@@ -54,3 +54,15 @@ class DeliveryShow(DeliveryBase):
 
 class DeliveryStatusUpdate(BaseModel):
     new_status: DeliveryStatus
+
+
+class DeliveryImportRow(BaseModel):
+    row: int
+    id: Optional[int] = None
+    errors: Optional[list[str]] = None
+
+
+class DeliveryImportReport(BaseModel):
+    created: int = 0
+    failed: int = 0
+    rows: list[DeliveryImportRow] = []
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
 from app.schemas.user import UserCreate, UserRead, UserUpdate
@@ -21,4 +22,14 @@ class DriverRead(UserRead, DriverBase):
 
 class DriverUpdate(UserUpdate):
     license_number: Optional[str] = None
-    vehicle_id: Optional[int] = None
\ No newline at end of file
+    vehicle_id: Optional[int] = None
+
+class NearbyDriver(BaseModel):
+    driver_id: int
+    first_name: str
+    last_name: str
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+    distance_km: float
+    free_capacity: int
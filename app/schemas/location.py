@@ -1,8 +1,15 @@
 from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 
+class GeocodeStatus(str, Enum):
+    PENDING = "pending"
+    RESOLVED = "resolved"
+    FAILED = "failed"
+
+
 class LocationBase(BaseModel):
     latitude: float
     longitude: float
@@ -16,5 +23,6 @@ class LocationOut(LocationBase):
     id: int
     created_at: datetime
     address: Optional[str] = None
+    geocode_status: Optional[GeocodeStatus] = None
 
     model_config = ConfigDict(from_attributes=True)
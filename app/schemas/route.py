@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RouteStop(BaseModel):
+    delivery_id: int
+    # "pickup" or "dropoff"
+    kind: str
+    location_id: int
+    latitude: float
+    longitude: float
+    address: Optional[str] = None
+    # straight-line km from the previous stop (or the driver's position) and from the start
+    leg_km: float
+    cumulative_km: float
+
+
+class RoutePlan(BaseModel):
+    driver_id: int
+    stops: List[RouteStop]
+    total_km: float
+    # False when the driver has no recent position and the route starts at its first stop
+    from_position: bool
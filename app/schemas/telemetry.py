@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class GpsPing(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    # naive timestamps are taken as UTC
+    recorded_at: datetime
+    # m/s, degrees from north and metres, as reported by the device
+    speed: Optional[float] = Field(default=None, ge=0)
+    heading: Optional[float] = Field(default=None, ge=0, lt=360)
+    accuracy: Optional[float] = Field(default=None, ge=0)
+
+
+class GpsPingBatch(BaseModel):
+    pings: List[GpsPing] = Field(min_length=1, max_length=1000)
+
+
+class TelemetryAccepted(BaseModel):
+    accepted: int
+    rejected: int
+
+
+class DriverPosition(BaseModel):
+    driver_id: int
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+    speed: Optional[float] = None
+    heading: Optional[float] = None
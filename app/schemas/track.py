@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.schemas.location import LocationOut
+
+
+class TimelineEntry(BaseModel):
+    # a delivery event type ("delivery.status_changed", ...) or "break"
+    type: str
+    at: datetime
+    ended_at: Optional[datetime] = None
+    # where the driver was at the time; None when no telemetry covers it
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    address: Optional[str] = None
+    data: dict = {}
+
+
+class TrackOut(BaseModel):
+    delivery_id: int
+    tier: int
+    tolerance_m: float
+    # [unix seconds, latitude, longitude], oldest first
+    points: List[Tuple[float, float, float]]
+    pickup_location: LocationOut
+    dropoff_location: LocationOut
+    timeline: List[TimelineEntry]
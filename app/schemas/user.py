@@ -9,6 +9,10 @@ class UserLogin(BaseModel):
     password: str
 
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
 class UserBase(BaseModel):
     email: EmailStr
     first_name: str
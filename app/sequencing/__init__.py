@@ -0,0 +1,18 @@
+from typing import Optional
+
+from app.realtime import get_event_bus
+from app.sequencing.planner import RoutePlanner
+from app.settings import settings
+
+_planner: Optional[RoutePlanner] = None
+
+
+def get_route_planner() -> RoutePlanner:
+    global _planner
+    if _planner is None:
+        _planner = RoutePlanner(
+            max_size=settings.routing.routing_cache_size,
+            start_precision=settings.routing.routing_start_precision
+        )
+        get_event_bus().listen(_planner.on_events)
+    return _planner
@@ -0,0 +1,131 @@
+from typing import List, Optional
+
+import numpy as np
+
+# improvements smaller than this (km) are float noise, not progress
+EPSILON = 1e-9
+
+
+def pad(distances: np.ndarray) -> np.ndarray:
+    """Adds a node at zero distance from everything, standing in for "no neighbour" at both ends of a path."""
+    n = len(distances)
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = distances
+    return padded
+
+
+def path_length(distances: np.ndarray, tour: List[int]) -> float:
+    return float(distances[tour[:-1], tour[1:]].sum()) if len(tour) > 1 else 0.0
+
+
+def is_feasible(tour: List[int], pickup_of: np.ndarray) -> bool:
+    position = np.empty(len(pickup_of), dtype=np.intp)
+    position[[node for node in tour if node < len(pickup_of)]] = np.arange(len(pickup_of))
+    dropoffs = np.flatnonzero(pickup_of >= 0)
+    return bool((position[pickup_of[dropoffs]] < position[dropoffs]).all())
+
+
+def nearest_neighbour(distances: np.ndarray, pickup_of: np.ndarray, start: Optional[int]) -> List[int]:
+    """Greedy tour through the stops; a dropoff becomes eligible once its pickup is visited."""
+    n = len(pickup_of)
+    visited = np.zeros(n, dtype=bool)
+    tour: List[int] = []
+    current = start
+    for _ in range(n):
+        ready = ~visited & ((pickup_of < 0) | visited[np.maximum(pickup_of, 0)])
+        if current is None:
+            # no known position: begin at the outermost stop, an open path is best started at one end
+            candidates = np.where(ready, -distances[:n, :n].sum(axis=1), np.inf)
+        else:
+            candidates = np.where(ready, distances[current, :n], np.inf)
+        current = int(np.argmin(candidates))
+        visited[current] = True
+        tour.append(current)
+    return tour
+
+
+def two_opt(distances: np.ndarray, tour: List[int], pickup_of: np.ndarray, fixed: int) -> bool:
+    """
+    One pass of 2-opt on an open path, reversing tour[i:j + 1] where that shortens it.
+
+    distances must be padded; the first fixed nodes stay where they are.
+    A reversal is skipped when it would put a dropoff before its pickup.
+    """
+    nothing = len(distances) - 1
+    n = len(pickup_of)
+    nodes = np.array(tour)
+    following = np.append(nodes[1:], nothing)
+    improved = False
+    for i in range(fixed, len(tour) - 1):
+        position = np.empty(n, dtype=np.intp)
+        position[nodes[fixed:] if fixed else nodes] = np.arange(fixed, len(tour))
+        # reversing a segment that holds both ends of a delivery swaps them
+        dropoffs = np.flatnonzero(pickup_of >= 0)
+        limit = position[dropoffs][position[pickup_of[dropoffs]] >= i].min(initial=len(tour))
+        j = np.arange(i + 1, limit)
+        if not len(j):
+            continue
+        before = nodes[i - 1] if i > 0 else nothing
+        delta = (distances[before, nodes[j]] + distances[nodes[i], following[j]]
+                 - distances[before, nodes[i]] - distances[nodes[j], following[j]])
+        best = int(np.argmin(delta))
+        if delta[best] < -EPSILON:
+            nodes[i:j[best] + 1] = nodes[i:j[best] + 1][::-1].copy()
+            following = np.append(nodes[1:], nothing)
+            improved = True
+    tour[:] = nodes.tolist()
+    return improved
+
+
+def or_opt(distances: np.ndarray, tour: List[int], pickup_of: np.ndarray, fixed: int,
+           max_segment: int = 3) -> bool:
+    """One pass of Or-opt: moves runs of up to max_segment stops elsewhere in the path, keeping their order."""
+    nothing = len(distances) - 1
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = fixed
+        while i + length <= len(tour):
+            segment = tour[i:i + length]
+            rest = tour[:i] + tour[i + length:]
+            before = tour[i - 1] if i > 0 else nothing
+            after = tour[i + length] if i + length < len(tour) else nothing
+            removed = (distances[before, segment[0]] + distances[segment[-1], after]
+                       - distances[before, after])
+            # insert between rest[k - 1] and rest[k]
+            left = np.array([nothing] + rest)
+            right = np.array(rest + [nothing])
+            added = distances[left, segment[0]] + distances[segment[-1], right] - distances[left, right]
+            added[:fixed] = np.inf
+            added[i] = np.inf  # where it came from
+            for k in np.argsort(added):
+                if added[k] - removed >= -EPSILON:
+                    break
+                candidate = rest[:k] + segment + rest[k:]
+                if is_feasible(candidate, pickup_of):
+                    tour[:] = candidate
+                    improved = True
+                    break
+            i += 1
+    return improved
+
+
+def sequence(distances: np.ndarray, pickup_of: np.ndarray, start: Optional[int] = None,
+             max_rounds: int = 50) -> List[int]:
+    """
+    Order of the stops 0..n-1 along an open path, from start if given.
+
+    pickup_of[k] is the stop that has to come before stop k, or -1. Nearest
+    neighbour builds the first path; 2-opt and Or-opt passes then run until
+    neither finds an improvement or max_rounds is reached.
+    """
+    tour = nearest_neighbour(distances, pickup_of, start)
+    if start is not None:
+        tour = [start] + tour
+    fixed = 1 if start is not None else 0
+    padded = pad(distances)
+    for _ in range(max_rounds):
+        improved = two_opt(padded, tour, pickup_of, fixed)
+        improved = or_opt(padded, tour, pickup_of, fixed) or improved
+        if not improved:
+            break
+    return tour[fixed:]
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.assignment.solver import haversine_matrix
+from app.models import Delivery
+from app.models.delivery import DeliveryStatus
+from app.repositories.delivery_repository import DeliveryRepository
+from app.schemas.route import RoutePlan, RouteStop
+from app.sequencing.heuristics import sequence
+from app.telemetry.positions import Position
+from app.utils.metrics import registry
+
+route_cache_lookups = registry.counter(
+    "route_cache_lookups_total",
+    "Stop sequence cache lookups by result"
+)
+
+
+def route_key(deliveries: List[Delivery], start: Optional[Tuple[float, float]]) -> str:
+    # everything the plan shows, so a stale entry can never match; the addresses
+    # because geocoding fills them in after the plan may already be cached
+    parts = [
+        f"{d.id}:{d.status.value}:{d.pickup_location.latitude}:{d.pickup_location.longitude}:"
+        f"{d.pickup_location.address}:{d.dropoff_location.latitude}:{d.dropoff_location.longitude}:"
+        f"{d.dropoff_location.address}"
+        for d in deliveries
+    ]
+    parts.append(f"start:{start}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def build_route(driver_id: int, deliveries: List[Delivery], start: Optional[Tuple[float, float]]) -> RoutePlan:
+    stops: List[Tuple[Delivery, str]] = []
+    pickup_of: List[int] = []
+    for delivery in deliveries:
+        if delivery.status == DeliveryStatus.PENDING:
+            stops.append((delivery, "pickup"))
+            pickup_of.append(-1)
+            pickup_of.append(len(stops) - 1)
+        else:
+            # already on board
+            pickup_of.append(-1)
+        stops.append((delivery, "dropoff"))
+    if not stops:
+        return RoutePlan(driver_id=driver_id, stops=[], total_km=0, from_position=start is not None)
+
+    locations = [delivery.pickup_location if kind == "pickup" else delivery.dropoff_location for delivery, kind in stops]
+    latitudes = [location.latitude for location in locations]
+    longitudes = [location.longitude for location in locations]
+    if start is not None:
+        latitudes.append(start[0])
+        longitudes.append(start[1])
+    distances = haversine_matrix(latitudes, longitudes, latitudes, longitudes)
+    order = sequence(distances, np.array(pickup_of), len(stops) if start is not None else None)
+
+    route = []
+    previous = len(stops) if start is not None else None
+    cumulative = 0.0
+    for index in order:
+        leg = float(distances[previous, index]) if previous is not None else 0.0
+        cumulative += leg
+        delivery, kind = stops[index]
+        location = locations[index]
+        route.append(RouteStop(
+            delivery_id=delivery.id,
+            kind=kind,
+            location_id=location.id,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            address=location.address,
+            leg_km=round(leg, 3),
+            cumulative_km=round(cumulative, 3)
+        ))
+        previous = index
+    return RoutePlan(driver_id=driver_id, stops=route, total_km=round(cumulative, 3), from_position=start is not None)
+
+
+class RoutePlanner:
+    """
+    Orders a driver's open deliveries into a stop sequence and keeps the latest one per driver.
+
+    The cache key hashes the deliveries' ids, statuses and coordinates, so a
+    changed delivery set misses even before invalidate() is called for it.
+    """
+
+    def __init__(self, max_size: int = 10000, start_precision: int = 2):
+        self.max_size = max_size
+        self.start_precision = start_precision
+        self._entries: OrderedDict[int, Tuple[str, RoutePlan]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def plan(self, db: Session, driver_id: int, position: Optional[Position] = None) -> RoutePlan:
+        deliveries = DeliveryRepository(db).open_for_driver(driver_id)
+        start = cell = None
+        if position is not None:
+            start = (position.latitude, position.longitude)
+            # the key only sees the cell, so small moves reuse the plan; legs use the real position
+            cell = (round(position.latitude, self.start_precision), round(position.longitude, self.start_precision))
+        key = route_key(deliveries, cell)
+        with self._lock:
+            entry = self._entries.get(driver_id)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(driver_id)
+                route_cache_lookups.inc(result="hit")
+                return entry[1]
+        route_cache_lookups.inc(result="miss")
+
+        plan = build_route(driver_id, deliveries, start)
+        with self._lock:
+            self._entries[driver_id] = (key, plan)
+            self._entries.move_to_end(driver_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return plan
+
+    def invalidate(self, driver_id: int) -> None:
+        with self._lock:
+            self._entries.pop(driver_id, None)
+
+    def on_events(self, events: List[dict]) -> None:
+        # assignments and status changes, from this worker or relayed from another
+        for delivery_event in events:
+            for driver_id in (delivery_event.get("driver_id"), delivery_event.get("data", {}).get("previous_driver_id")):
+                if driver_id is not None:
+                    self.invalidate(driver_id)
@@ -0,0 +1,55 @@
+from typing import Generic, TypeVar, List, Optional, Any, Type
+from pydantic import BaseModel
+from app.repositories.async_base_repository import AsyncBaseRepository
+
+T = TypeVar('T', bound=BaseModel)
+U = TypeVar('U', bound=BaseModel)
+K = TypeVar('K')
+M = TypeVar('M')
+R = TypeVar('R', bound=AsyncBaseRepository)
+
+
+class AsyncBaseService(Generic[T, U, K, M, R]):
+    def __init__(self, repository: R, model: Type[M]):
+        self.model = model
+        self.repository = repository
+
+    async def get(self, id: K) -> Optional[M]:
+        return await self.repository.get(id)
+
+    async def get_all(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            order_by: Optional[str] = None,
+            desc_order: bool = False,
+            cursor: Optional[str] = None
+    ) -> List[M]:
+        return await self.repository.get_all(
+            skip=skip,
+            limit=limit,
+            order_by=order_by,
+            desc_order=desc_order,
+            cursor=cursor
+        )
+
+    async def create(self, data: T) -> M:
+        model = self._create_model_from_data(data)
+        return await self.repository.create(model)
+
+    async def update(self, id: K, data: U) -> Optional[M]:
+        update_data = data.model_dump(exclude_unset=True)
+        return await self.repository.update(id, update_data)
+
+    async def delete(self, id: K) -> bool:
+        return await self.repository.delete(id)
+
+    async def filter(self, **filters: Any) -> List[M]:
+        return await self.repository.filter(**filters)
+
+    async def exists(self, id: K) -> bool:
+        return await self.repository.exists(id)
+
+    def _create_model_from_data(self, data: T) -> M:
+        data_dict = data.model_dump(exclude_unset=True)
+        return self.model(**data_dict)
@@ -22,13 +22,15 @@ class BaseService(Generic[T, U, K, M, R]):
             skip: int = 0,
             limit: int = 100,
             order_by: Optional[str] = None,
-            desc_order: bool = False
+            desc_order: bool = False,
+            cursor: Optional[str] = None
     ) -> List[M]:
         return self.repository.get_all(
             skip=skip,
             limit=limit,
             order_by=order_by,
-            desc_order=desc_order
+            desc_order=desc_order,
+            cursor=cursor
         )
 
     def create(self, data: T) -> M:
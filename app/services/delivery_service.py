@@ -0,0 +1,183 @@
+import time
+from datetime import datetime
+from typing import Iterable, List, Union
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.assignment.solver import haversine_matrix, min_cost_assignment
+from app.geocoding import enqueue_geocoding
+from app.models import Delivery, Client, Driver
+from app.realtime.events import DeliveryEventType, record_delivery_events
+from app.repositories.base_repository import BaseRepository
+from app.repositories.delivery_repository import DeliveryRepository
+from app.repositories.location_repository import LocationRepository
+from app.schemas.assignment import AssignmentOptimizeRequest, AssignmentPlan, PlannedAssignment
+from app.schemas.delivery import DeliveryCreate, DeliveryUpdate, DeliveryImportReport, DeliveryImportRow
+from app.services.base_service import BaseService
+from app.telemetry.availability import DriverAvailability
+from app.telemetry.positions import Position
+
+
+def _format_errors(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors(include_url=False)
+    ]
+
+
+class DeliveryService(BaseService[DeliveryCreate, DeliveryUpdate, int, Delivery, DeliveryRepository]):
+    def __init__(self, db: Session):
+        repository = DeliveryRepository(db)
+        self._locations = LocationRepository(db)
+        self._drivers = BaseRepository(db, Driver)
+        self._clients = BaseRepository(db, Client)
+        super().__init__(repository, Delivery)
+
+    def import_rows(self, rows: Iterable[Union[str, dict]], chunk_size: int = 500) -> DeliveryImportReport:
+        # only the current chunk is held in memory; geocoding is left to the background worker
+        report = DeliveryImportReport()
+        chunk: list[tuple[int, DeliveryCreate]] = []
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                if isinstance(row, str):
+                    delivery = DeliveryCreate.model_validate_json(row)
+                else:
+                    delivery = DeliveryCreate.model_validate(row)
+            except ValidationError as e:
+                report.rows.append(DeliveryImportRow(row=number, errors=_format_errors(e)))
+                continue
+
+            chunk.append((number, delivery))
+            if len(chunk) >= chunk_size:
+                self._insert_chunk(chunk, report)
+                chunk = []
+
+        if chunk:
+            self._insert_chunk(chunk, report)
+
+        report.rows.sort(key=lambda result: result.row)
+        report.created = sum(1 for result in report.rows if result.id is not None)
+        report.failed = len(report.rows) - report.created
+        return report
+
+    def _insert_chunk(self, chunk: list[tuple[int, DeliveryCreate]], report: DeliveryImportReport) -> None:
+        drivers = self._drivers.existing_ids({d.driver_id for _, d in chunk if d.driver_id is not None})
+        clients = self._clients.existing_ids({d.client_id for _, d in chunk if d.client_id is not None})
+
+        valid = []
+        for number, delivery in chunk:
+            errors = []
+            if delivery.driver_id is not None and delivery.driver_id not in drivers:
+                errors.append("driver_id: Driver not found")
+            if delivery.client_id is not None and delivery.client_id not in clients:
+                errors.append("client_id: Client not found")
+            if errors:
+                report.rows.append(DeliveryImportRow(row=number, errors=errors))
+            else:
+                valid.append((number, delivery))
+        if not valid:
+            return
+
+        location_ids = self._locations.bulk_insert([
+            location.model_dump()
+            for _, delivery in valid
+            for location in (delivery.pickup_location, delivery.dropoff_location)
+        ])
+        delivery_ids = self.repository.bulk_insert([
+            {
+                **delivery.model_dump(exclude={"pickup_location", "dropoff_location"}),
+                "pickup_location_id": location_ids[2 * i],
+                "dropoff_location_id": location_ids[2 * i + 1]
+            }
+            for i, (_, delivery) in enumerate(valid)
+        ])
+        record_delivery_events(self.repository.db, [
+            {
+                "type": DeliveryEventType.CREATED,
+                "delivery_id": delivery_id,
+                "driver_id": delivery.driver_id,
+                "client_id": delivery.client_id,
+                "data": {"status": delivery.status.value}
+            }
+            for (_, delivery), delivery_id in zip(valid, delivery_ids)
+        ])
+        self.repository.db.commit()
+        enqueue_geocoding(*location_ids)
+
+        report.rows.extend(
+            DeliveryImportRow(row=number, id=delivery_id)
+            for (number, _), delivery_id in zip(valid, delivery_ids)
+        )
+
+    def optimize_assignments(
+            self,
+            options: AssignmentOptimizeRequest,
+            positions: List[Position],
+            availability: DriverAvailability
+    ) -> AssignmentPlan:
+        """
+        Assign pending deliveries without a driver to drivers near their pickup.
+
+        Drivers are placed at their latest position and take at most their free
+        capacity; the plan assigns as many deliveries as possible and, among
+        those plans, minimises the total driver-to-pickup distance.
+        """
+        started = time.monotonic()
+        db = self.repository.db
+        if options.apply:
+            # concurrent runs would all read the same free capacity and overfill the drivers
+            self.repository.lock_assignment_runs()
+        pickups = self.repository.unassigned_pickups(lock=options.apply)
+        # capacity decides what gets written, so never from a stale snapshot
+        availability.refresh(db)
+        now = datetime.now()
+        drivers = []
+        for position in positions:
+            status = availability.get(position.driver_id)
+            if status is not None and status.free_capacity > 0 and not status.on_break(now):
+                drivers.append((position, status.free_capacity))
+
+        plan = AssignmentPlan(drivers_considered=len(drivers), unassigned=[pickup.id for pickup in pickups])
+        if pickups and drivers:
+            costs = haversine_matrix(
+                [pickup.latitude for pickup in pickups], [pickup.longitude for pickup in pickups],
+                [position.latitude for position, _ in drivers], [position.longitude for position, _ in drivers]
+            )
+            costs[costs > options.max_distance_km] = np.inf
+            # leaving one delivery out must cost more than any reshuffle that fits it in
+            result = min_cost_assignment(
+                costs,
+                np.array([capacity for _, capacity in drivers]),
+                unassigned_cost=options.max_distance_km * (len(pickups) + 1),
+                deadline=started + options.time_budget_ms / 1000
+            )
+            plan.optimal = result.optimal
+            plan.unassigned = [pickup.id for pickup, col in zip(pickups, result.cols.tolist()) if col < 0]
+            plan.assignments = [
+                PlannedAssignment(delivery_id=pickup.id, driver_id=drivers[col][0].driver_id,
+                                  distance_km=round(float(costs[row, col]), 3))
+                for row, (pickup, col) in enumerate(zip(pickups, result.cols.tolist())) if col >= 0
+            ]
+            plan.total_distance_km = round(sum(assignment.distance_km for assignment in plan.assignments), 3)
+
+        if options.apply and plan.assignments:
+            self.repository.assign_drivers([(a.delivery_id, a.driver_id) for a in plan.assignments])
+            client_ids = {pickup.id: pickup.client_id for pickup in pickups}
+            record_delivery_events(db, [
+                {
+                    "type": DeliveryEventType.ASSIGNED,
+                    "delivery_id": assignment.delivery_id,
+                    "driver_id": assignment.driver_id,
+                    "client_id": client_ids[assignment.delivery_id],
+                    "data": {"previous_driver_id": None}
+                }
+                for assignment in plan.assignments
+            ])
+            db.commit()
+            availability.invalidate()
+            plan.applied = True
+        plan.elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+        return plan
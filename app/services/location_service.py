@@ -1,8 +1,10 @@
 from typing import Optional
 
 from sqlalchemy.orm import Session
+from app.geocoding import enqueue_geocoding
 from app.schemas.location import LocationCreate
 from app.models import Location
+from app.models.location import GeocodeStatus
 from app.repositories.location_repository import LocationRepository
 from app.services.base_service import BaseService
 
@@ -14,15 +16,17 @@ class LocationService(BaseService[LocationCreate, LocationCreate, int, Location,
 
     def create(self, location_data: LocationCreate) -> Location:
         location = super().create(location_data)
-        location.address = location.get_address()
-        self.repository.update(location.id, {"address": location.address})
+        enqueue_geocoding(location.id)
         return location
 
     def update(self, id: int, location_data: LocationCreate) -> Optional[Location]:
-        updated_location = super().update(id, location_data)
+        update_data = location_data.model_dump(exclude_unset=True)
+        update_data.update(
+            address=None, geocode_status=GeocodeStatus.PENDING, geocode_attempts=0, geocode_next_attempt_at=None
+        )
+        updated_location = self.repository.update(id, update_data)
 
         if updated_location:
-            updated_location.address = updated_location.get_address()
-            self.repository.update(id, {"address": updated_location.address})
+            enqueue_geocoding(updated_location.id)
 
         return updated_location
@@ -72,6 +72,7 @@ class LogBreakService(BaseService[LogBreakCreate, LogBreakUpdate, int, LogBreak,
             self,
             driver_id: int,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            cursor: Optional[str] = None
     ) -> list[Type[LogBreak]]:
-        return self.repository.get_for_driver(driver_id, skip, limit)
+        return self.repository.get_for_driver(driver_id, skip, limit, cursor)
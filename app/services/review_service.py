@@ -2,7 +2,8 @@ from typing import Optional, Type
 
 from sqlalchemy.orm import Session
 
-from app.models import Review
+from app.models import Delivery, Review
+from app.realtime.events import DeliveryEventType, record_delivery_event
 from app.repositories.review_repository import ReviewRepository
 from app.schemas.review import ReviewCreate, ReviewUpdate
 from app.services.base_service import BaseService
@@ -17,6 +18,12 @@ class ReviewService(BaseService[ReviewCreate, ReviewUpdate, int, Review, ReviewR
         if self.repository.exists_for_delivery(review_data.delivery_id):
             raise ValueError("Review for this delivery already exists")
 
+        delivery = self.repository.db.get(Delivery, review_data.delivery_id)
+        if delivery is not None:
+            record_delivery_event(
+                self.repository.db, DeliveryEventType.REVIEW_ADDED, delivery.id, delivery.driver_id,
+                delivery.client_id, rating=review_data.rating
+            )
         return super().create(review_data)
 
     def update(self, review_id: int, review_data: ReviewUpdate) -> Optional[Review]:
@@ -29,6 +36,12 @@ class ReviewService(BaseService[ReviewCreate, ReviewUpdate, int, Review, ReviewR
     def get_by_delivery(self, delivery_id: int) -> Optional[Review]:
         return self.repository.get_by_delivery(delivery_id)
 
-    def get_by_client(self, client_id: int, skip: int = 0, limit: int = 100) -> list[Type[Review]]:
-        return self.repository.get_by_client(client_id, skip, limit)
+    def get_by_client(
+            self,
+            client_id: int,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None
+    ) -> list[Type[Review]]:
+        return self.repository.get_by_client(client_id, skip, limit, cursor)
 
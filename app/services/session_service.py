@@ -0,0 +1,109 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import AuthSession, User
+from app.repositories.auth_session_repository import AuthSessionRepository
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.sessions import get_revocation_list
+from app.sessions.revocation import Revocation, RevocationList
+from app.settings import settings
+from app.utils.jwt import EXPIRES_IN_MINUTES, create_access_token
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+class SessionService:
+    """
+    Login sessions: a short-lived access token plus an opaque refresh token.
+
+    Every refresh rotates the refresh token and revokes the session's previous
+    access token, so a session never has more than one live access token and
+    revoking the session revokes everything it issued.
+    """
+
+    def __init__(self, db: Session, revocations: Optional[RevocationList] = None):
+        self.db = db
+        self.repository = AuthSessionRepository(db)
+        self.revoked_tokens = RevokedTokenRepository(db)
+        self.revocations = revocations if revocations is not None else get_revocation_list()
+        self.refresh_ttl = timedelta(days=settings.session.session_refresh_days)
+
+    def _rotate(self, session: AuthSession) -> str:
+        refresh_token = secrets.token_urlsafe(32)
+        session.refresh_token_hash = hash_refresh_token(refresh_token)
+        session.expires_at = datetime.now() + self.refresh_ttl
+        session.access_jti = secrets.token_hex(16)
+        session.access_expires_at = datetime.now() + timedelta(minutes=EXPIRES_IN_MINUTES)
+        return refresh_token
+
+    def _tokens(self, session: AuthSession, user: User, refresh_token: str) -> dict:
+        access_token = create_access_token(
+            {"id": user.id, "sub": user.email, "type": user.type, "sid": session.id, "jti": session.access_jti}
+        )
+        # taken again after encoding, so it is never earlier than the token's own exp
+        session.access_expires_at = datetime.now() + timedelta(minutes=EXPIRES_IN_MINUTES)
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+    def start(self, user: User) -> dict:
+        session = AuthSession(user_id=user.id)
+        refresh_token = self._rotate(session)
+        self.db.add(session)
+        # the access token carries the session id
+        self.db.flush()
+        tokens = self._tokens(session, user, refresh_token)
+        self.db.commit()
+        return tokens
+
+    def refresh(self, refresh_token: str) -> dict:
+        session = self.repository.by_refresh_hash(hash_refresh_token(refresh_token))
+        if session is None or session.revoked_at is not None or session.expires_at <= datetime.now():
+            raise ValueError("Invalid refresh token")
+        user = self.db.get(User, session.user_id)
+        previous = [(session.access_jti, session.access_expires_at.timestamp())]
+        tokens = self._tokens(session, user, self._rotate(session))
+        self._commit_revocations(previous)
+        return tokens
+
+    def end(self, claims: dict) -> None:
+        revocations = []
+        if claims.get("jti") and claims.get("exp"):
+            revocations.append((claims["jti"], float(claims["exp"])))
+        session = self.repository.get(claims["sid"]) if claims.get("sid") else None
+        if session is not None and session.user_id == claims["id"]:
+            session.revoked_at = datetime.now()
+        self._commit_revocations(revocations)
+
+    def revoke_user(self, user_id: int) -> List[Revocation]:
+        """
+        Ends every session of the user and stages the revocation of their access
+        tokens in the caller's transaction. Nothing is published: commit, then
+        pass the result to publish().
+        """
+        sessions = self.repository.active_for_user(user_id)
+        now = datetime.now()
+        revocations = []
+        for session in sessions:
+            session.revoked_at = now
+            if session.access_expires_at > now:
+                revocations.append((session.access_jti, session.access_expires_at.timestamp()))
+        self._stage_revocations(revocations)
+        return revocations
+
+    def publish(self, revocations: List[Revocation]) -> None:
+        # only once the revoked_tokens rows are committed, so no worker enforces a revocation that rolled back
+        self.revocations.revoke(revocations)
+
+    def _stage_revocations(self, revocations: List[Revocation]) -> None:
+        self.revoked_tokens.add(revocations)
+        self.db.flush()
+
+    def _commit_revocations(self, revocations: List[Revocation]) -> None:
+        self._stage_revocations(revocations)
+        self.db.commit()
+        self.publish(revocations)
@@ -0,0 +1,17 @@
+from typing import Optional
+
+from app.db import SessionLocal
+from app.sessions.revocation import RevocationList
+from app.settings import settings
+
+_revocations: Optional[RevocationList] = None
+
+
+def get_revocation_list() -> RevocationList:
+    global _revocations
+    if _revocations is None:
+        _revocations = RevocationList(
+            SessionLocal,
+            compact_interval=settings.session.session_compact_interval_seconds
+        )
+    return _revocations
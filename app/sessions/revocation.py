@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.sessions")
+
+tokens_revoked = registry.counter(
+    "tokens_revoked_total",
+    "Access tokens revoked before their expiry, by where the revocation came from (local, relayed)"
+)
+revoked_tokens = registry.gauge(
+    "revoked_tokens",
+    "Revoked, not yet expired access tokens held in memory"
+)
+
+# (jti, expiry in unix seconds)
+Revocation = Tuple[str, float]
+
+
+class RevocationList:
+    """
+    Access tokens revoked before they expired, as jti -> expiry.
+
+    is_revoked() is a single dict lookup, so every request can afford it
+    without touching the database. revoked_tokens holds the list for workers
+    that start later. The websocket broker carries new revocations to the
+    workers already running, so the list replicates over the same backend
+    (memory, Postgres or Redis). An entry is only useful until its token
+    expires; a background thread compacts those away every compact_interval
+    seconds and purges the expired rows.
+
+    Requests check the list as they arrive; listeners are told about new
+    revocations so connections opened with a revoked token can be closed.
+    """
+
+    topic = "token_revocations"
+
+    def __init__(
+            self,
+            session_factory: Optional[Callable[[], Session]] = None,
+            compact_interval: float = 300.0,
+            clock: Callable[[], float] = time.time
+    ):
+        self.session_factory = session_factory
+        self.compact_interval = compact_interval
+        self._clock = clock
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._relay = None
+        self._relay_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[List[str]], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def add(self, revocations: Iterable[Revocation]) -> None:
+        now = self._clock()
+        with self._lock:
+            for jti, expires_at in revocations:
+                if expires_at > now:
+                    self._revoked[jti] = expires_at
+            revoked_tokens.set(len(self._revoked))
+
+    def listen(self, listener: Callable[[List[str]], None]) -> None:
+        # called with the revoked jtis on whichever thread revoked them, so keep it quick
+        self._listeners.append(listener)
+
+    def _notify(self, revocations: List[Revocation]) -> None:
+        jtis = [jti for jti, _ in revocations]
+        for listener in self._listeners:
+            try:
+                listener(jtis)
+            except Exception:
+                logger.exception("Revocation listener failed")
+
+    def revoke(self, revocations: Iterable[Revocation]) -> None:
+        # call after the revoked_tokens rows are committed
+        revocations = [(jti, float(expires_at)) for jti, expires_at in revocations]
+        if not revocations:
+            return
+        self.add(revocations)
+        tokens_revoked.inc(len(revocations), source="local")
+        self._notify(revocations)
+        if self._relay is not None:
+            asyncio.run_coroutine_threadsafe(
+                self._relay.publish_topic(self.topic, revocations),
+                self._relay_loop
+            )
+
+    def bind(self, manager, loop: asyncio.AbstractEventLoop) -> None:
+        # bind before start(): a revocation relayed while loading is simply added twice
+        self._relay = manager
+        self._relay_loop = loop
+        manager.on_topic(self.topic, self._relayed)
+
+    def _relayed(self, revocations) -> None:
+        revocations = [(jti, expires_at) for jti, expires_at in revocations]
+        self.add(revocations)
+        tokens_revoked.inc(len(revocations), source="relayed")
+        self._notify(revocations)
+
+    def compact(self) -> int:
+        now = self._clock()
+        with self._lock:
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+            for jti in expired:
+                del self._revoked[jti]
+            revoked_tokens.set(len(self._revoked))
+        return len(expired)
+
+    def load(self) -> None:
+        with self.session_factory() as db:
+            self.add(RevokedTokenRepository(db).unexpired())
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.load()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="revocation-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.compact_interval):
+            try:
+                self.compact()
+                with self.session_factory() as db:
+                    RevokedTokenRepository(db).purge_expired()
+            except Exception:
+                logger.exception("Revocation compaction failed")
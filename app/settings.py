@@ -12,15 +12,143 @@ class BaseConfig(BaseSettings):
 class DatabaseConfig(BaseConfig):
     database_connection_string: str
     test_database_connection_string: str
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_timeout: int = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    database_statement_timeout_ms: int = 30000
+    # None means "echo only when ENVIRONMENT=development"
+    database_echo: bool | None = None
+    database_slow_query_ms: int = 500
 
 
 class JWTConfig(BaseConfig):
     jwt_secret: str
     jwt_expires_in_minutes: int
+    # "jose", or "native" for the stdlib HS256 verifier in app.utils.jwt
+    jwt_backend: str = "jose"
+    # verified tokens whose claims are kept until they expire
+    jwt_cache_size: int = 10000
 
 
 class MailgunConfig(BaseConfig):
     mailgun_api_key: str
+    mailgun_url: str = "https://api.mailgun.net/v3"
+    mailgun_domain: str = "sandbox97853b721546409a962886efd01bcaf6.mailgun.org"
+    mailgun_sender: str = "Mailgun Sandbox <postmaster@sandbox97853b721546409a962886efd01bcaf6.mailgun.org>"
+    mailgun_timeout_seconds: float = 10.0
+    # outbox dispatcher: messages claimed per pass, how often it looks without being woken,
+    # and the retry schedule (base * 2^attempt, capped) before a message is marked failed
+    mailgun_batch_size: int = 500
+    mailgun_poll_interval_seconds: float = 1.0
+    mailgun_max_attempts: int = 5
+    mailgun_retry_base_seconds: float = 30.0
+    mailgun_retry_max_seconds: float = 3600.0
+
+
+class GeocodingConfig(BaseConfig):
+    # "nominatim", "offline" or "stub"; the test environment always uses the stub
+    geocoding_backend: str = "nominatim"
+    # CSV or Parquet with latitude, longitude and address columns
+    geocoding_gazetteer_path: str | None = None
+    geocoding_offline_max_distance_km: float = 5.0
+    geocoding_cache_precision: int = 9
+    geocoding_cache_ttl_days: int = 90
+    geocoding_lru_size: int = 10000
+    geocoding_workers: int = 2
+    geocoding_batch_size: int = 25
+    geocoding_rate_limit_per_second: float = 1.0
+    geocoding_max_attempts: int = 5
+    geocoding_sweep_interval_seconds: float = 30.0
+    # how long a claimed row is left alone before another worker may take it over
+    geocoding_claim_timeout_seconds: float = 300.0
+    # first retry delay after a failed lookup, doubled on every further attempt
+    geocoding_retry_delay_seconds: float = 30.0
+
+
+class WebsocketConfig(BaseConfig):
+    # messages buffered per socket before the overflow policy kicks in
+    websocket_send_queue_size: int = 256
+    # "drop_oldest", "coalesce" or "disconnect"
+    websocket_overflow_policy: str = "drop_oldest"
+    websocket_send_timeout_seconds: float = 10.0
+    # "memory" (single process), "postgres" (LISTEN/NOTIFY) or "redis"
+    websocket_broker: str = "memory"
+    # redis:// URL for the redis broker; the postgres broker defaults to the app database
+    websocket_broker_url: str | None = None
+    websocket_channel_prefix: str = "driverhub"
+    # presence of a worker that stopped heartbeating expires after this long
+    websocket_presence_ttl_seconds: float = 30.0
+    # chat messages are written behind in batches of this many, or at least this often
+    websocket_message_batch_size: int = 200
+    websocket_message_flush_interval_ms: int = 50
+    websocket_message_max_pending: int = 10000
+
+
+class EventStreamConfig(BaseConfig):
+    # events buffered per live subscriber before it is cut off and has to resume
+    event_stream_queue_size: int = 1000
+    # SSE comment sent on quiet streams so proxies keep the connection open
+    event_stream_keepalive_seconds: float = 15.0
+    # most events replayed per connect; past it the stream ends after the replay and the
+    # client reconnects from the last id it got for the newer ones
+    event_stream_backlog_limit: int = 5000
+
+
+class TelemetryConfig(BaseConfig):
+    # GPS pings are written with COPY in batches of this many, or at least this often
+    telemetry_batch_size: int = 5000
+    telemetry_flush_interval_ms: int = 250
+    # pings buffered before ingest answers 503 and clients have to back off
+    telemetry_max_pending: int = 200000
+    # pings older than this or from the future are dropped at ingest
+    telemetry_max_age_hours: int = 24
+    telemetry_max_clock_skew_seconds: int = 300
+    # nearest-driver lookup: grid cell size (0.01 is about 1.1 km of latitude), how old a
+    # position may be, and how long the capacity/break snapshot is reused
+    telemetry_grid_cell_degrees: float = 0.01
+    telemetry_position_max_age_seconds: int = 600
+    telemetry_availability_ttl_seconds: float = 5.0
+
+
+class RoutingConfig(BaseConfig):
+    # drivers whose latest stop sequence is kept in memory
+    routing_cache_size: int = 10000
+    # the driver's position is rounded to this many decimals before it joins the cache
+    # key, so a route is only replanned once the driver has moved about a kilometre
+    routing_start_precision: int = 2
+
+
+class OutboundConfig(BaseConfig):
+    # shared client for Mailgun, Nominatim and other upstreams: keep-alive connections and
+    # concurrent calls per host, and the default timeouts of a call
+    outbound_max_connections_per_host: int = 10
+    outbound_connect_timeout_seconds: float = 3.0
+    outbound_timeout_seconds: float = 10.0
+    # connection errors, timeouts, 5xx or 429 in a row that open a host's circuit, and how long it stays open
+    outbound_breaker_failures: int = 5
+    outbound_breaker_reset_seconds: float = 30.0
+
+
+class PasswordConfig(BaseConfig):
+    # bcrypt runs in this many worker processes; once this many operations are queued or
+    # running, login, signup and user creation answer 503
+    password_workers: int = 2
+    password_max_pending: int = 32
+    # fixed bcrypt cost, or None to measure at startup the highest cost whose verify stays
+    # within the target (the test environment keeps bcrypt's default)
+    password_bcrypt_rounds: int | None = None
+    password_target_verify_ms: float = 250.0
+    password_min_rounds: int = 10
+    password_max_rounds: int = 15
+
+
+class SessionConfig(BaseConfig):
+    # refresh tokens are rotated on every use and die after this long without one
+    session_refresh_days: int = 30
+    # how often expired entries leave the in-memory revocation list and revoked_tokens
+    session_compact_interval_seconds: float = 300.0
 
 
 class AppConfig(BaseConfig):
@@ -31,6 +159,14 @@ class Settings(BaseSettings):
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     jwt: JWTConfig = Field(default_factory=JWTConfig)
     mailgun: MailgunConfig = Field(default_factory=MailgunConfig)
+    geocoding: GeocodingConfig = Field(default_factory=GeocodingConfig)
+    websocket: WebsocketConfig = Field(default_factory=WebsocketConfig)
+    event_stream: EventStreamConfig = Field(default_factory=EventStreamConfig)
+    telemetry: TelemetryConfig = Field(default_factory=TelemetryConfig)
+    routing: RoutingConfig = Field(default_factory=RoutingConfig)
+    outbound: OutboundConfig = Field(default_factory=OutboundConfig)
+    password: PasswordConfig = Field(default_factory=PasswordConfig)
+    session: SessionConfig = Field(default_factory=SessionConfig)
     app: AppConfig = Field(default_factory=AppConfig)
 
 
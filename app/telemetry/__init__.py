@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.db import async_engine
+from app.settings import settings
+from app.telemetry.availability import DriverAvailability
+from app.telemetry.positions import Position, PositionTable
+from app.telemetry.spatial import GridIndex
+from app.telemetry.writer import TelemetryWriter
+
+_positions: Optional[PositionTable] = None
+_writer: Optional[TelemetryWriter] = None
+_index: Optional[GridIndex] = None
+_availability: Optional[DriverAvailability] = None
+
+
+def get_position_table() -> PositionTable:
+    global _positions
+    if _positions is None:
+        _positions = PositionTable()
+    return _positions
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    global _writer
+    if _writer is None:
+        config = settings.telemetry
+        _writer = TelemetryWriter(
+            async_engine,
+            get_position_table(),
+            batch_size=config.telemetry_batch_size,
+            flush_interval=config.telemetry_flush_interval_ms / 1000,
+            max_pending=config.telemetry_max_pending,
+            max_age=timedelta(hours=config.telemetry_max_age_hours),
+            max_clock_skew=timedelta(seconds=config.telemetry_max_clock_skew_seconds)
+        )
+    return _writer
+
+
+def get_driver_index() -> GridIndex:
+    global _index
+    if _index is None:
+        positions = get_position_table()
+        _index = GridIndex(cell_degrees=settings.telemetry.telemetry_grid_cell_degrees)
+        for position in positions.all():
+            _index.move(position)
+        # kept current ping by ping rather than rebuilt
+        positions.subscribe(_index.move)
+    return _index
+
+
+def get_driver_availability() -> DriverAvailability:
+    global _availability
+    if _availability is None:
+        _availability = DriverAvailability(ttl=settings.telemetry.telemetry_availability_ttl_seconds)
+    return _availability
+
+
+def get_recent_position(driver_id: int) -> Optional[Position]:
+    position = get_position_table().get(driver_id)
+    max_age = timedelta(seconds=settings.telemetry.telemetry_position_max_age_seconds)
+    if position is None or position.recorded_at < datetime.now(timezone.utc) - max_age:
+        return None
+    return position
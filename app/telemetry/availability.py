@@ -0,0 +1,83 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Delivery, Driver, LogBreak, Vehicle
+from app.models.delivery import DeliveryStatus
+
+ACTIVE_STATUSES = (DeliveryStatus.PENDING, DeliveryStatus.IN_TRANSIT)
+
+
+class DriverStatus(NamedTuple):
+    driver_id: int
+    first_name: str
+    last_name: str
+    # vehicle capacity in concurrent deliveries; 0 without a vehicle
+    capacity: int
+    active_deliveries: int
+    # (start, end) of breaks that were not over when the snapshot was taken
+    breaks: Tuple[Tuple[datetime, datetime], ...] = ()
+
+    @property
+    def free_capacity(self) -> int:
+        return self.capacity - self.active_deliveries
+
+    def on_break(self, now: datetime) -> bool:
+        return any(start <= now < end for start, end in self.breaks)
+
+
+class DriverAvailability:
+    """
+    Snapshot of what the nearest-driver lookup filters on, so a lookup never waits on the database.
+
+    Reloaded at most every ttl seconds, on the first lookup after it expires;
+    an assignment made in between shows up in the next snapshot.
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._drivers: Dict[int, DriverStatus] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def get(self, driver_id: int) -> Optional[DriverStatus]:
+        return self._drivers.get(driver_id)
+
+    def refresh(self, db: Session) -> None:
+        now = datetime.now()
+        # three grouped queries instead of loading every driver with its vehicle and deliveries
+        drivers = db.execute(
+            select(Driver.id, Driver.first_name, Driver.last_name, Vehicle.capacity)
+            .outerjoin(Vehicle, Driver.vehicle_id == Vehicle.id)
+        ).all()
+        active = dict(db.execute(
+            select(Delivery.driver_id, func.count())
+            .where(Delivery.driver_id.is_not(None), Delivery.status.in_(ACTIVE_STATUSES))
+            .group_by(Delivery.driver_id)
+        ).all())
+        breaks: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        for driver_id, start, end in db.execute(
+                select(Delivery.driver_id, LogBreak.start_time, LogBreak.end_time)
+                .join(Delivery, LogBreak.delivery_id == Delivery.id)
+                .where(LogBreak.end_time > now, Delivery.driver_id.is_not(None))
+        ):
+            breaks.setdefault(driver_id, []).append((start, end))
+
+        snapshot = {
+            driver_id: DriverStatus(driver_id, first_name, last_name, capacity or 0, active.get(driver_id, 0),
+                                    tuple(breaks.get(driver_id, ())))
+            for driver_id, first_name, last_name, capacity in drivers
+        }
+        with self._lock:
+            self._drivers = snapshot
+            self._loaded_at = time.monotonic()
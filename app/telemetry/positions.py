@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class Position(NamedTuple):
+    driver_id: int
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+
+
+class PositionTable:
+    """Latest known position of every driver that reported one, to any worker, since this worker started."""
+
+    topic = "driver_positions"
+
+    def __init__(self):
+        self._positions: Dict[int, Position] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Position], None]] = []
+        self._relay = None
+        self._relay_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, manager, loop: asyncio.AbstractEventLoop) -> None:
+        # relay through the websocket broker so the positions pinged to one worker are served by all
+        self._relay = manager
+        self._relay_loop = loop
+        manager.on_topic(self.topic, self._relayed)
+
+    def _relayed(self, rows) -> None:
+        for driver_id, latitude, longitude, recorded_at, speed, heading in rows:
+            self.update(Position(driver_id, latitude, longitude, datetime.fromisoformat(recorded_at), speed, heading))
+
+    def subscribe(self, listener: Callable[[Position], None]) -> None:
+        # called with every position that becomes a driver's latest
+        self._listeners.append(listener)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def update(self, position: Position) -> bool:
+        # pings can arrive out of order (a phone flushing its offline buffer), keep the newest
+        with self._lock:
+            current = self._positions.get(position.driver_id)
+            if current is not None and current.recorded_at >= position.recorded_at:
+                return False
+            self._positions[position.driver_id] = position
+        for listener in self._listeners:
+            listener(position)
+        return True
+
+    def report(self, positions: Iterable[Position]) -> None:
+        # positions pinged to this worker; only each driver's new latest is relayed
+        latest = {position.driver_id: position for position in positions if self.update(position)}
+        if self._relay is not None and latest:
+            rows = [(p.driver_id, p.latitude, p.longitude, p.recorded_at.isoformat(), p.speed, p.heading)
+                    for p in latest.values()]
+            asyncio.run_coroutine_threadsafe(self._relay.publish_topic(self.topic, rows), self._relay_loop)
+
+    def get(self, driver_id: int) -> Optional[Position]:
+        return self._positions.get(driver_id)
+
+    def all(self, since: Optional[datetime] = None) -> List[Position]:
+        with self._lock:
+            positions = list(self._positions.values())
+        if since is not None:
+            positions = [position for position in positions if position.recorded_at >= since]
+        return positions
+
+    def remove(self, driver_id: int) -> None:
+        with self._lock:
+            self._positions.pop(driver_id, None)
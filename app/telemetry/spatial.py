@@ -0,0 +1,125 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.telemetry.positions import Position
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Latest driver positions bucketed into a fixed latitude/longitude grid.
+
+    move() is O(1), so the index follows every ping; nearest() searches rings
+    of cells outwards from the query point and stops as soon as no unvisited
+    cell can hold anything closer than the k-th match.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Cell, Set[int]] = defaultdict(set)
+        self._positions: Dict[int, Position] = {}
+        self._driver_cells: Dict[int, Cell] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def cell(self, latitude: float, longitude: float) -> Cell:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def move(self, position: Position) -> None:
+        cell = self.cell(position.latitude, position.longitude)
+        with self._lock:
+            self._positions[position.driver_id] = position
+            previous = self._driver_cells.get(position.driver_id)
+            if previous == cell:
+                return
+            if previous is not None:
+                self._discard(position.driver_id, previous)
+            self._cells[cell].add(position.driver_id)
+            self._driver_cells[position.driver_id] = cell
+
+    def remove(self, driver_id: int) -> None:
+        with self._lock:
+            self._positions.pop(driver_id, None)
+            cell = self._driver_cells.pop(driver_id, None)
+            if cell is not None:
+                self._discard(driver_id, cell)
+
+    def _discard(self, driver_id: int, cell: Cell) -> None:
+        drivers = self._cells[cell]
+        drivers.discard(driver_id)
+        if not drivers:
+            del self._cells[cell]
+
+    def _ring(self, center: Cell, radius: int) -> List[Cell]:
+        row, col = center
+        if radius == 0:
+            return [center]
+        cells = [(row - radius, col + i) for i in range(-radius, radius + 1)]
+        cells += [(row + radius, col + i) for i in range(-radius, radius + 1)]
+        cells += [(row + i, col - radius) for i in range(-radius + 1, radius)]
+        cells += [(row + i, col + radius) for i in range(-radius + 1, radius)]
+        return cells
+
+    def nearest(
+            self,
+            latitude: float,
+            longitude: float,
+            k: int,
+            max_distance_km: float,
+            accept: Optional[Callable[[Position], bool]] = None
+    ) -> List[Tuple[float, Position]]:
+        center = self.cell(latitude, longitude)
+        # the narrowest side of any cell a match can lie in, at the poleward edge of the search
+        # radius: ring r + 1 is at least r of these away
+        poleward = min(abs(latitude) + max_distance_km / KM_PER_DEGREE, 90)
+        cell_km = self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(poleward)), 1e-6)
+        max_radius = math.ceil(max_distance_km / cell_km) + 1
+        found: List[Tuple[float, Position]] = []
+
+        with self._lock:
+            visited = 0
+            for radius in range(max_radius + 1):
+                ring = self._ring(center, radius)
+                visited += len(ring)
+                if visited > len(self._positions):
+                    # sparse around here: checking every driver is cheaper than visiting more cells
+                    return self._scan(self._positions.values(), latitude, longitude, k, max_distance_km, accept)
+                found = self._scan(
+                    (self._positions[driver_id] for cell in ring for driver_id in self._cells.get(cell, ())),
+                    latitude, longitude, k, max_distance_km, accept, found
+                )
+                if len(found) == k and found[-1][0] <= radius * cell_km:
+                    break
+        return found
+
+    @staticmethod
+    def _scan(
+            positions: Iterable[Position],
+            latitude: float,
+            longitude: float,
+            k: int,
+            max_distance_km: float,
+            accept: Optional[Callable[[Position], bool]],
+            found: Optional[List[Tuple[float, Position]]] = None
+    ) -> List[Tuple[float, Position]]:
+        found = list(found or [])
+        for position in positions:
+            distance = haversine_km(latitude, longitude, position.latitude, position.longitude)
+            if distance <= max_distance_km and (accept is None or accept(position)):
+                found.append((distance, position))
+        found.sort(key=lambda match: match[0])
+        return found[:k]
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from itertools import islice
+from datetime import date, datetime, timedelta, timezone
+from typing import Deque, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.driver_ping import DriverPing
+from app.schemas.telemetry import GpsPing
+from app.telemetry.positions import Position, PositionTable
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.telemetry")
+
+COLUMNS = ("driver_id", "recorded_at", "latitude", "longitude", "speed", "heading", "accuracy")
+
+CREATE_STAGING = (
+    "CREATE TEMP TABLE IF NOT EXISTS driver_pings_staging "
+    "(LIKE driver_pings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+# a phone retrying a batch it never got an answer for must not fail the whole COPY
+INSERT_FROM_STAGING = (
+    f"INSERT INTO driver_pings ({', '.join(COLUMNS)}) "
+    f"SELECT {', '.join(COLUMNS)} FROM driver_pings_staging ON CONFLICT DO NOTHING"
+)
+
+telemetry_pings = registry.counter(
+    "telemetry_pings_total",
+    "GPS pings received, by outcome"
+)
+telemetry_pings_pending = registry.gauge(
+    "telemetry_pings_pending",
+    "GPS pings accepted but not yet written to the database"
+)
+telemetry_batch_size = registry.histogram(
+    "telemetry_batch_size",
+    "GPS pings written per COPY",
+    buckets=(10, 100, 500, 1000, 2500, 5000, 10000, 25000)
+)
+telemetry_write_seconds = registry.histogram(
+    "telemetry_write_seconds",
+    "Time to write one batch of GPS pings"
+)
+
+
+class TelemetryOverloaded(Exception):
+    pass
+
+
+def partition_name(day: date) -> str:
+    return f"driver_pings_p{day:%Y%m%d}"
+
+
+def create_partition(day: date) -> str:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF driver_pings "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + timedelta(days=1)).isoformat()}')"
+    )
+
+
+class TelemetryWriter:
+    """
+    Buffers GPS pings in memory and appends them to driver_pings in bulk.
+
+    submit() only validates the timestamps, updates the latest position per
+    driver and appends to the buffer; a background task writes the buffer with
+    COPY every flush_interval seconds or batch_size pings. Telemetry is lossy
+    by design: a crash loses the last flush_interval of pings, and once
+    max_pending pings are waiting submit() raises TelemetryOverloaded so the
+    client backs off instead of the worker running out of memory.
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            positions: PositionTable,
+            batch_size: int = 5000,
+            flush_interval: float = 0.25,
+            max_pending: int = 200000,
+            max_age: timedelta = timedelta(hours=24),
+            max_clock_skew: timedelta = timedelta(minutes=5),
+            retry_delay: float = 1.0,
+            drain_attempts: int = 3
+    ):
+        self.engine = engine
+        self.positions = positions
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.max_clock_skew = max_clock_skew
+        self.retry_delay = retry_delay
+        self.drain_attempts = drain_attempts
+        self._pending: Deque[tuple] = deque()
+        self._partitions: Set[date] = set()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+
+    def submit(self, driver_id: int, pings: Iterable[GpsPing]) -> Tuple[int, int]:
+        pings = list(pings)
+        if len(self._pending) + len(pings) > self.max_pending:
+            telemetry_pings.inc(len(pings), outcome="overloaded")
+            raise TelemetryOverloaded(f"{len(self._pending)} pings are already waiting to be written")
+
+        now = datetime.now(timezone.utc)
+        oldest, newest = now - self.max_age, now + self.max_clock_skew
+        positions = []
+        for ping in pings:
+            recorded_at = ping.recorded_at
+            if recorded_at.tzinfo is None:
+                recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+            # bogus device clocks would otherwise create partitions for arbitrary days
+            if not oldest <= recorded_at <= newest:
+                continue
+            self._pending.append((driver_id, recorded_at, ping.latitude, ping.longitude,
+                                  ping.speed, ping.heading, ping.accuracy))
+            positions.append(Position(driver_id, ping.latitude, ping.longitude, recorded_at,
+                                      ping.speed, ping.heading))
+        self.positions.report(positions)
+
+        accepted = len(positions)
+        rejected = len(pings) - accepted
+        telemetry_pings.inc(accepted, outcome="accepted")
+        if rejected:
+            telemetry_pings.inc(rejected, outcome="rejected")
+        telemetry_pings_pending.set(len(self._pending))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return accepted, rejected
+
+    async def _flush_loop(self) -> None:
+        failures = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                due = False
+            except asyncio.TimeoutError:
+                due = True
+            self._wakeup.clear()
+
+            while self._pending and (due or self._stopping or len(self._pending) >= self.batch_size):
+                if await self._flush_batch():
+                    failures = 0
+                    continue
+                failures += 1
+                if self._stopping and failures >= self.drain_attempts:
+                    logger.error("Dropping %d unsaved GPS pings on shutdown", len(self._pending))
+                    telemetry_pings.inc(len(self._pending), outcome="dropped")
+                    self._pending.clear()
+                    break
+                await asyncio.sleep(self.retry_delay)
+
+            telemetry_pings_pending.set(len(self._pending))
+            if self._stopping and not self._pending:
+                return
+
+    async def _flush_batch(self) -> bool:
+        batch = list(islice(self._pending, self.batch_size))
+        started = time.perf_counter()
+        try:
+            await self._write(batch)
+        except Exception:
+            logger.exception("Failed to write %d GPS pings, will retry", len(batch))
+            return False
+
+        for _ in batch:
+            self._pending.popleft()
+        telemetry_batch_size.observe(len(batch))
+        telemetry_write_seconds.observe(time.perf_counter() - started)
+        return True
+
+    async def _write(self, rows: List[tuple]) -> None:
+        async with self.engine.connect() as connection:
+            if connection.dialect.name != "postgresql":
+                await connection.execute(insert(DriverPing), [dict(zip(COLUMNS, row)) for row in rows])
+                await connection.commit()
+                return
+
+            raw = (await connection.get_raw_connection()).driver_connection
+            await self._ensure_partitions(raw, {row[1].astimezone(timezone.utc).date() for row in rows})
+            async with raw.transaction():
+                await raw.execute(CREATE_STAGING)
+                await raw.copy_records_to_table("driver_pings_staging", records=rows, columns=COLUMNS)
+                await raw.execute(INSERT_FROM_STAGING)
+
+    async def _ensure_partitions(self, raw: asyncpg.Connection, days: Set[date]) -> None:
+        for day in sorted(days - self._partitions):
+            try:
+                await raw.execute(create_partition(day))
+            except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+                # another worker created it between our IF NOT EXISTS check and the CREATE
+                pass
+            self._partitions.add(day)
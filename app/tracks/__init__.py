@@ -0,0 +1,22 @@
+import logging
+
+from app.db import SessionLocal
+from app.models import Delivery
+from app.tracks.store import TrackStore
+
+logger = logging.getLogger("app.tracks")
+
+
+def build_delivery_track(delivery_id: int) -> None:
+    # runs as a background task once a delivery is finished, after the response is sent
+    db = SessionLocal()
+    try:
+        delivery = db.get(Delivery, delivery_id)
+        if delivery is not None:
+            TrackStore(db).build(delivery)
+            db.commit()
+    except Exception:
+        # the track endpoint simplifies on every read until a build lands
+        logger.exception("Failed to build the track of delivery %s", delivery_id)
+    finally:
+        db.close()
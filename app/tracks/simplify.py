@@ -0,0 +1,98 @@
+import heapq
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def project(latitudes, longitudes) -> np.ndarray:
+    """Equirectangular projection to metres around the track's mean latitude, plenty for city-scale tracks."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    if lat.size == 0:
+        return np.empty((0, 2))
+    return EARTH_RADIUS_M * np.column_stack((lon * np.cos(lat.mean()), lat))
+
+
+def segment_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    # distance from every point to the segment start-end, not the infinite line
+    direction = end - start
+    length_sq = direction @ direction
+    if length_sq == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ direction / length_sq, 0.0, 1.0)
+    return np.hypot(*(points - (start + t[:, None] * direction)).T)
+
+
+def douglas_peucker(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """Boolean mask of the points kept; each pass over a span is one vectorised distance computation."""
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = segment_distances(xy[first + 1:last], xy[first], xy[last])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def triangle_areas(xy: np.ndarray) -> np.ndarray:
+    a, b, c = xy[:-2], xy[1:-1], xy[2:]
+    return 0.5 * np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1]))
+
+
+def visvalingam(xy: np.ndarray) -> np.ndarray:
+    """
+    Effective area of every point (Visvalingam-Whyatt); endpoints are infinite.
+
+    Keeping the k largest areas gives the best k-point approximation this
+    method knows, so any point budget can be served from one ranking.
+    """
+    n = len(xy)
+    areas = np.full(n, np.inf)
+    if n < 3:
+        return areas
+    initial = triangle_areas(xy)
+    areas[1:-1] = initial
+    previous = np.arange(-1, n - 1)
+    following = np.arange(1, n + 1)
+    heap = [(area, i) for i, area in enumerate(initial.tolist(), start=1)]
+    heapq.heapify(heap)
+    removed = np.zeros(n, dtype=bool)
+    floor = 0.0
+
+    while heap:
+        area, i = heapq.heappop(heap)
+        if removed[i] or area != areas[i]:
+            continue
+        # a point never counts as less important than one removed before it
+        floor = max(floor, area)
+        areas[i] = floor
+        removed[i] = True
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+        for j in (before, after):
+            if 0 < j < n - 1:
+                areas[j] = triangle_areas(xy[[previous[j], j, following[j]]])[0]
+                heapq.heappush(heap, (areas[j], j))
+    return areas
+
+
+def limit_points(xy: np.ndarray, max_points: int) -> np.ndarray:
+    """Mask keeping at most max_points points, chosen by effective area."""
+    keep = np.ones(len(xy), dtype=bool)
+    if len(xy) <= max_points:
+        return keep
+    keep[:] = False
+    keep[np.argsort(visvalingam(xy))[-max_points:]] = True
+    return keep
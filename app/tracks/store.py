@@ -0,0 +1,190 @@
+import math
+import time
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Delivery, DeliveryEvent, DeliveryTrack, DriverPing, LogBreak
+from app.models.delivery import DeliveryStatus
+from app.realtime.events import DeliveryEventType
+from app.tracks.simplify import douglas_peucker, limit_points, project
+
+# Douglas-Peucker tolerance of each stored tier, finest first. Tier 0 only drops
+# GPS jitter; each following tier suits roughly two zoom levels further out.
+TIER_TOLERANCES_M = (2.0, 10.0, 40.0, 160.0, 640.0)
+FINISHED = (DeliveryStatus.DELIVERED, DeliveryStatus.FAILED)
+
+# how far outside the recorded pings an event is still placed on the track
+POSITION_SLACK_S = 60.0
+# metres per pixel at zoom 0 on the equator for 256px web mercator tiles
+METRES_PER_PIXEL_ZOOM_0 = 156543.03392
+
+
+class Tier(NamedTuple):
+    tier: int
+    tolerance_m: float
+    # (n, 3) float64: unix seconds, latitude, longitude
+    points: np.ndarray
+
+
+def build_tiers(raw: np.ndarray) -> List[Tier]:
+    if len(raw) == 0:
+        return [Tier(i, tolerance, raw) for i, tolerance in enumerate(TIER_TOLERANCES_M)]
+    xy = project(raw[:, 1], raw[:, 2])
+    tiers = []
+    points, points_xy = raw, xy
+    for i, tolerance in enumerate(TIER_TOLERANCES_M):
+        # every tier is simplified from the previous one, so each pass only sees the survivors
+        keep = douglas_peucker(points_xy, tolerance)
+        points, points_xy = points[keep], points_xy[keep]
+        tiers.append(Tier(i, tolerance, points))
+    return tiers
+
+
+def choose_tier(tiers: List[Tier], zoom: Optional[int], max_points: Optional[int]) -> Tier:
+    chosen = 0
+    if zoom is not None and len(tiers[0].points):
+        latitude = float(np.mean(tiers[-1].points[:, 1]))
+        metres_per_pixel = METRES_PER_PIXEL_ZOOM_0 * math.cos(math.radians(latitude)) / 2 ** zoom
+        # the coarsest tier whose error stays under a pixel
+        for tier in tiers:
+            if tier.tolerance_m <= metres_per_pixel:
+                chosen = tier.tier
+    if max_points is None:
+        return tiers[chosen]
+
+    for tier in tiers[chosen:]:
+        if len(tier.points) <= max_points:
+            return tier
+    # even the coarsest tier is over budget: keep its most significant points
+    coarsest = tiers[-1]
+    keep = limit_points(project(coarsest.points[:, 1], coarsest.points[:, 2]), max_points)
+    return Tier(coarsest.tier, coarsest.tolerance_m, coarsest.points[keep])
+
+
+def driver_segments(delivery: Delivery, events: List[DeliveryEvent], now: float) -> List[Tuple[int, float, float]]:
+    """(driver_id, start, end) spans, in unix seconds, during which a driver carried the delivery."""
+    start = end = None
+    changes = []
+    for event in events:
+        at = event.created_at.timestamp()
+        if event.type == DeliveryEventType.STATUS_CHANGED.value:
+            status = event.data.get("status")
+            if status == DeliveryStatus.IN_TRANSIT.value and start is None:
+                start = at
+            elif status in (DeliveryStatus.DELIVERED.value, DeliveryStatus.FAILED.value):
+                end = at
+        elif event.type in (DeliveryEventType.CREATED.value, DeliveryEventType.ASSIGNED.value):
+            changes.append((at, event.driver_id))
+        elif event.type == DeliveryEventType.UNASSIGNED.value:
+            changes.append((at, None))
+
+    if start is None:
+        if delivery.status == DeliveryStatus.PENDING:
+            return []
+        # delivery older than the event log: best effort from its creation
+        start = delivery.created_at.timestamp()
+    if end is None or end < start:
+        end = now
+    if not changes:
+        changes = [(start, delivery.driver_id)]
+
+    segments = []
+    for (at, driver_id), (next_at, _) in zip(changes, changes[1:] + [(math.inf, None)]):
+        span_start, span_end = max(at, start), min(next_at, end)
+        if driver_id is not None and span_start < span_end:
+            segments.append((driver_id, span_start, span_end))
+    return segments
+
+
+def position_at(points: np.ndarray, at: float) -> Tuple[Optional[float], Optional[float]]:
+    # an event shortly before the first or after the last ping still gets the nearest end
+    if len(points) == 0 or not points[0, 0] - POSITION_SLACK_S <= at <= points[-1, 0] + POSITION_SLACK_S:
+        return None, None
+    return float(np.interp(at, points[:, 0], points[:, 1])), float(np.interp(at, points[:, 0], points[:, 2]))
+
+
+class TrackStore:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def raw_track(self, delivery: Delivery) -> np.ndarray:
+        events = self._events(delivery.id)
+        chunks = []
+        for driver_id, start, end in driver_segments(delivery, events, time.time()):
+            rows = self.db.execute(
+                select(DriverPing.recorded_at, DriverPing.latitude, DriverPing.longitude)
+                .where(DriverPing.driver_id == driver_id,
+                       DriverPing.recorded_at >= datetime.fromtimestamp(start, timezone.utc),
+                       DriverPing.recorded_at < datetime.fromtimestamp(end, timezone.utc))
+                .order_by(DriverPing.recorded_at)
+            ).all()
+            chunks.append(np.array([(r.recorded_at.timestamp(), r.latitude, r.longitude) for r in rows],
+                                   dtype=np.float64).reshape(-1, 3))
+        return np.concatenate(chunks) if chunks else np.empty((0, 3))
+
+    def build(self, delivery: Delivery) -> List[Tier]:
+        # the background build is the only writer; a rebuild (or two racing) overwrites in place
+        tiers = build_tiers(self.raw_track(delivery))
+        statement = insert(DeliveryTrack).values([
+            {
+                "delivery_id": delivery.id,
+                "tier": tier.tier,
+                "tolerance_m": tier.tolerance_m,
+                "point_count": len(tier.points),
+                "points": tier.points.tobytes(),
+                "built_at": datetime.now()
+            }
+            for tier in tiers
+        ])
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[DeliveryTrack.delivery_id, DeliveryTrack.tier],
+            set_={
+                column: statement.excluded[column]
+                for column in ("tolerance_m", "point_count", "points", "built_at")
+            }
+        ))
+        return tiers
+
+    def tiers(self, delivery: Delivery) -> List[Tier]:
+        stored = []
+        if delivery.status in FINISHED:
+            stored = self.db.scalars(
+                select(DeliveryTrack).where(DeliveryTrack.delivery_id == delivery.id).order_by(DeliveryTrack.tier)
+            ).all()
+        if len(stored) != len(TIER_TOLERANCES_M):
+            # still moving, or finished but its build has not landed yet: simplified on read, never stored here
+            return build_tiers(self.raw_track(delivery))
+        return [
+            Tier(row.tier, row.tolerance_m, np.frombuffer(row.points, dtype=np.float64).reshape(-1, 3))
+            for row in stored
+        ]
+
+    def timeline(self, delivery: Delivery, points: np.ndarray) -> List[dict]:
+        entries = []
+        for event in self._events(delivery.id):
+            at = event.created_at.timestamp()
+            latitude, longitude = position_at(points, at)
+            entries.append({
+                "type": event.type, "at": event.created_at, "ended_at": None,
+                "latitude": latitude, "longitude": longitude, "address": None, "data": event.data,
+            })
+        breaks = self.db.scalars(
+            select(LogBreak).options(joinedload(LogBreak.location)).where(LogBreak.delivery_id == delivery.id)
+        ).all()
+        for log_break in breaks:
+            entries.append({
+                "type": "break", "at": log_break.start_time, "ended_at": log_break.end_time,
+                "latitude": log_break.location.latitude, "longitude": log_break.location.longitude,
+                "address": log_break.location.address, "data": {"cost": log_break.cost},
+            })
+        return sorted(entries, key=lambda entry: entry["at"].timestamp())
+
+    def _events(self, delivery_id: int) -> List[DeliveryEvent]:
+        return list(self.db.scalars(
+            select(DeliveryEvent).where(DeliveryEvent.delivery_id == delivery_id).order_by(DeliveryEvent.id)
+        ))
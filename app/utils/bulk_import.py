@@ -0,0 +1,50 @@
+import codecs
+import csv
+from typing import Iterable, Iterator
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+
+# flat CSV headers such as pickup_latitude map onto the nested location schemas
+NESTED_PREFIXES = {"pickup_": "pickup_location", "dropoff_": "dropoff_location"}
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def _nest(row: dict) -> dict:
+    nested: dict = {}
+    for key, value in row.items():
+        if key is None or value is None or value.strip() == "":
+            continue
+        key = key.strip()
+        for prefix, target in NESTED_PREFIXES.items():
+            if key.startswith(prefix):
+                nested.setdefault(target, {})[key[len(prefix):]] = value
+                break
+        else:
+            nested[key] = value
+    return nested
+
+
+def read_csv_rows(chunks: Iterable[bytes]) -> Iterator[dict]:
+    # csv pulls further lines itself when a quoted field spans several of them
+    for row in csv.DictReader(iter_lines(chunks)):
+        yield _nest(row)
+
+
+def read_ndjson_rows(chunks: Iterable[bytes]) -> Iterator[str]:
+    # lines are handed over undecoded so model_validate_json reports bad JSON per row
+    for line in iter_lines(chunks):
+        if line.strip():
+            yield line
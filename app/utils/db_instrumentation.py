@@ -0,0 +1,94 @@
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.db.slow_query")
+
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool"
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after pool_timeout"
+)
+query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Wall time of executed SQL statements"
+)
+slow_queries = registry.counter(
+    "db_slow_queries_total",
+    "Statements slower than DATABASE_SLOW_QUERY_MS"
+)
+
+_pools: dict[str, QueuePool] = {}
+
+
+class _CheckoutTimingMixin:
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.inc(engine=self.metrics_label)
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, engine=self.metrics_label)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _pool_stats():
+    for label, pool in list(_pools.items()):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        yield {"engine": label}, checked_out, checked_out / capacity if capacity else 0
+
+
+pool_checked_out = registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    callback=lambda: [(labels, checked_out) for labels, checked_out, _ in _pool_stats()]
+)
+pool_saturation = registry.gauge(
+    "db_pool_saturation",
+    "Checked out connections as a fraction of pool_size + max_overflow",
+    callback=lambda: [(labels, saturation) for labels, _, saturation in _pool_stats()]
+)
+
+
+def instrument_engine(engine: Engine, label: str, slow_query_ms: int) -> None:
+    if isinstance(engine.pool, QueuePool):
+        _pools[label] = engine.pool
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        query_duration.observe(elapsed, engine=label)
+        if elapsed * 1000 >= slow_query_ms:
+            slow_queries.inc(engine=label)
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_timer(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
@@ -1,13 +1,27 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt, JWTError
 
 from app.settings import settings
+from app.utils.metrics import registry
 
 SECRET_KEY = settings.jwt.jwt_secret
 EXPIRES_IN_MINUTES = settings.jwt.jwt_expires_in_minutes
 ALGORITHM = "HS256"
 
+token_cache_lookups = registry.counter(
+    "jwt_cache_lookups_total",
+    "Access token verifications by result (hit, miss)"
+)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = EXPIRES_IN_MINUTES):
     to_encode = data.copy()
@@ -16,11 +30,108 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = EXPIRES
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    # identifies the token in the revocation list
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str):
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_native(token: str, secret: str = SECRET_KEY) -> Optional[dict]:
+    """HS256 verification with hmac and json alone; several times cheaper than python-jose."""
+    try:
+        signing_input, _, signature = token.rpartition(".")
+        header_segment, payload_segment = signing_input.split(".")
+        header = json.loads(_b64decode(header_segment))
+        # never let the token pick its own algorithm
+        if header.get("alg") != ALGORITHM:
+            return None
+        expected = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        payload = json.loads(_b64decode(payload_segment))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    now = time.time()
+    try:
+        if "exp" in payload and float(payload["exp"]) <= now:
+            return None
+        if "nbf" in payload and float(payload["nbf"]) > now:
+            return None
+    except (TypeError, ValueError):
+        return None
+    return payload
+
+
+def decode_jose(token: str, secret: str = SECRET_KEY) -> Optional[dict]:
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return jwt.decode(token, secret, algorithms=[ALGORITHM])
     except JWTError:
         return None
+
+
+class TokenCache:
+    """
+    Claims of recently verified tokens, so a client sending the same token on
+    every request pays for the signature check once.
+
+    Entries expire with the token itself; past max_size the least recently
+    used is dropped. Tokens that fail verification are never cached.
+    """
+
+    def __init__(self, max_size: int = 10000, clock=time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def set(self, token: str, claims: dict) -> None:
+        try:
+            expires_at = float(claims["exp"])
+        except (KeyError, TypeError, ValueError):
+            # no expiry to honour: verify it every time
+            return
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_decode = decode_native if settings.jwt.jwt_backend == "native" else decode_jose
+token_cache = TokenCache(settings.jwt.jwt_cache_size)
+
+
+def decode_access_token(token: str):
+    claims = token_cache.get(token)
+    if claims is not None:
+        token_cache_lookups.inc(result="hit")
+        return claims
+    token_cache_lookups.inc(result="miss")
+    claims = _decode(token)
+    if claims is not None:
+        token_cache.set(token, claims)
+    return claims
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterable, Optional, Sequence
+
+from fastapi import Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(list):
+    def __init__(self, items: Iterable = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    # a row-value comparison on the sort key seeks straight to the page through
+    # the matching index, so deep pages cost the same as the first one
+    if cursor:
+        values = tuple(decode_cursor(cursor, columns))
+        key = tuple_(*columns)
+        query = query.filter(key < values if descending else key > values)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    # one extra row tells whether there is a next page
+    return query.order_by(*order).limit(limit + 1)
+
+
+def make_page(items: Iterable, columns: Sequence, limit: int) -> Page:
+    items = list(items)
+    if limit <= 0:
+        return Page()
+    if len(items) <= limit:
+        return Page(items)
+    items = items[:limit]
+    return Page(items, encode_cursor([getattr(items[-1], column.key) for column in columns]))
+
+
+def paginate(
+        query,
+        columns: Sequence,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        skip: int = 0,
+        descending: bool = False
+) -> Page:
+    query = keyset(query, columns, cursor, limit, descending)
+    if skip and not cursor:
+        # plain offsets are still honoured for old clients, but only cursors stay cheap
+        query = query.offset(skip)
+    return make_page(query.all(), columns, limit)
+
+
+def with_next_cursor(response: Response, page: Page) -> Page:
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page
@@ -1,11 +1,25 @@
+import time
+from typing import Optional
+
 import bcrypt
 
 
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds) if rounds is not None else bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password: str) -> int:
+    # "$2b$12$<salt><hash>"
+    return int(hashed_password.split("$")[2])
+
+
+def time_hash(rounds: int) -> float:
+    started = time.perf_counter()
+    hash_password("calibration", rounds)
+    return time.perf_counter() - started
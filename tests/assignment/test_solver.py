@@ -0,0 +1,79 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from app.assignment.solver import haversine_matrix, min_cost_assignment
+from app.telemetry.spatial import haversine_km
+
+UNASSIGNED = 100.0
+
+
+def total(costs, capacity, cols):
+    assert all((cols == col).sum() <= capacity[col] for col in range(len(capacity)))
+    return sum(UNASSIGNED if col < 0 else costs[row, col] for row, col in enumerate(cols))
+
+
+def brute_force(costs, capacity):
+    n_rows, n_cols = costs.shape
+    return min(
+        total(costs, capacity, np.array(cols))
+        for cols in itertools.product(range(-1, n_cols), repeat=n_rows)
+        if all(cols.count(col) <= capacity[col] for col in range(n_cols))
+    )
+
+
+def test_haversine_matrix_matches_scalar():
+    rng = np.random.default_rng(0)
+    a, b = rng.uniform(-60, 60, (4, 2)), rng.uniform(-60, 60, (3, 2))
+
+    matrix = haversine_matrix(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+    for i, j in itertools.product(range(4), range(3)):
+        assert abs(matrix[i, j] - haversine_km(*a[i], *b[j])) < 1e-9
+
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        n_rows, n_cols = rng.integers(1, 7), rng.integers(1, 4)
+        # integer costs so ties are common
+        costs = rng.integers(0, 5, (n_rows, n_cols)).astype(float)
+        costs[rng.random((n_rows, n_cols)) < 0.2] = np.inf
+        capacity = rng.integers(0, 3, n_cols)
+
+        result = min_cost_assignment(costs, capacity, UNASSIGNED)
+
+        assert result.optimal
+        assert total(costs, capacity, result.cols) == brute_force(costs, capacity)
+
+
+def test_out_of_time_still_respects_capacity():
+    rng = np.random.default_rng(2)
+    costs = rng.uniform(0, 10, (200, 20))
+    capacity = np.full(20, 5)
+
+    result = min_cost_assignment(costs, capacity, UNASSIGNED, deadline=time.monotonic() - 1)
+
+    assert not result.optimal
+    assert (result.cols >= 0).sum() == 100
+    assert np.bincount(result.cols[result.cols >= 0], minlength=20).max() == 5
+
+
+@pytest.mark.benchmark
+def test_benchmark_5000_deliveries_500_drivers():
+    rng = np.random.default_rng(3)
+    pickups = np.column_stack([50.45 + rng.uniform(-0.2, 0.2, 5000), 30.52 + rng.uniform(-0.3, 0.3, 5000)])
+    drivers = np.column_stack([50.45 + rng.uniform(-0.2, 0.2, 500), 30.52 + rng.uniform(-0.3, 0.3, 500)])
+
+    started = time.perf_counter()
+    costs = haversine_matrix(pickups[:, 0], pickups[:, 1], drivers[:, 0], drivers[:, 1])
+    # exactly as many seats as deliveries: the hardest case for augmenting paths
+    result = min_cost_assignment(costs, np.full(500, 10), unassigned_cost=50 * 5001)
+    elapsed = time.perf_counter() - started
+
+    assert result.optimal
+    assert (result.cols >= 0).all()
+    assert np.bincount(result.cols, minlength=500).max() == 10
+    assert elapsed < 15, f"{elapsed:.1f}s"
@@ -1,11 +1,31 @@
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.db import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.db import Base, get_db, get_async_db, to_async_url
 from app.main import app
 from app.settings import settings
 
 
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="also run the timing benchmarks")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing assertions, skipped unless --benchmark is given")
+
+
+def pytest_collection_modifyitems(config, items):
+    # wall-clock limits depend on the machine, so they stay out of the regular run
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope="function", autouse=True)
 def reload_settings(monkeypatch):
     monkeypatch.setenv("ENVIRONMENT", "test")
@@ -38,3 +58,26 @@ def db_session(engine, tables):
     session.close()
     transaction.rollback()
     connection.close()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="function")
+async def async_db_session(anyio_backend, tables):
+    async_engine = create_async_engine(
+        to_async_url(settings.database.test_database_connection_string),
+        poolclass=NullPool
+    )
+    connection = await async_engine.connect()
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, autoflush=False, expire_on_commit=False)
+    app.dependency_overrides[get_async_db] = lambda: session
+    yield session
+
+    await session.close()
+    await transaction.rollback()
+    await connection.close()
+    await async_engine.dispose()
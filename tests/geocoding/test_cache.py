@@ -0,0 +1,101 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.geocoding import geohash
+from app.geocoding.cache import CachedGeocoder, LRUCache, cache_lookups
+from app.models import GeocodeCacheEntry
+
+KYIV = (50.4501, 30.5234)
+
+
+class CountingGeocoder:
+    def __init__(self, address="Khreshchatyk, Kyiv, Ukraine"):
+        self.address = address
+        self.calls = 0
+
+    def reverse(self, latitude, longitude):
+        self.calls += 1
+        return self.address
+
+
+@pytest.fixture
+def backend():
+    return CountingGeocoder()
+
+
+@pytest.fixture
+def geocoder(db_session: Session, backend):
+    return CachedGeocoder(backend, lambda: nullcontext(db_session))
+
+
+def test_geohash_roundtrip():
+    code = geohash.encode(*KYIV, precision=9)
+    assert code == "u8vxn84mn"
+    latitude, longitude = geohash.decode(code)
+    assert latitude == pytest.approx(KYIV[0], abs=1e-4)
+    assert longitude == pytest.approx(KYIV[1], abs=1e-4)
+
+
+def test_repeat_lookup_served_from_memory(geocoder, backend):
+    hits_before = cache_lookups.value(tier="memory", result="hit")
+
+    assert geocoder.reverse(*KYIV) == backend.address
+    assert geocoder.reverse(*KYIV) == backend.address
+    # a few metres away falls in the same geohash cell
+    assert geocoder.reverse(KYIV[0] + 0.00001, KYIV[1]) == backend.address
+
+    assert backend.calls == 1
+    assert cache_lookups.value(tier="memory", result="hit") == hits_before + 2
+
+
+def test_lookup_falls_back_to_db(db_session: Session, geocoder, backend):
+    geocoder.reverse(*KYIV)
+    geocoder.lru.clear()
+
+    assert geocoder.reverse(*KYIV) == backend.address
+    assert backend.calls == 1
+    assert db_session.get(GeocodeCacheEntry, geocoder.key(*KYIV)).address == backend.address
+
+
+def test_expired_db_entry_is_refreshed(db_session: Session, geocoder, backend):
+    db_session.add(GeocodeCacheEntry(
+        geohash=geocoder.key(*KYIV),
+        address="Old address",
+        created_at=datetime.now() - timedelta(days=365)
+    ))
+    db_session.commit()
+
+    assert geocoder.reverse(*KYIV) == backend.address
+    assert backend.calls == 1
+    db_session.expire_all()
+    assert db_session.get(GeocodeCacheEntry, geocoder.key(*KYIV)).address == backend.address
+
+
+def test_failed_lookup_is_not_cached(db_session: Session, geocoder, backend):
+    backend.address = None
+
+    assert geocoder.reverse(*KYIV) is None
+    assert geocoder.reverse(*KYIV) is None
+    assert backend.calls == 2
+    assert db_session.get(GeocodeCacheEntry, geocoder.key(*KYIV)) is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(max_size=2, ttl_seconds=-1)
+    cache.set("a", "1")
+    assert cache.get("a") is None
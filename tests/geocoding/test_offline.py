@@ -0,0 +1,105 @@
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.geocoding.offline import KDTree, OfflineGeocoder, to_unit_vectors
+
+PLACES = [
+    (50.4501, 30.5234, "Khreshchatyk, Kyiv, Ukraine"),
+    (49.8397, 24.0297, "Rynok Square, Lviv, Ukraine"),
+    (46.4825, 30.7233, "Deribasivska, Odesa, Ukraine"),
+    (49.9935, 36.2304, "Sumska, Kharkiv, Ukraine"),
+]
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / "gazetteer.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["latitude", "longitude", "address"])
+        writer.writerows(PLACES)
+    return path
+
+
+def test_nearest_place(gazetteer):
+    geocoder = OfflineGeocoder.from_gazetteer(str(gazetteer))
+
+    assert geocoder.reverse(50.4510, 30.5200) == "Khreshchatyk, Kyiv, Ukraine"
+    assert geocoder.reverse(49.8400, 24.0300) == "Rynok Square, Lviv, Ukraine"
+    name, distance_km = geocoder.nearest(46.4825, 30.7233)
+    assert name == "Deribasivska, Odesa, Ukraine"
+    assert distance_km == pytest.approx(0, abs=1e-6)
+
+
+def test_far_from_any_place_returns_none(gazetteer):
+    geocoder = OfflineGeocoder.from_gazetteer(str(gazetteer), max_distance_km=5)
+    assert geocoder.reverse(48.0, 33.0) is None
+
+
+def test_index_is_built_once_and_memory_mapped(gazetteer):
+    OfflineGeocoder.from_gazetteer(str(gazetteer))
+    index_dir = gazetteer.with_name(gazetteer.name + ".kdtree")
+    built_at = (index_dir / "points.npy").stat().st_mtime_ns
+
+    geocoder = OfflineGeocoder.from_gazetteer(str(gazetteer))
+
+    assert (index_dir / "points.npy").stat().st_mtime_ns == built_at
+    assert isinstance(geocoder.tree.points, np.memmap)
+    assert len(geocoder) == len(PLACES)
+
+
+def test_index_rebuilt_when_gazetteer_changes(gazetteer):
+    OfflineGeocoder.from_gazetteer(str(gazetteer))
+    with open(gazetteer, "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow([48.4647, 35.0462, "Yavornytskoho, Dnipro, Ukraine"])
+
+    geocoder = OfflineGeocoder.from_gazetteer(str(gazetteer))
+
+    assert geocoder.reverse(48.4650, 35.0460) == "Yavornytskoho, Dnipro, Ukraine"
+
+
+def test_concurrent_builds_leave_one_version(gazetteer):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        geocoders = list(pool.map(lambda _: OfflineGeocoder.from_gazetteer(str(gazetteer)), range(4)))
+    with open(gazetteer, "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow([48.4647, 35.0462, "Yavornytskoho, Dnipro, Ukraine"])
+
+    rebuilt = OfflineGeocoder.from_gazetteer(str(gazetteer))
+
+    index_dir = gazetteer.with_name(gazetteer.name + ".kdtree")
+    assert index_dir.is_symlink()
+    assert [p.name for p in gazetteer.parent.glob("*.kdtree.*") if p.is_dir()] == [index_dir.resolve().name]
+    # the old version is gone from disk but still mapped by whoever loaded it
+    assert all(geocoder.reverse(50.4510, 30.5200) == "Khreshchatyk, Kyiv, Ukraine" for geocoder in geocoders)
+    assert len(rebuilt) == len(PLACES) + 1
+
+
+def test_kdtree_matches_brute_force():
+    rng = np.random.default_rng(42)
+    points = to_unit_vectors(rng.uniform(44, 52, 5000), rng.uniform(22, 40, 5000))
+    queries = to_unit_vectors(rng.uniform(44, 52, 200), rng.uniform(22, 40, 200))
+    tree = KDTree.build(points, leaf_size=8)
+
+    for query in queries:
+        i, distance = tree.nearest(query)
+        expected = int(((points - query) ** 2).sum(axis=1).argmin())
+        assert i == expected
+        assert distance == pytest.approx(np.linalg.norm(points[expected] - query))
+
+
+@pytest.mark.benchmark
+def test_lookup_is_sub_millisecond():
+    rng = np.random.default_rng(0)
+    tree = KDTree.build(to_unit_vectors(rng.uniform(44, 52, 100000), rng.uniform(22, 40, 100000)))
+    queries = to_unit_vectors(rng.uniform(44, 52, 1000), rng.uniform(22, 40, 1000))
+
+    start = time.perf_counter()
+    for query in queries:
+        tree.nearest(query)
+    elapsed = (time.perf_counter() - start) / len(queries)
+
+    assert elapsed < 0.001
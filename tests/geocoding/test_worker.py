@@ -0,0 +1,180 @@
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.geocoding.rate_limit import TokenBucket
+from app.geocoding.stub import StubGeocoder
+from app.geocoding.worker import GeocodingWorker
+from app.models import Location
+from app.models.location import GeocodeStatus
+from app.repositories.location_repository import LocationRepository
+
+
+class FlakyGeocoder:
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    def reverse(self, latitude, longitude):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("provider unavailable")
+        return "Recovered address"
+
+
+class MovingGeocoder:
+    """Moves the location to new coordinates while the old ones are being geocoded."""
+
+    def __init__(self, db: Session, location: Location):
+        self.db = db
+        self.location = location
+
+    def reverse(self, latitude, longitude):
+        LocationRepository(self.db).update(self.location.id, {
+            "latitude": 49.84, "longitude": 24.03, "address": None,
+            "geocode_status": GeocodeStatus.PENDING, "geocode_attempts": 0
+        })
+        return "Address of the old coordinates"
+
+
+@pytest.fixture
+def locations(db_session: Session):
+    locations = [Location(latitude=50.45 + i / 100, longitude=30.52) for i in range(3)]
+    db_session.add_all(locations)
+    db_session.commit()
+    return locations
+
+
+def make_worker(db_session: Session, geocoder, **kwargs) -> GeocodingWorker:
+    return GeocodingWorker(geocoder, lambda: nullcontext(db_session), **kwargs)
+
+
+def test_new_locations_are_pending(locations):
+    assert all(location.address is None for location in locations)
+    assert all(location.geocode_status == GeocodeStatus.PENDING for location in locations)
+
+
+def test_process_batch_fills_addresses(db_session: Session, locations):
+    worker = make_worker(db_session, StubGeocoder("Stub address"))
+    notified = []
+    worker.subscribe(notified.append)
+
+    rows = worker.process_batch([location.id for location in locations])
+
+    assert len(rows) == 3
+    db_session.expire_all()
+    for location in locations:
+        assert location.address == "Stub address"
+        assert location.geocode_status == GeocodeStatus.RESOLVED
+    assert [row["id"] for row in notified[0]] == [location.id for location in locations]
+
+
+def test_resolved_locations_are_skipped(db_session: Session, locations):
+    worker = make_worker(db_session, StubGeocoder())
+    worker.process_batch([locations[0].id])
+
+    assert worker.process_batch([locations[0].id]) == []
+
+
+def test_result_for_moved_location_is_discarded(db_session: Session, locations):
+    location = locations[0]
+    worker = make_worker(db_session, MovingGeocoder(db_session, location))
+    notified = []
+    worker.subscribe(notified.append)
+
+    assert worker.process_batch([location.id]) == []
+
+    db_session.expire_all()
+    assert (location.latitude, location.longitude) == (49.84, 24.03)
+    assert location.address is None
+    assert location.geocode_status == GeocodeStatus.PENDING
+    assert notified == []
+
+
+def test_failures_are_retried_then_marked_failed(db_session: Session, locations):
+    location = locations[0]
+    worker = make_worker(db_session, FlakyGeocoder(failures=10), max_attempts=2, retry_delay=0)
+
+    worker.process_batch([location.id])
+    db_session.expire_all()
+    assert location.geocode_status == GeocodeStatus.PENDING
+    assert location.geocode_attempts == 1
+
+    worker.process_batch([location.id])
+    db_session.expire_all()
+    assert location.geocode_status == GeocodeStatus.FAILED
+    assert location.address is None
+
+
+def test_sweep_picks_up_pending_rows(db_session: Session, locations):
+    worker = make_worker(db_session, FlakyGeocoder(failures=1), batch_size=10, retry_delay=0)
+
+    assert worker.sweep() == 3
+    db_session.expire_all()
+    statuses = sorted(location.geocode_status.value for location in locations)
+    assert statuses == ["pending", "resolved", "resolved"]
+
+    assert worker.sweep() == 1
+    assert worker.sweep() == 0
+
+
+def test_failed_lookup_backs_off(db_session: Session, locations):
+    location = locations[0]
+    worker = make_worker(db_session, FlakyGeocoder(failures=1), retry_delay=60)
+
+    worker.process_batch([location.id])
+
+    db_session.expire_all()
+    assert location.geocode_next_attempt_at > datetime.now() + timedelta(seconds=50)
+    assert worker.process_batch([location.id]) == []
+    # the others are due, the failed one waits
+    assert worker.sweep() == 2
+    db_session.expire_all()
+    assert location.geocode_status == GeocodeStatus.PENDING
+
+
+def test_rows_claimed_elsewhere_are_skipped(db_session: Session, locations):
+    # another process holds a claim on the first two rows
+    claimed = LocationRepository(db_session).claim_pending(2, 5, timedelta(minutes=5))
+    worker = make_worker(db_session, StubGeocoder(), batch_size=10)
+
+    assert [location.id for location in claimed] == [locations[0].id, locations[1].id]
+    assert worker.process_batch([locations[0].id]) == []
+    assert worker.sweep() == 1
+    db_session.expire_all()
+    assert [location.geocode_status for location in locations] == [
+        GeocodeStatus.PENDING, GeocodeStatus.PENDING, GeocodeStatus.RESOLVED
+    ]
+
+
+def test_background_threads_drain_queue(db_session: Session, locations):
+    worker = make_worker(db_session, StubGeocoder(), workers=1, sweep_interval=0.05)
+    done = threading.Event()
+    worker.subscribe(lambda rows: done.set())
+
+    worker.start()
+    worker.enqueue(locations[0].id)
+    try:
+        assert done.wait(2)
+    finally:
+        worker.stop()
+
+    db_session.expire_all()
+    assert locations[0].address == "Test Address"
+
+
+def test_token_bucket_spaces_out_calls():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
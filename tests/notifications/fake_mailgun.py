@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs
+
+
+class FakeMailgun:
+    """
+    Local stand-in for Mailgun's messages endpoint.
+
+    Every accepted request is expanded the way Mailgun would: one message per
+    "to" address with %recipient.x% filled in. Queue status codes in
+    responses to fail the next requests; requests to any of the rejected
+    addresses fail with 400.
+    """
+
+    def __init__(self):
+        self.messages: List[dict] = []
+        self.requests = 0
+        self.responses: List[int] = []
+        self.rejected = set()
+        self.client_ports = set()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                fake.requests += 1
+                fake.client_ports.add(self.client_address[1])
+                form = parse_qs(body)
+                status = fake.responses.pop(0) if fake.responses else 200
+                if status == 200 and any(fake.address(to) in fake.rejected for to in form["to"]):
+                    status = 400
+                if status == 200:
+                    fake.accept(form)
+                payload = json.dumps({"message": "Queued. Thank you." if status == 200 else "Nope"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v3"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @staticmethod
+    def address(to: str) -> str:
+        return to.rsplit("<", 1)[-1].rstrip(">")
+
+    def accept(self, form: dict) -> None:
+        variables = json.loads(form["recipient-variables"][0])
+        for to in form["to"]:
+            address = self.address(to)
+            subject, text = form["subject"][0], form["text"][0]
+            for name, value in variables[address].items():
+                subject = subject.replace(f"%recipient.{name}%", str(value))
+                text = text.replace(f"%recipient.{name}%", str(value))
+            self.messages.append({"to": to, "subject": subject, "text": text})
+
+    def __enter__(self) -> "FakeMailgun":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,150 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import EmailOutbox
+from app.models.email_outbox import OutboxStatus
+from app.notifications.dispatcher import EmailDispatcher
+from app.notifications.mailgun import MailgunMailer
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from tests.notifications.fake_mailgun import FakeMailgun
+
+
+@pytest.fixture
+def mailgun():
+    with FakeMailgun() as fake:
+        yield fake
+
+
+def make_dispatcher(db_session: Session, mailgun: FakeMailgun, **kwargs) -> EmailDispatcher:
+    mailer = MailgunMailer("key", "example.org", "Driverhub <noreply@example.org>", url=mailgun.url, timeout=5)
+    return EmailDispatcher(mailer, lambda: nullcontext(db_session), **kwargs)
+
+
+def queue(db_session: Session, key: str, email: str, status: str = "In-Transit", template: str = "delivery_status"):
+    EmailOutboxRepository(db_session).add_message(key, template, email, "Olena Test", {"status": status})
+    db_session.commit()
+
+
+def outbox(db_session: Session) -> dict:
+    db_session.expire_all()
+    return {message.dedup_key: message for message in db_session.query(EmailOutbox)}
+
+
+def test_same_key_is_queued_once(db_session: Session):
+    queue(db_session, "delivery_event:1", "a@example.com")
+    queue(db_session, "delivery_event:1", "a@example.com")
+
+    assert len(outbox(db_session)) == 1
+
+
+def test_sends_one_request_per_batch(db_session: Session, mailgun):
+    queue(db_session, "k1", "a@example.com", "In-Transit")
+    queue(db_session, "k2", "b@example.com", "Delivered")
+    # a second email to the same address cannot share recipient-variables with the first
+    queue(db_session, "k3", "a@example.com", "Delivered")
+
+    assert make_dispatcher(db_session, mailgun).dispatch() == 3
+
+    assert mailgun.requests == 2
+    assert sorted(m["text"] for m in mailgun.messages) == [
+        "Your delivery status has been updated to: Delivered",
+        "Your delivery status has been updated to: Delivered",
+        "Your delivery status has been updated to: In-Transit",
+    ]
+    assert all(m.status == OutboxStatus.SENT and m.sent_at is not None for m in outbox(db_session).values())
+    # both requests went over the same pooled connection
+    assert len(mailgun.client_ports) == 1
+
+
+def test_retries_with_backoff_then_sends(db_session: Session, mailgun):
+    queue(db_session, "k1", "a@example.com")
+    mailgun.responses = [503]
+    dispatcher = make_dispatcher(db_session, mailgun, retry_base=60)
+
+    dispatcher.dispatch()
+
+    message = outbox(db_session)["k1"]
+    assert message.status == OutboxStatus.PENDING
+    assert message.attempts == 1
+    assert "503" in message.last_error
+    assert datetime.now() + timedelta(seconds=25) < message.next_attempt_at < datetime.now() + timedelta(seconds=61)
+    assert dispatcher.dispatch() == 0  # not due yet
+
+    message.next_attempt_at = datetime.now()
+    db_session.commit()
+    assert dispatcher.dispatch() == 1
+    assert outbox(db_session)["k1"].status == OutboxStatus.SENT
+    assert len(mailgun.messages) == 1
+
+
+def test_gives_up_on_permanent_errors_and_after_max_attempts(db_session: Session, mailgun):
+    queue(db_session, "rejected", "a@example.com")
+    mailgun.responses = [400]
+    dispatcher = make_dispatcher(db_session, mailgun, max_attempts=2, retry_base=0)
+    dispatcher.dispatch()
+    assert outbox(db_session)["rejected"].status == OutboxStatus.FAILED
+
+    queue(db_session, "flaky", "b@example.com")
+    mailgun.responses = [500, 500]
+    dispatcher.dispatch()
+    dispatcher.dispatch()
+    message = outbox(db_session)["flaky"]
+    assert message.status == OutboxStatus.FAILED
+    assert message.attempts == 2
+    assert mailgun.messages == []
+
+
+def test_rejected_address_fails_alone(db_session: Session, mailgun):
+    for i in range(4):
+        queue(db_session, f"k{i}", f"user{i}@example.com")
+    mailgun.rejected = {"user2@example.com"}
+
+    assert make_dispatcher(db_session, mailgun).dispatch() == 4
+
+    statuses = {key: message.status for key, message in outbox(db_session).items()}
+    assert statuses == {"k0": OutboxStatus.SENT, "k1": OutboxStatus.SENT,
+                        "k2": OutboxStatus.FAILED, "k3": OutboxStatus.SENT}
+    assert sorted(m["to"] for m in mailgun.messages) == [
+        "Olena Test <user0@example.com>", "Olena Test <user1@example.com>", "Olena Test <user3@example.com>"
+    ]
+    # the batch, its halves, and the rejected half's halves
+    assert mailgun.requests == 5
+
+
+def test_bad_credentials_keep_the_batch_queued(db_session: Session, mailgun):
+    queue(db_session, "k1", "a@example.com")
+    queue(db_session, "k2", "b@example.com")
+    mailgun.responses = [401]
+
+    make_dispatcher(db_session, mailgun).dispatch()
+
+    assert {m.status for m in outbox(db_session).values()} == {OutboxStatus.PENDING}
+    assert mailgun.requests == 1
+
+
+def test_unknown_template_fails_without_a_request(db_session: Session, mailgun):
+    queue(db_session, "k1", "a@example.com", template="nope")
+
+    make_dispatcher(db_session, mailgun).dispatch()
+
+    assert outbox(db_session)["k1"].status == OutboxStatus.FAILED
+    assert mailgun.requests == 0
+
+
+def test_background_thread_sends_when_woken(db_session: Session, mailgun):
+    dispatcher = make_dispatcher(db_session, mailgun, poll_interval=30)
+    dispatcher.start()
+    try:
+        queue(db_session, "k1", "a@example.com")
+        dispatcher.wake()
+        for _ in range(100):
+            if mailgun.messages:
+                break
+            dispatcher._stopping.wait(0.05)
+    finally:
+        dispatcher.stop()
+
+    assert len(mailgun.messages) == 1
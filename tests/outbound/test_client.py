@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import pytest
+import requests
+
+from app.outbound.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.outbound.client import AsyncHttpClient, HttpClient, UpstreamUnavailable, request_seconds, requests_total
+
+
+class FakeUpstream:
+    """Local HTTP server answering with queued status codes (200 once the queue is empty)."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.responses: List[int] = []
+        self.requests = 0
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with lock:
+                    fake.requests += 1
+                    fake.client_ports.add(self.client_address[1])
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    status = fake.responses.pop(0) if fake.responses else 200
+                time.sleep(fake.delay)
+                with lock:
+                    fake.in_flight -= 1
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/reverse"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeUpstream":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def upstream():
+    with FakeUpstream() as fake:
+        yield fake
+
+
+def test_breaker_opens_and_recovers_through_one_trial():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # only one trial at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_calls_reuse_one_connection_and_are_timed(upstream):
+    client = HttpClient()
+    observed = request_seconds.count(upstream="fake")
+
+    for _ in range(5):
+        assert client.get(upstream.url, upstream="fake").status_code == 200
+
+    assert upstream.requests == 5
+    assert len(upstream.client_ports) == 1
+    assert request_seconds.count(upstream="fake") == observed + 5
+
+
+def test_open_circuit_fails_fast(upstream):
+    clock = Clock()
+    client = HttpClient(failure_threshold=3, reset_timeout=30, clock=clock)
+    upstream.responses = [503, 503, 503]
+    rejected = requests_total.value(upstream="flaky", outcome="circuit_open")
+
+    for _ in range(3):
+        assert client.get(upstream.url, upstream="flaky").status_code == 503
+    with pytest.raises(UpstreamUnavailable):
+        client.get(upstream.url, upstream="flaky")
+    assert upstream.requests == 3
+    assert requests_total.value(upstream="flaky", outcome="circuit_open") == rejected + 1
+
+    clock.now = 30
+    assert client.get(upstream.url, upstream="flaky").status_code == 200
+    assert client.get(upstream.url, upstream="flaky").status_code == 200
+
+
+def test_unreachable_host_counts_as_failure():
+    client = HttpClient(failure_threshold=1, connect_timeout=0.5)
+    # nothing listens on the discard port
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/")
+    with pytest.raises(UpstreamUnavailable):
+        client.get("http://127.0.0.1:9/")
+
+
+def test_concurrency_is_capped_per_host():
+    with FakeUpstream(delay=0.05) as upstream:
+        client = HttpClient(max_connections=2)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(lambda _: client.get(upstream.url).status_code, range(8)))
+
+    assert statuses == [200] * 8
+    assert upstream.max_in_flight == 2
+    assert len(upstream.client_ports) == 2
+
+
+def test_host_stays_busy_past_the_wait():
+    with FakeUpstream(delay=0.5) as upstream:
+        client = HttpClient(max_connections=1, connect_timeout=0.1)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            slow = pool.submit(client.get, upstream.url)
+            time.sleep(0.05)
+            with pytest.raises(UpstreamUnavailable):
+                client.get(upstream.url)
+            assert slow.result().status_code == 200
+
+
+@pytest.mark.anyio
+async def test_async_client_shares_connections_and_limits(anyio_backend):
+    with FakeUpstream(delay=0.02) as upstream:
+        client = AsyncHttpClient(max_connections=2, failure_threshold=1)
+        try:
+            responses = await asyncio.gather(*(client.get(upstream.url, upstream="fake-async") for _ in range(6)))
+            assert [response.status_code for response in responses] == [200] * 6
+            assert upstream.max_in_flight == 2
+            assert len(upstream.client_ports) == 2
+            assert request_seconds.count(upstream="fake-async") >= 6
+
+            upstream.responses = [500]
+            assert (await client.get(upstream.url)).status_code == 500
+            with pytest.raises(UpstreamUnavailable):
+                await client.get(upstream.url)
+        finally:
+            await client.aclose()
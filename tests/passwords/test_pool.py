@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from app.passwords.pool import PasswordPool, PasswordPoolOverloaded, password_pending, password_rejected
+from app.utils.security import hash_password, hash_rounds
+
+
+@pytest.fixture
+def pool():
+    pool = PasswordPool(workers=1, max_pending=1, rounds=4)
+    yield pool
+    pool.stop()
+
+
+def test_hash_and_verify_in_workers(pool):
+    hashed = pool.hash("secret")
+
+    assert hash_rounds(hashed) == 4
+    assert pool.verify("secret", hashed)
+    assert not pool.verify("wrong", hashed)
+
+
+def test_full_queue_is_shed(pool):
+    slow = hash_password("secret", 14)
+    pool.start()
+    rejected = password_rejected.value(operation="verify")
+    pending = password_pending.value()
+    worker = threading.Thread(target=pool.verify, args=("secret", slow))
+    worker.start()
+    while password_pending.value() == pending:
+        time.sleep(0.001)
+
+    with pytest.raises(PasswordPoolOverloaded):
+        pool.verify("secret", slow)
+    worker.join()
+
+    assert password_rejected.value(operation="verify") == rejected + 1
+    assert pool.verify("secret", hash_password("secret", 4))
+
+
+def test_only_weaker_hashes_need_rehash(pool):
+    assert pool.needs_rehash(hash_password("secret", 4)) is False
+    pool.rounds = 5
+    assert pool.needs_rehash(hash_password("secret", 4)) is True
+
+
+def test_calibration_stays_within_bounds(pool):
+    assert pool.calibrate(1e-6, 4, 8) == 4
+    assert pool.calibrate(1000, 4, 8) == 8
+    # 4 rounds take a millisecond or two, a tenth of a second allows several more
+    assert 4 < pool.calibrate(0.1, 4, 31) < 14
+    assert hash_rounds(pool.hash("secret")) == pool.rounds
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from starlette.websockets import WebSocketState
+
+from app.main import app
+from app.realtime.resp import read_reply
+from app.utils.jwt import create_access_token
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.application_state = WebSocketState.CONNECTING
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        self.application_state = WebSocketState.CONNECTED
+
+    async def send_json(self, message):
+        await self.unblocked.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def encode_reply(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    return b"*%d\r\n" % len(reply) + b"".join(encode_reply(item) for item in reply)
+
+
+class FakeRedis:
+    """Local stand-in speaking the subset of RESP that RedisBroker uses."""
+
+    def __init__(self):
+        self.strings: dict[bytes, tuple[bytes, float | None]] = {}
+        self.hashes: dict[bytes, dict[bytes, bytes]] = defaultdict(dict)
+        self.subscribers: dict[bytes, set[asyncio.StreamWriter]] = defaultdict(set)
+        self.server = None
+        self.url = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        self.url = f"redis://{host}:{port}/0"
+
+    async def stop(self):
+        self.server.close()
+        for writers in self.subscribers.values():
+            for writer in writers:
+                writer.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                name, args = command[0].upper(), command[1:]
+                if name == b"SUBSCRIBE":
+                    for channel in args:
+                        self.subscribers[channel].add(writer)
+                        writer.write(encode_reply([b"subscribe", channel, len(self.subscribers)]))
+                else:
+                    try:
+                        reply = self.execute(name, args)
+                    except Exception as e:
+                        reply = e
+                    writer.write(encode_reply(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for writers in self.subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    def _get(self, key):
+        value, expires_at = self.strings.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.strings[key]
+            return None
+        return value
+
+    def execute(self, name: bytes, args: list):
+        if name == b"PING":
+            return "PONG"
+        if name == b"SET":
+            expires_at = None
+            if len(args) == 4 and args[2].upper() == b"PX":
+                expires_at = time.monotonic() + int(args[3]) / 1000
+            self.strings[args[0]] = (args[1], expires_at)
+            return "OK"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"EXISTS":
+            return sum(self._get(key) is not None for key in args)
+        if name == b"DEL":
+            return sum(self.strings.pop(key, None) is not None for key in args)
+        if name == b"HSET":
+            self.hashes[args[0]][args[1]] = args[2]
+            return 1
+        if name == b"HGET":
+            return self.hashes[args[0]].get(args[1])
+        if name == b"HDEL":
+            return sum(self.hashes[args[0]].pop(field, None) is not None for field in args[1:])
+        if name == b"HGETALL":
+            return [item for pair in self.hashes[args[0]].items() for item in pair]
+        if name == b"PUBLISH":
+            writers = list(self.subscribers[args[0]])
+            for writer in writers:
+                writer.write(encode_reply([b"message", args[0], args[1]]))
+            return len(writers)
+        raise ValueError(f"unknown command '{name.decode()}'")
+
+
+class ASGIWebSocket:
+    """Drives the app's websocket route in-process, so many sockets fit in one event loop."""
+
+    def __init__(self, user_id: int, role: str, path: str = "/ws/chat", query: str = ""):
+        token = create_access_token({"sub": f"{role}{user_id}@example.com", "id": user_id, "type": role})
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": f"token={token}{query}".encode(),
+            "headers": [],
+            "root_path": "",
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000 + user_id),
+            "subprotocols": [],
+        }
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+        self.task = None
+
+    async def connect(self):
+        self.incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(self.scope, self.incoming.get, self.outgoing.put))
+        message = await asyncio.wait_for(self.outgoing.get(), 5)
+        assert message["type"] == "websocket.accept"
+
+    async def send(self, data: dict):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self) -> dict:
+        message = await asyncio.wait_for(self.outgoing.get(), 5)
+        assert message["type"] == "websocket.send", message
+        return json.loads(message["text"])
+
+    async def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, 5)
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from sqlalchemy import make_url
+
+from app.realtime.broker import MemoryBroker, PostgresBroker, RedisBroker
+from app.realtime.connections import ConnectionManager
+from app.settings import settings
+from tests.realtime.fakes import FakeRedis, FakeWebSocket
+
+pytestmark = pytest.mark.anyio
+
+
+def user(user_id: int, role: str) -> dict:
+    return {"id": user_id, "type": role, "email": f"{role}{user_id}@example.com"}
+
+
+class RecordingManager(ConnectionManager):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.received = []
+
+    async def _deliver(self, envelope: dict) -> None:
+        if envelope.get("origin") != self.worker_id:
+            self.received.append(envelope)
+        await super()._deliver(envelope)
+
+
+@pytest.fixture(params=["memory", "postgres", "redis"])
+async def cluster(request, anyio_backend, tables):
+    backend = request.param
+    shared = MemoryBroker()
+    redis = FakeRedis()
+    if backend == "redis":
+        await redis.start()
+    dsn = make_url(settings.database.test_database_connection_string) \
+        .set(drivername="postgresql").render_as_string(hide_password=False)
+    started = []
+
+    def broker(presence_ttl: float):
+        if backend == "postgres":
+            return PostgresBroker(dsn, channel_prefix="test", presence_ttl=presence_ttl)
+        if backend == "redis":
+            return RedisBroker(redis.url, channel_prefix="test", presence_ttl=presence_ttl)
+        return shared
+
+    async def start(workers: int, presence_ttl: float = 30.0, heartbeat_interval: float = 10.0):
+        managers = [
+            RecordingManager(broker=broker(presence_ttl), heartbeat_interval=heartbeat_interval)
+            for _ in range(workers)
+        ]
+        for manager in managers:
+            await manager.start()
+        started.extend(managers)
+        return managers
+
+    start.backend = backend
+    yield start
+    for manager in started:
+        await manager.stop()
+    if backend == "redis":
+        await redis.stop()
+
+
+async def eventually(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def test_dispatchers_on_every_worker_get_driver_messages(cluster):
+    a, b = await cluster(2)
+    local, remote = FakeWebSocket(), FakeWebSocket()
+    await a.connect(user(1, "dispatcher"), remote)
+    await b.connect(user(2, "dispatcher"), local)
+
+    await b.send_to_all_dispatchers({"text": "hello"})
+
+    await eventually(lambda: remote.sent and local.sent)
+    assert remote.sent == local.sent == [{"text": "hello"}]
+
+
+async def test_driver_message_goes_only_to_owning_worker(cluster):
+    a, b, c = await cluster(3)
+    driver_socket = FakeWebSocket()
+    await b.connect(user(7, "driver"), driver_socket)
+
+    await a.send_to_driver(7, {"text": "pick up"})
+
+    await eventually(lambda: driver_socket.sent)
+    assert driver_socket.sent == [{"text": "pick up"}]
+    assert [e["target"] for e in b.received] == ["driver"]
+    assert c.received == []
+
+
+async def test_offline_driver_is_not_published(cluster):
+    a, b = await cluster(2)
+
+    await a.send_to_driver(7, {"text": "anyone?"})
+    await asyncio.sleep(0.05)
+
+    assert b.received == []
+
+
+async def test_coalesce_key_survives_the_broker(cluster):
+    a, b = await cluster(2)
+    await b.connect(user(7, "driver"), FakeWebSocket())
+
+    await a.send_to_driver(7, {"location_id": 3}, coalesce_key=("location", 3))
+
+    await eventually(lambda: b.received)
+    assert tuple(b.received[0]["coalesce_key"]) == ("location", 3)
+
+
+async def test_presence_is_shared(cluster):
+    a, b = await cluster(2)
+    await a.connect(user(1, "dispatcher"), FakeWebSocket())
+    driver = await b.connect(user(7, "driver"), FakeWebSocket())
+
+    assert await a.online("driver") == {7}
+    assert await b.online("dispatcher") == {1}
+
+    await b.disconnect(driver)
+
+    assert await a.online("driver") == set()
+
+
+async def test_reconnect_on_another_worker_moves_presence(cluster):
+    a, b = await cluster(2)
+    old = await a.connect(user(7, "driver"), FakeWebSocket())
+    new_socket = FakeWebSocket()
+    await b.connect(user(7, "driver"), new_socket)
+
+    # the stale socket closing must not wipe the newer worker's entry
+    await a.disconnect(old)
+    await a.send_to_driver(7, {"text": "still there?"})
+
+    await eventually(lambda: new_socket.sent)
+    assert new_socket.sent == [{"text": "still there?"}]
+
+
+async def test_presence_expires_when_a_worker_stops_heartbeating(cluster):
+    if cluster.backend == "memory":
+        pytest.skip("a single process has no other workers to outlive")
+    a, b = await cluster(2, presence_ttl=0.3, heartbeat_interval=60)
+    await b.connect(user(7, "driver"), FakeWebSocket())
+    assert await a.online("driver") == {7}
+
+    await asyncio.sleep(0.4)
+
+    assert await a.online("driver") == set()
+    assert await a.broker.owner("driver", 7) is None
+
+
+async def test_heartbeat_keeps_presence_alive(cluster):
+    a, b = await cluster(2, presence_ttl=0.3, heartbeat_interval=0.05)
+    await b.connect(user(7, "driver"), FakeWebSocket())
+
+    await asyncio.sleep(0.4)
+
+    assert await a.online("driver") == {7}
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.realtime.connections import ConnectionManager, OverflowPolicy, websocket_queue_lag
+from tests.realtime.fakes import FakeWebSocket
+
+pytestmark = pytest.mark.anyio
+
+
+def dispatcher(user_id: int) -> dict:
+    return {"id": user_id, "type": "dispatcher", "email": f"d{user_id}@example.com"}
+
+
+@pytest.fixture
+async def managers(anyio_backend):
+    created = []
+
+    def make(**kwargs) -> ConnectionManager:
+        manager = ConnectionManager(**kwargs)
+        created.append(manager)
+        return manager
+
+    yield make
+    for manager in created:
+        for connection in manager.connections():
+            await connection.close()
+
+
+async def settle():
+    # let the writer tasks run until they block again
+    await asyncio.sleep(0.01)
+
+
+async def test_slow_socket_does_not_delay_others(managers):
+    manager = managers(max_queue_size=10)
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    await manager.connect(dispatcher(1), slow)
+    await manager.connect(dispatcher(2), fast)
+
+    for i in range(3):
+        await manager.send_to_all_dispatchers({"n": i})
+    await settle()
+
+    assert fast.sent == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert slow.sent == []
+    assert websocket_queue_lag.value(role="dispatcher", user_id=1) > 0
+
+    slow.unblocked.set()
+    await settle()
+    assert slow.sent == fast.sent
+
+
+async def test_drop_oldest_keeps_the_newest_messages(managers):
+    manager = managers(max_queue_size=2, policy=OverflowPolicy.DROP_OLDEST)
+    websocket = FakeWebSocket(blocked=True)
+    connection = await manager.connect(dispatcher(1), websocket)
+
+    connection.send({"n": 0})
+    await settle()  # n=0 is now in flight
+    for i in range(1, 5):
+        connection.send({"n": i})
+    websocket.unblocked.set()
+    await settle()
+
+    assert websocket.sent == [{"n": 0}, {"n": 3}, {"n": 4}]
+
+
+async def test_coalesce_replaces_queued_updates(managers):
+    manager = managers(max_queue_size=10, policy=OverflowPolicy.COALESCE)
+    websocket = FakeWebSocket(blocked=True)
+    connection = await manager.connect(dispatcher(1), websocket)
+
+    for address in ("first", "second", "third"):
+        await manager.send_to_all_dispatchers({"location_id": 7, "address": address}, coalesce_key=("location", 7))
+    await manager.send_to_all_dispatchers({"text": "hello"})
+    assert len(connection) <= 3
+
+    websocket.unblocked.set()
+    await settle()
+
+    assert [m.get("address") for m in websocket.sent if "location_id" in m][-1] == "third"
+    assert websocket.sent[-1] == {"text": "hello"}
+
+
+async def test_disconnect_policy_closes_slow_socket(managers):
+    manager = managers(max_queue_size=1, policy=OverflowPolicy.DISCONNECT)
+    websocket = FakeWebSocket(blocked=True)
+    await manager.connect(dispatcher(1), websocket)
+
+    for i in range(3):
+        await manager.send_to_all_dispatchers({"n": i})
+    await settle()
+
+    assert websocket.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert 1 not in manager.active_dispatchers
+
+
+async def test_send_timeout_closes_socket(managers):
+    manager = managers(send_timeout=0.05)
+    websocket = FakeWebSocket(blocked=True)
+    await manager.connect(dispatcher(1), websocket)
+
+    await manager.send_to_all_dispatchers({"n": 0})
+    await asyncio.sleep(0.1)
+    await settle()
+
+    assert websocket.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert manager.active_dispatchers == {}
+
+
+async def test_reconnect_keeps_newer_socket(managers):
+    manager = managers()
+    old = await manager.connect(dispatcher(1), FakeWebSocket())
+    new = await manager.connect(dispatcher(1), FakeWebSocket())
+
+    await old.close()
+
+    assert manager.active_dispatchers[1] is new
+
+
+async def test_send_to_idle_driver(managers):
+    manager = managers()
+    websocket = FakeWebSocket()
+    await manager.connect({"id": 5, "type": "driver", "email": "driver@example.com"}, websocket)
+
+    await manager.send_to_driver(5, {"n": 0})
+    await settle()
+
+    assert websocket.sent == [{"n": 0}]
+
+
+async def test_revoked_tokens_close_their_sockets(managers):
+    manager = managers()
+    fired, kept, customer = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect({**dispatcher(1), "jti": "fired"}, fired)
+    await manager.connect({**dispatcher(2), "jti": "kept"}, kept)
+    await manager.connect({"id": 3, "type": "client", "email": "c@example.com", "jti": "customer"}, customer)
+
+    assert await manager.close_revoked(["fired", "customer"]) == 2
+
+    assert fired.closed_with == status.WS_1008_POLICY_VIOLATION
+    assert customer.closed_with == status.WS_1008_POLICY_VIOLATION
+    assert kept.closed_with is None
+    assert list(manager.active_dispatchers) == [2]
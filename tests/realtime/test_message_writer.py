@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Dispatcher, Driver, Message
+from app.realtime.message_writer import MessageWriter, chat_message_batch_size, chat_messages_rejected
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def users(async_db_session: AsyncSession):
+    dispatcher = Dispatcher(email="dispatcher@example.com", password_hash="x", first_name="D", last_name="D")
+    driver = Driver(email="driver@example.com", password_hash="x", first_name="D", last_name="D",
+                    license_number="DL1")
+    async_db_session.add_all([dispatcher, driver])
+    await async_db_session.commit()
+    return dispatcher, driver
+
+
+@pytest.fixture
+async def writers(async_db_session: AsyncSession):
+    created = []
+
+    def make(**kwargs) -> MessageWriter:
+        # every writer session shares the test connection: one id block covers the whole test so
+        # id fetches never interleave with inserts, and each session gets a savepoint so a
+        # rejected insert leaves the test transaction usable
+        kwargs.setdefault("id_block_size", 1000)
+        writer = MessageWriter(
+            lambda: AsyncSession(bind=async_db_session.bind, join_transaction_mode="create_savepoint"),
+            **kwargs
+        )
+        writer.start()
+        created.append(writer)
+        return writer
+
+    yield make
+    for writer in created:
+        await writer.stop()
+
+
+async def stored(session: AsyncSession) -> int:
+    return await session.scalar(select(func.count()).select_from(Message))
+
+
+async def test_message_is_acknowledged_before_it_is_written(async_db_session, users, writers):
+    dispatcher, driver = users
+    writer = writers(flush_interval=10)
+
+    first = await writer.submit("Where are you?", dispatcher.id, driver.id)
+    second = await writer.submit("On my way", driver.id, None)
+
+    assert second["id"] > first["id"]
+    assert first["created_at"] <= second["created_at"]
+    assert await stored(async_db_session) == 0
+
+    await writer.stop()
+
+    rows = (await async_db_session.scalars(select(Message).order_by(Message.id))).all()
+    assert [(m.id, m.text, m.receiver_id) for m in rows] == [
+        (first["id"], "Where are you?", driver.id),
+        (second["id"], "On my way", None),
+    ]
+    assert rows[0].conversation_key == Message.conversation_key_for(dispatcher.id, driver.id)
+
+
+async def test_full_batches_are_written_without_waiting(async_db_session, users, writers):
+    dispatcher, driver = users
+    writer = writers(batch_size=200, flush_interval=10)
+    batches_before = chat_message_batch_size.count()
+
+    for i in range(450):
+        await writer.submit(f"message {i}", driver.id, None)
+    for _ in range(100):
+        if len(writer) <= 50:
+            break
+        await asyncio.sleep(0.01)
+
+    assert await stored(async_db_session) == 400
+    await writer.stop()
+    assert await stored(async_db_session) == 450
+    assert chat_message_batch_size.count() - batches_before == 3
+
+
+async def test_timer_flushes_a_partial_batch(async_db_session, users, writers):
+    _, driver = users
+    writer = writers(batch_size=200, flush_interval=0.02)
+
+    await writer.submit("hello", driver.id, None)
+    await asyncio.sleep(0.2)
+
+    assert len(writer) == 0
+    assert await stored(async_db_session) == 1
+
+
+async def test_rejected_row_does_not_sink_its_batch(async_db_session, users, writers):
+    dispatcher, driver = users
+    writer = writers(flush_interval=10)
+    rejected_before = chat_messages_rejected.value()
+
+    await writer.submit("ok", dispatcher.id, driver.id)
+    await writer.submit("to nobody", dispatcher.id, 999999)
+    await writer.submit("also ok", driver.id, None)
+    await writer.stop()
+
+    texts = (await async_db_session.scalars(select(Message.text).order_by(Message.id))).all()
+    assert texts == ["ok", "also ok"]
+    assert chat_messages_rejected.value() - rejected_before == 1
+
+
+@pytest.mark.parametrize("receiver_id", ["abc", "5", 2 ** 31])
+async def test_malformed_row_does_not_block_later_messages(async_db_session, users, writers, receiver_id):
+    dispatcher, driver = users
+    writer = writers(flush_interval=0.01, retry_delay=0.01)
+    rejected_before = chat_messages_rejected.value()
+
+    await writer.submit("ok", dispatcher.id, driver.id)
+    await writer.submit("malformed", dispatcher.id, receiver_id)
+    await asyncio.sleep(0.1)
+    await writer.submit("later", driver.id, None)
+    await writer.stop()
+
+    texts = (await async_db_session.scalars(select(Message.text).order_by(Message.id))).all()
+    assert texts == ["ok", "later"]
+    assert chat_messages_rejected.value() - rejected_before == 1
+
+
+async def test_failed_batch_is_retried(async_db_session, users, writers):
+    _, driver = users
+    writer = writers(flush_interval=0.01, retry_delay=0.01)
+    insert = writer._insert
+    failures = []
+
+    async def flaky_insert(rows):
+        if not failures:
+            failures.append(len(rows))
+            raise ConnectionError("database went away")
+        await insert(rows)
+
+    writer._insert = flaky_insert
+    await writer.submit("survives", driver.id, None)
+    await writer.stop()
+
+    assert failures == [1]
+    assert await stored(async_db_session) == 1
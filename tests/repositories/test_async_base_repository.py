@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.models import Vehicle
+from app.repositories.async_base_repository import AsyncBaseRepository
+from app.schemas.vehicle import VehicleCreate, VehicleUpdate
+from app.services.async_base_service import AsyncBaseService
+
+pytestmark = pytest.mark.anyio
+
+TEST_VEHICLE = {
+    "model": "Mercedes Sprinter",
+    "license_plate": "AA1234BB",
+    "capacity": 1500,
+    "mileage": 25000
+}
+
+
+class AsyncVehicleRepository(AsyncBaseRepository[Vehicle, int]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Vehicle)
+        self.with_load(joinedload(Vehicle.driver))
+
+
+class AsyncVehicleService(AsyncBaseService[VehicleCreate, VehicleUpdate, int, Vehicle, AsyncVehicleRepository]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(AsyncVehicleRepository(db), Vehicle)
+
+
+async def test_create_and_get(async_db_session: AsyncSession):
+    service = AsyncVehicleService(async_db_session)
+
+    vehicle = await service.create(VehicleCreate(**TEST_VEHICLE))
+
+    assert vehicle.id is not None
+    fetched = await service.get(vehicle.id)
+    assert fetched.license_plate == TEST_VEHICLE["license_plate"]
+    assert fetched.driver is None
+    assert await service.exists(vehicle.id)
+
+
+async def test_get_all_ordering_and_paging(async_db_session: AsyncSession):
+    repository = AsyncVehicleRepository(async_db_session)
+    for i in range(3):
+        await repository.create(Vehicle(**{**TEST_VEHICLE, "license_plate": f"PLATE{i}", "mileage": i}))
+
+    vehicles = await repository.get_all(order_by="mileage", desc_order=True, limit=2)
+
+    assert [v.mileage for v in vehicles] == [2, 1]
+    assert await repository.count() == 3
+
+    rest = await repository.get_all(order_by="mileage", desc_order=True, limit=2, cursor=vehicles.next_cursor)
+
+    assert [v.mileage for v in rest] == [0]
+    assert rest.next_cursor is None
+
+
+async def test_filter(async_db_session: AsyncSession):
+    repository = AsyncVehicleRepository(async_db_session)
+    for i in range(3):
+        await repository.create(Vehicle(**{**TEST_VEHICLE, "license_plate": f"PLATE{i}", "capacity": 100 * i}))
+
+    assert len(await repository.filter(capacity=[0, 100])) == 2
+    assert (await repository.get_by_field("license_plate", "PLATE2")).capacity == 200
+
+
+async def test_update_and_delete(async_db_session: AsyncSession):
+    service = AsyncVehicleService(async_db_session)
+    vehicle = await service.create(VehicleCreate(**TEST_VEHICLE))
+
+    updated = await service.update(vehicle.id, VehicleUpdate(mileage=30000))
+    assert updated.mileage == 30000
+
+    assert await service.delete(vehicle.id)
+    assert not await service.exists(vehicle.id)
+    assert await service.update(vehicle.id, VehicleUpdate(mileage=1)) is None
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Client, Delivery, Driver, Location, LogBreak, Message, Review
+from app.models.delivery import DeliveryStatus
+from app.repositories.review_repository import ReviewRepository
+from app.utils.jwt import create_access_token
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def data(db_session: Session):
+    driver = Driver(email="driver@example.com", password_hash="x", first_name="D", last_name="D",
+                    license_number="DL1")
+    customer = Client(email="client@example.com", password_hash="x", first_name="C", last_name="C",
+                      phone_number="+1")
+    location = Location(latitude=50.45, longitude=30.52)
+    db_session.add_all([driver, customer, location])
+    db_session.flush()
+    delivery = Delivery(package_details="Box", driver_id=driver.id, client_id=customer.id,
+                        pickup_location_id=location.id, dropoff_location_id=location.id)
+    db_session.add(delivery)
+    db_session.flush()
+    now = datetime.now()
+    db_session.add_all([
+        LogBreak(location_id=location.id, delivery_id=delivery.id, start_time=now,
+                 end_time=now + timedelta(minutes=5), cost=1),
+        Review(delivery_id=delivery.id, rating=5),
+        Message(text="Hi", sender_id=driver.id, receiver_id=customer.id),
+    ])
+    db_session.commit()
+    return {"driver": driver, "client": customer, "delivery": delivery}
+
+
+@pytest.fixture
+def explain(db_session: Session):
+    connection = db_session.connection()
+    # with sequential scans priced out, the planner only picks one when no index fits
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    def plans(action) -> list[dict]:
+        captured = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            action()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+        assert captured
+        return [
+            connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()[0]["Plan"]
+            for statement, parameters in captured
+        ]
+
+    return plans
+
+
+def auth(user_id: int, role: str) -> dict:
+    token = create_access_token({"sub": f"{role}@example.com", "id": user_id, "type": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def scans(plan: dict):
+    if "Relation Name" in plan or "Index Name" in plan:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+def used_indexes(plans: list[dict]) -> set[str]:
+    return {scan["Index Name"] for plan in plans for scan in scans(plan) if "Index Name" in scan}
+
+
+def assert_indexed(plans: list[dict]):
+    for plan in plans:
+        for scan in scans(plan):
+            assert scan["Node Type"] != "Seq Scan", plan
+            # walking a whole index and filtering every entry is a sequential scan in disguise
+            assert not ("Filter" in scan and "Index Cond" not in scan), plan
+
+
+def test_delivery_lists_use_indexes(data, explain):
+    driver, customer = data["driver"], data["client"]
+
+    plans = explain(lambda: client.get("/deliveries/driver/me", headers=auth(driver.id, "driver")))
+    assert_indexed(plans)
+    assert "ix_deliveries_driver_id_created_at_id" in used_indexes(plans)
+
+    plans = explain(lambda: client.get("/deliveries/client/me", headers=auth(customer.id, "client")))
+    assert_indexed(plans)
+    assert "ix_deliveries_client_id_created_at_id" in used_indexes(plans)
+
+    plans = explain(lambda: client.get("/deliveries/", headers=auth(0, "dispatcher")))
+    assert_indexed(plans)
+    assert "ix_deliveries_created_at_id" in used_indexes(plans)
+
+
+def test_active_deliveries_use_partial_index(db_session: Session, data, explain):
+    query = select(Delivery.id).where(
+        Delivery.driver_id == data["driver"].id,
+        Delivery.status.in_([DeliveryStatus.PENDING, DeliveryStatus.IN_TRANSIT])
+    )
+
+    plans = explain(lambda: db_session.execute(query).all())
+
+    assert used_indexes(plans) == {"ix_deliveries_driver_id_status_active"}
+
+
+def test_conversation_uses_indexes(data, explain):
+    driver, customer = data["driver"], data["client"]
+    headers = auth(driver.id, "driver")
+
+    plans = explain(lambda: client.get(
+        "/messages/conversation",
+        params={"sender_id": driver.id, "receiver_id": customer.id},
+        headers=headers
+    ))
+    assert_indexed(plans)
+    assert "ix_messages_conversation_key_created_at_id" in used_indexes(plans)
+
+    plans = explain(lambda: client.get("/messages/conversation", params={"sender_id": customer.id}, headers=headers))
+    assert_indexed(plans)
+    assert {"ix_messages_sender_id_created_at_id", "ix_messages_receiver_id_created_at_id"} <= used_indexes(plans)
+
+
+def test_log_breaks_use_indexes(data, explain):
+    driver = data["driver"]
+
+    plans = explain(lambda: client.get("/log_breaks/driver/me", headers=auth(driver.id, "driver")))
+    assert_indexed(plans)
+    assert {"ix_deliveries_driver_id_created_at_id", "ix_log_breaks_delivery_id_created_at_id"} \
+        <= used_indexes(plans)
+
+    plans = explain(lambda: client.get(
+        "/log_breaks/",
+        params={"delivery_id": data["delivery"].id},
+        headers=auth(0, "dispatcher")
+    ))
+    assert_indexed(plans)
+    assert "ix_log_breaks_delivery_id_created_at_id" in used_indexes(plans)
+
+
+def test_reviews_use_indexes(db_session: Session, data, explain):
+    repository = ReviewRepository(db_session)
+
+    plans = explain(lambda: repository.exists_for_delivery(data["delivery"].id))
+    assert_indexed(plans)
+    assert "reviews_delivery_id_key" in used_indexes(plans)
+
+    plans = explain(lambda: repository.get_by_client(data["client"].id))
+    assert_indexed(plans)
+    assert "ix_deliveries_client_id_created_at_id" in used_indexes(plans)
@@ -0,0 +1,136 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Client, Delivery, DeliveryEvent, Driver, Location, Vehicle
+from app.realtime.events import DeliveryEventType
+from app.repositories.delivery_repository import ASSIGNMENT_LOCK_KEY
+from app.routers import deliveries
+from app.telemetry.availability import DriverAvailability
+from app.telemetry.positions import Position, PositionTable
+from app.utils.jwt import create_access_token
+
+client = TestClient(app)
+
+
+def auth_headers(user_id: int, role: str) -> dict:
+    token = create_access_token({"sub": f"{role}{user_id}@example.com", "id": user_id, "type": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def positions(monkeypatch):
+    positions = PositionTable()
+    monkeypatch.setattr(deliveries, "get_position_table", lambda: positions)
+    monkeypatch.setattr(deliveries, "get_driver_availability", lambda: DriverAvailability())
+    return positions
+
+
+@pytest.fixture
+def customer(db_session: Session) -> Client:
+    customer = Client(email="customer@example.com", password_hash="x", first_name="C", last_name="C",
+                      phone_number="+380000000000")
+    db_session.add(customer)
+    db_session.commit()
+    return customer
+
+
+def add_driver(db_session: Session, positions: PositionTable, name: str, capacity: int,
+               latitude: float, longitude: float) -> Driver:
+    driver = Driver(email=f"{name}@example.com", password_hash="x", first_name=name, last_name="Test",
+                    license_number=f"DL{name}",
+                    vehicle=Vehicle(model="Van", license_plate=f"AS{name}", capacity=capacity, mileage=0))
+    db_session.add(driver)
+    db_session.commit()
+    positions.update(Position(driver.id, latitude, longitude, datetime.now(timezone.utc)))
+    return driver
+
+
+def add_delivery(db_session: Session, customer: Client, latitude: float, longitude: float) -> Delivery:
+    location = Location(latitude=latitude, longitude=longitude, address="Pickup")
+    delivery = Delivery(package_details="Box", client=customer, pickup_location=location,
+                        dropoff_location=location)
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+def test_plan_is_optimal_and_not_applied(db_session: Session, positions, customer):
+    # nearest-first would send west to the middle pickup and leave the east pickup to the far driver
+    west = add_driver(db_session, positions, "West", 1, 50.45, 30.50)
+    east = add_driver(db_session, positions, "East", 1, 50.45, 30.56)
+    middle = add_delivery(db_session, customer, 50.45, 30.52)
+    far_west = add_delivery(db_session, customer, 50.45, 30.47)
+    add_delivery(db_session, customer, 52.00, 35.00)
+
+    response = client.post("/deliveries/assign/optimize", json={}, headers=auth_headers(1, "dispatcher"))
+
+    assert response.status_code == 200
+    plan = response.json()
+    assert {(a["delivery_id"], a["driver_id"]) for a in plan["assignments"]} == {(far_west.id, west.id),
+                                                                                 (middle.id, east.id)}
+    assert len(plan["unassigned"]) == 1
+    assert plan["optimal"] and not plan["applied"]
+    assert plan["drivers_considered"] == 2
+    db_session.expire_all()
+    assert db_session.get(Delivery, middle.id).driver_id is None
+
+
+def test_apply_assigns_and_records_events(db_session: Session, positions, customer):
+    driver = add_driver(db_session, positions, "Solo", 2, 50.45, 30.52)
+    first = add_delivery(db_session, customer, 50.46, 30.52)
+    second = add_delivery(db_session, customer, 50.44, 30.52)
+    third = add_delivery(db_session, customer, 50.45, 30.60)
+
+    response = client.post("/deliveries/assign/optimize", json={"apply": True},
+                           headers=auth_headers(1, "dispatcher"))
+
+    assert response.status_code == 200
+    assert response.json()["applied"]
+    assert response.json()["unassigned"] == [third.id]
+    db_session.expire_all()
+    assert [db_session.get(Delivery, d.id).driver_id for d in (first, second, third)] == [driver.id, driver.id, None]
+    events = db_session.query(DeliveryEvent).filter(DeliveryEvent.type == DeliveryEventType.ASSIGNED.value).all()
+    assert {event.delivery_id for event in events} == {first.id, second.id}
+    assert all(event.driver_id == driver.id and event.client_id == customer.id for event in events)
+
+    # the driver is full now
+    again = client.post("/deliveries/assign/optimize", json={"apply": True}, headers=auth_headers(1, "dispatcher"))
+    assert again.json()["assignments"] == [] and again.json()["drivers_considered"] == 0
+
+
+def test_apply_runs_take_turns(db_session: Session, engine, positions, customer):
+    add_driver(db_session, positions, "Solo", 1, 50.45, 30.52)
+    add_delivery(db_session, customer, 50.46, 30.52)
+
+    def lock_is_free() -> bool:
+        with engine.connect() as other:
+            return other.execute(select(func.pg_try_advisory_xact_lock(ASSIGNMENT_LOCK_KEY))).scalar()
+
+    client.post("/deliveries/assign/optimize", json={}, headers=auth_headers(1, "dispatcher"))
+    assert lock_is_free()
+
+    client.post("/deliveries/assign/optimize", json={"apply": True}, headers=auth_headers(1, "dispatcher"))
+    # the test transaction is still open, so a second apply run would wait here
+    assert not lock_is_free()
+
+
+def test_max_distance_keeps_far_drivers_out(db_session: Session, positions, customer):
+    add_driver(db_session, positions, "Far", 1, 50.45, 31.00)
+    delivery = add_delivery(db_session, customer, 50.45, 30.52)
+
+    response = client.post("/deliveries/assign/optimize", json={"max_distance_km": 10},
+                           headers=auth_headers(1, "dispatcher"))
+
+    assert response.json()["assignments"] == []
+    assert response.json()["unassigned"] == [delivery.id]
+
+
+def test_only_dispatchers_optimize(positions):
+    response = client.post("/deliveries/assign/optimize", json={}, headers=auth_headers(1, "driver"))
+
+    assert response.status_code == 403
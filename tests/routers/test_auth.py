@@ -2,9 +2,14 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app import dependencies
 from app.main import app
 from app.models import User, Client
-from app.utils.security import hash_password
+from app.passwords import get_password_pool
+from app.passwords.pool import PasswordPool
+from app.routers import auth
+from app.utils.jwt import create_access_token, decode_access_token
+from app.utils.security import hash_password, hash_rounds
 
 client = TestClient(app)
 
@@ -84,6 +89,27 @@ def test_login_success(db_session: Session, test_login: Client):
     assert response.json()["token_type"] == "bearer"
 
 
+def test_login_upgrades_weaker_hash(db_session: Session, test_login: Client):
+    test_login.password_hash = hash_password(TEST_LOGIN["password"], 4)
+    db_session.commit()
+
+    response = client.post("/auth/login", json=TEST_LOGIN)
+
+    assert response.status_code == 200
+    db_session.refresh(test_login)
+    assert hash_rounds(test_login.password_hash) == get_password_pool().rounds
+    assert client.post("/auth/login", json=TEST_LOGIN).status_code == 200
+
+
+def test_login_shed_when_password_pool_full(db_session: Session, test_login: Client, monkeypatch):
+    monkeypatch.setattr(auth, "get_password_pool", lambda: PasswordPool(max_pending=0))
+
+    response = client.post("/auth/login", json=TEST_LOGIN)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 def test_login_invalid_credentials(db_session: Session):
     response = client.post(
         "/auth/login",
@@ -137,3 +163,16 @@ def test_admin_endpoint_unauthorized(db_session: Session, test_login: Client):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert response.status_code == 403
+
+
+def test_token_resolved_once_per_request(db_session: Session, monkeypatch):
+    decodes = []
+    monkeypatch.setattr(dependencies, "decode_access_token",
+                        lambda token: decodes.append(token) or decode_access_token(token))
+    token = create_access_token({"sub": "driver@example.com", "id": 1, "type": "driver"})
+
+    # the route's require_role() and its own Depends(get_current_user) share one resolution
+    response = client.get("/deliveries/driver/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert len(decodes) == 1
@@ -1,9 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.main import app
-from app.models import Delivery, Driver, Dispatcher, Admin, Client, Location
+from app.routers import deliveries
+from app.services import delivery_service
+from app.models import Delivery, DeliveryEvent, Driver, Dispatcher, Admin, Client, EmailOutbox, Location
+from app.realtime.events import DeliveryEventType
 from app.utils.security import hash_password
 from app.schemas.delivery import DeliveryStatus
 
@@ -178,7 +182,28 @@ def driver_auth_headers(test_driver):
     return {"Authorization": f"Bearer {token}"}
 
 
-def test_create_delivery_success(db_session: Session, dispatcher_auth_headers, test_driver, test_client):
+@pytest.fixture
+def enqueued(monkeypatch):
+    location_ids = []
+    monkeypatch.setattr(deliveries, "enqueue_geocoding", lambda *ids: location_ids.extend(ids))
+    monkeypatch.setattr(delivery_service, "enqueue_geocoding", lambda *ids: location_ids.extend(ids))
+    return location_ids
+
+
+@pytest.fixture
+def statements(db_session: Session):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", record)
+    yield executed
+    event.remove(connection, "before_cursor_execute", record)
+
+
+def test_create_delivery_success(db_session: Session, dispatcher_auth_headers, test_driver, test_client, enqueued):
     delivery_data = {
         **TEST_DELIVERY,
         "driver_id": test_driver.id,
@@ -197,6 +222,9 @@ def test_create_delivery_success(db_session: Session, dispatcher_auth_headers, t
     data = response.json()
     assert data["pickup_location"]["latitude"] == TEST_PICKUP_LOCATION["latitude"]
     assert data["status"] == DeliveryStatus.PENDING
+    assert data["pickup_location"]["address"] is None
+    assert data["pickup_location"]["geocode_status"] == "pending"
+    assert enqueued == [data["pickup_location"]["id"], data["dropoff_location"]["id"]]
 
     db_delivery = db_session.query(Delivery).filter_by(id=data["id"]).first()
     assert db_delivery is not None
@@ -264,6 +292,34 @@ def test_update_status_success(db_session: Session, driver_auth_headers, test_de
     assert test_delivery.status == DeliveryStatus.IN_TRANSIT
 
 
+def test_update_status_queues_the_email_in_the_same_transaction(db_session: Session, driver_auth_headers,
+                                                                test_delivery, statements):
+    delivery_id = test_delivery.id
+    db_session.expunge_all()
+    statements.clear()
+
+    response = client.patch(f"/deliveries/{delivery_id}/status", json={"new_status": DeliveryStatus.IN_TRANSIT},
+                            headers=driver_auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["client"]["email"] == TEST_CLIENT["email"]
+    # delivery graph, event and status, then the outbox row keyed by the event; nothing is sent inside the request
+    assert statements == ["SELECT", "INSERT", "UPDATE", "INSERT"]
+    message = db_session.query(EmailOutbox).one()
+    assert message.recipient_email == TEST_CLIENT["email"]
+    assert message.variables == {"status": "In-Transit", "delivery_id": delivery_id}
+
+    # back and forth again: every change is announced, including the second In-Transit
+    for new_status in (DeliveryStatus.PENDING, DeliveryStatus.IN_TRANSIT):
+        client.patch(f"/deliveries/{delivery_id}/status", json={"new_status": new_status}, headers=driver_auth_headers)
+    assert sorted(m.variables["status"] for m in db_session.query(EmailOutbox)) == [
+        "In-Transit", "In-Transit", "Pending"
+    ]
+    # each is keyed by the event it announces
+    events = {e.id for e in db_session.query(DeliveryEvent).filter_by(type=DeliveryEventType.STATUS_CHANGED.value)}
+    assert {m.dedup_key for m in db_session.query(EmailOutbox)} == {f"delivery_event:{i}" for i in events}
+
+
 def test_delete_delivery_success(db_session: Session, admin_auth_headers, test_delivery):
     pickup_id = test_delivery.pickup_location_id
     dropoff_id = test_delivery.dropoff_location_id
@@ -312,4 +368,160 @@ def test_get_my_deliveries_as_client(db_session: Session, test_client, test_deli
     deliveries = response.json()
     assert len(deliveries) == 1
     assert deliveries[0]["id"] == test_delivery.id
-    assert deliveries[0]["client_id"] == test_delivery.client_id
\ No newline at end of file
+    assert deliveries[0]["client_id"] == test_delivery.client_id
+
+
+def test_create_delivery_round_trips(db_session: Session, dispatcher_auth_headers, test_driver, test_client,
+                                     enqueued, statements):
+    delivery_data = {
+        **TEST_DELIVERY,
+        "driver_id": test_driver.id,
+        "client_id": test_client.id,
+        "pickup_location": TEST_PICKUP_LOCATION,
+        "dropoff_location": TEST_DROPOFF_LOCATION
+    }
+    db_session.expunge_all()
+    statements.clear()
+
+    response = client.post("/deliveries/", json=delivery_data, headers=dispatcher_auth_headers)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["driver"]["id"] == test_driver.id
+    assert data["client"]["id"] == test_client.id
+    # driver, client, both locations in one INSERT ... RETURNING, delivery, its delivery.created event
+    assert statements == ["SELECT", "SELECT", "INSERT", "INSERT", "INSERT"]
+
+
+def test_create_delivery_unknown_client(db_session: Session, dispatcher_auth_headers, enqueued):
+    delivery_data = {
+        **TEST_DELIVERY,
+        "client_id": 999999,
+        "pickup_location": TEST_PICKUP_LOCATION,
+        "dropoff_location": TEST_DROPOFF_LOCATION
+    }
+
+    response = client.post("/deliveries/", json=delivery_data, headers=dispatcher_auth_headers)
+
+    assert response.status_code == 404
+    assert enqueued == []
+
+
+def test_update_delivery_round_trips(db_session: Session, dispatcher_auth_headers, test_delivery, enqueued,
+                                     statements):
+    update_data = {
+        "pickup_location": {"latitude": 50.46, "longitude": 30.52},
+        "dropoff_location": {"latitude": 50.47, "longitude": 30.53},
+        "package_details": "Updated details"
+    }
+    delivery_id = test_delivery.id
+    db_session.expunge_all()
+    statements.clear()
+
+    response = client.patch(f"/deliveries/{delivery_id}", json=update_data, headers=dispatcher_auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["package_details"] == "Updated details"
+    assert data["dropoff_location"]["latitude"] == 50.47
+    assert enqueued == [data["pickup_location"]["id"], data["dropoff_location"]["id"]]
+    # delivery graph, both new locations in one INSERT ... RETURNING, delivery
+    assert statements == ["SELECT", "INSERT", "UPDATE"]
+
+
+def test_bulk_import_csv(db_session: Session, dispatcher_auth_headers, test_driver, test_client, enqueued):
+    body = (
+        "package_details,driver_id,client_id,delivery_notes,"
+        "pickup_latitude,pickup_longitude,dropoff_latitude,dropoff_longitude\n"
+        f"Box,{test_driver.id},{test_client.id},\"Ring twice,\nthen wait\",50.45,30.52,50.46,30.50\n"
+        "No coordinates,,,,,,,\n"
+        f"Crate,,999999,,50.45,30.52,50.46,30.50\n"
+        "Envelope,,,,50.44,30.51,50.47,30.49\n"
+    )
+
+    response = client.post(
+        "/deliveries/bulk",
+        content=body.encode(),
+        headers={**dispatcher_auth_headers, "Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 2
+    assert report["failed"] == 2
+    rows = report["rows"]
+    assert [row["row"] for row in rows] == [1, 2, 3, 4]
+    assert "pickup_location: Field required" in rows[1]["errors"]
+    assert rows[2]["errors"] == ["client_id: Client not found"]
+
+    delivery = db_session.get(Delivery, rows[0]["id"])
+    assert delivery.driver_id == test_driver.id
+    assert delivery.delivery_notes == "Ring twice,\nthen wait"
+    assert delivery.pickup_location.latitude == 50.45
+    assert delivery.status == DeliveryStatus.PENDING
+    assert len(enqueued) == 4
+
+
+def test_bulk_import_ndjson_streams_in_chunks(db_session: Session, dispatcher_auth_headers, enqueued, statements):
+    row = '{"package_details": "Parcel", "pickup_location": {"latitude": 50.45, "longitude": 30.52}, ' \
+          '"dropoff_location": {"latitude": 50.46, "longitude": 30.50}}\n'
+
+    def upload():
+        yield b"not json\n"
+        for _ in range(1200):
+            yield row.encode()
+
+    statements.clear()
+    response = client.post(
+        "/deliveries/bulk",
+        content=upload(),
+        headers={**dispatcher_auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 1200
+    assert report["failed"] == 1
+    assert report["rows"][0]["row"] == 1
+    assert report["rows"][0]["errors"]
+    assert db_session.query(Delivery).count() == 1200
+    # three chunks of up to 500 rows: one INSERT each for the locations, deliveries and events
+    assert statements.count("INSERT") == 9
+
+
+def test_bulk_import_rejects_unknown_format(dispatcher_auth_headers):
+    response = client.post("/deliveries/bulk", json=[TEST_DELIVERY], headers=dispatcher_auth_headers)
+
+    assert response.status_code == 415
+
+
+def test_list_deliveries_cursor_pagination(db_session: Session, dispatcher_auth_headers, test_pickup_location,
+                                           test_dropoff_location):
+    created = []
+    for i in range(5):
+        delivery = Delivery(
+            package_details=f"Package {i}",
+            pickup_location_id=test_pickup_location.id,
+            dropoff_location_id=test_dropoff_location.id
+        )
+        db_session.add(delivery)
+        db_session.commit()
+        created.append(delivery.id)
+
+    seen = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/deliveries/", params=params, headers=dispatcher_auth_headers)
+        assert response.status_code == 200
+        seen.extend(delivery["id"] for delivery in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert seen == created
+    assert cursor is None
+
+
+def test_list_deliveries_invalid_cursor(dispatcher_auth_headers):
+    response = client.get("/deliveries/", params={"cursor": "not-a-cursor"}, headers=dispatcher_auth_headers)
+
+    assert response.status_code == 400
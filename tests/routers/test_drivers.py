@@ -1,9 +1,15 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.main import app
-from app.models import Driver, Dispatcher, Vehicle
+from app.models import Client, Delivery, Driver, Dispatcher, Location, LogBreak, Vehicle
+from app.routers import drivers
+from app.telemetry.availability import DriverAvailability
+from app.telemetry.positions import Position
+from app.telemetry.spatial import GridIndex
 from app.utils.security import hash_password
 
 client = TestClient(app)
@@ -270,3 +276,85 @@ def test_delete_driver_not_found(db_session: Session, dispatcher_auth_headers):
 
     assert response.status_code == 404
     assert "not found" in response.json()["detail"]
+
+
+@pytest.fixture
+def driver_index(monkeypatch):
+    index = GridIndex()
+    monkeypatch.setattr(drivers, "get_driver_index", lambda: index)
+    monkeypatch.setattr(drivers, "get_driver_availability", lambda: DriverAvailability(ttl=0))
+    return index
+
+
+def add_driver(db_session: Session, name: str, capacity: int) -> Driver:
+    vehicle = Vehicle(model="Van", license_plate=f"NR{name}", capacity=capacity, mileage=0)
+    driver = Driver(email=f"{name}@example.com", password_hash="x", first_name=name, last_name="Test",
+                    license_number=f"DL{name}", vehicle=vehicle)
+    db_session.add(driver)
+    db_session.commit()
+    return driver
+
+
+def add_delivery(db_session: Session, driver: Driver, status: str = "Pending") -> Delivery:
+    location = Location(latitude=50.45, longitude=30.52, address="Khreshchatyk")
+    customer = db_session.query(Client).first()
+    if customer is None:
+        customer = Client(email="customer@example.com", password_hash="x", first_name="C", last_name="C",
+                          phone_number="+380000000000")
+    delivery = Delivery(package_details="Box", status=status, driver=driver, client=customer,
+                        pickup_location=location, dropoff_location=location)
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+def place(index: GridIndex, driver: Driver, latitude: float, longitude: float, age: timedelta = timedelta()):
+    index.move(Position(driver.id, latitude, longitude, datetime.now(timezone.utc) - age))
+
+
+def test_nearest_drivers_skip_busy_and_on_break(db_session: Session, dispatcher_auth_headers, driver_index):
+    busy = add_driver(db_session, "Busy", capacity=1)
+    resting = add_driver(db_session, "Resting", capacity=2)
+    free = add_driver(db_session, "Free", capacity=2)
+    far = add_driver(db_session, "Far", capacity=2)
+    add_delivery(db_session, busy)
+    add_delivery(db_session, free, status="Delivered")
+    delivery = add_delivery(db_session, resting, status="In-Transit")
+    db_session.add(LogBreak(start_time=datetime.now() - timedelta(minutes=5),
+                            end_time=datetime.now() + timedelta(minutes=25), cost=0,
+                            delivery=delivery, location=delivery.pickup_location))
+    db_session.commit()
+    place(driver_index, busy, 50.4501, 30.5234)
+    place(driver_index, resting, 50.4502, 30.5235)
+    place(driver_index, free, 50.46, 30.53)
+    place(driver_index, far, 50.50, 30.60)
+
+    response = client.get("/drivers/nearest", params={"lat": 50.45, "lon": 30.52, "k": 5},
+                          headers=dispatcher_auth_headers)
+
+    assert response.status_code == 200
+    assert [row["driver_id"] for row in response.json()] == [free.id, far.id]
+    assert response.json()[0]["free_capacity"] == 2
+    assert 1 < response.json()[0]["distance_km"] < 2
+
+
+def test_nearest_drivers_respects_k_distance_and_position_age(db_session: Session, dispatcher_auth_headers,
+                                                             driver_index):
+    near = add_driver(db_session, "Near", capacity=1)
+    stale = add_driver(db_session, "Stale", capacity=1)
+    remote = add_driver(db_session, "Remote", capacity=1)
+    place(driver_index, near, 50.451, 30.521)
+    place(driver_index, stale, 50.450, 30.520, age=timedelta(hours=1))
+    place(driver_index, remote, 49.84, 24.03)
+
+    response = client.get("/drivers/nearest", params={"lat": 50.45, "lon": 30.52, "k": 1, "max_distance_km": 100},
+                          headers=dispatcher_auth_headers)
+
+    assert response.status_code == 200
+    assert [row["driver_id"] for row in response.json()] == [near.id]
+
+
+def test_nearest_drivers_requires_dispatcher(db_session: Session, driver_index):
+    response = client.get("/drivers/nearest", params={"lat": 50.45, "lon": 30.52})
+
+    assert response.status_code == 401
@@ -0,0 +1,284 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Client, Delivery, DeliveryEvent, Dispatcher, Driver, Location
+from app.realtime import get_event_bus
+from app.realtime.events import (DeliveryEventType, EventBus, iter_events, open_event_stream,
+                                 record_delivery_event)
+from app.routers import deliveries, events
+from app.schemas.delivery import DeliveryStatus
+from app.utils.jwt import create_access_token
+from tests.realtime.fakes import ASGIWebSocket
+
+client = TestClient(app)
+
+
+def token_for(user) -> str:
+    return create_access_token({"sub": user.email, "id": user.id, "type": user.type})
+
+
+def as_user(user) -> dict:
+    return {"id": user.id, "email": user.email, "type": user.type}
+
+
+@pytest.fixture
+def people(db_session: Session):
+    dispatcher = Dispatcher(email="dispatcher@example.com", password_hash="x", first_name="D", last_name="D")
+    first = Driver(email="driver1@example.com", password_hash="x", first_name="D", last_name="1",
+                   license_number="DL1")
+    second = Driver(email="driver2@example.com", password_hash="x", first_name="D", last_name="2",
+                    license_number="DL2")
+    customer = Client(email="client@example.com", password_hash="x", first_name="C", last_name="C",
+                      phone_number="+1234567890")
+    db_session.add_all([dispatcher, first, second, customer])
+    db_session.commit()
+    return dispatcher, first, second, customer
+
+
+@pytest.fixture
+def delivery(db_session: Session, people):
+    _, first, _, customer = people
+    delivery = Delivery(
+        package_details="Box",
+        status=DeliveryStatus.PENDING,
+        driver_id=first.id,
+        client_id=customer.id,
+        pickup_location=Location(latitude=50.45, longitude=30.52, address="A"),
+        dropoff_location=Location(latitude=50.46, longitude=30.50, address="B")
+    )
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+@pytest.fixture(autouse=True)
+def no_geocoding(monkeypatch):
+    monkeypatch.setattr(deliveries, "enqueue_geocoding", lambda *ids: None)
+
+
+def recorded(db_session: Session) -> list:
+    return [(e.type, e.driver_id, e.data) for e in db_session.scalars(select(DeliveryEvent).order_by(DeliveryEvent.id))]
+
+
+def test_reassigning_records_events_for_both_drivers(db_session: Session, people, delivery):
+    dispatcher, first, second, _ = people
+
+    response = client.patch(
+        f"/deliveries/{delivery.id}",
+        json={"driver_id": second.id},
+        headers={"Authorization": f"Bearer {token_for(dispatcher)}"}
+    )
+
+    assert response.status_code == 200
+    assert recorded(db_session) == [
+        ("delivery.unassigned", first.id, {}),
+        ("delivery.assigned", second.id, {"previous_driver_id": first.id}),
+    ]
+
+
+def test_status_change_is_recorded(db_session: Session, people, delivery):
+    _, first, _, _ = people
+
+    response = client.patch(
+        f"/deliveries/{delivery.id}/status",
+        json={"new_status": "In-Transit"},
+        headers={"Authorization": f"Bearer {token_for(first)}"}
+    )
+
+    assert response.status_code == 200
+    assert recorded(db_session) == [
+        ("delivery.status_changed", first.id, {"status": "In-Transit", "previous_status": "Pending"}),
+    ]
+
+
+def test_rolled_back_events_are_not_published(db_session: Session, delivery, monkeypatch):
+    published = []
+    monkeypatch.setattr(get_event_bus(), "publish", published.append)
+
+    record_delivery_event(db_session, DeliveryEventType.STATUS_CHANGED, delivery.id, delivery.driver_id,
+                          delivery.client_id)
+    db_session.flush()
+    db_session.rollback()
+    # the next commit must not carry the discarded event along
+    db_session.commit()
+
+    assert published == []
+
+
+@pytest.mark.anyio
+async def test_subscribers_only_see_their_own_deliveries(anyio_backend):
+    bus = EventBus()
+    dispatcher = bus.subscribe({"id": 1, "type": "dispatcher"})
+    driver = bus.subscribe({"id": 7, "type": "driver"})
+    customer = bus.subscribe({"id": 9, "type": "client"})
+
+    bus.publish([
+        {"id": 1, "type": "delivery.assigned", "driver_id": 7, "client_id": 9},
+        {"id": 2, "type": "delivery.assigned", "driver_id": 8, "client_id": 10},
+    ])
+    await asyncio.sleep(0)
+
+    assert [dispatcher.queue.get_nowait()["id"] for _ in range(2)] == [1, 2]
+    assert driver.queue.get_nowait()["id"] == 1 and driver.queue.empty()
+    assert customer.queue.get_nowait()["id"] == 1 and customer.queue.empty()
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_is_cut_off(anyio_backend):
+    bus = EventBus(max_queue_size=2)
+    subscription = bus.subscribe({"id": 1, "type": "dispatcher"})
+
+    bus.publish([{"id": i, "type": "delivery.created", "driver_id": None, "client_id": 1} for i in range(5)])
+    await asyncio.sleep(0)
+
+    received = [event["id"] async for event in iter_events(subscription, [])]
+    # what was queued is kept, the rest is left for the resume
+    assert received == [0, 1]
+
+
+@pytest.mark.anyio
+async def test_revoked_token_ends_its_streams(anyio_backend):
+    bus = EventBus()
+    revoked = bus.subscribe({"id": 1, "type": "dispatcher", "jti": "fired"})
+    other = bus.subscribe({"id": 2, "type": "dispatcher", "jti": "kept"})
+
+    bus.publish([{"id": 1, "type": "delivery.created", "driver_id": None, "client_id": 1}])
+    bus.revoke(["fired"])
+    await asyncio.sleep(0)
+
+    # not even what was already queued gets out
+    assert [event async for event in iter_events(revoked, [])] == []
+    assert revoked.revoked and not other.revoked
+    assert other.queue.get_nowait()["id"] == 1
+
+
+@pytest.mark.anyio
+async def test_resume_replays_missed_events_once(anyio_backend, db_session: Session, people, delivery):
+    _, first, second, _ = people
+    for driver in (first, second, first):
+        record_delivery_event(db_session, DeliveryEventType.ASSIGNED, delivery.id, driver.id, delivery.client_id)
+    db_session.commit()
+    ids = [event.id for event in db_session.scalars(select(DeliveryEvent).order_by(DeliveryEvent.id))]
+
+    bus = EventBus()
+    subscription, backlog = await open_event_stream(bus, db_session, as_user(first), ids[0], 100)
+    # committed while the backlog was read: arrives live as well, but is only yielded once
+    bus.publish([{"id": ids[2], "type": "delivery.assigned", "driver_id": first.id, "client_id": None}])
+    await asyncio.sleep(0)
+
+    stream = iter_events(subscription, backlog, idle_timeout=0.01)
+    assert [event["id"] for event in backlog] == [ids[2]]
+    assert (await stream.__anext__())["id"] == ids[2]
+    assert await stream.__anext__() is None
+    subscription.close()
+
+
+@pytest.mark.anyio
+async def test_truncated_backlog_ends_the_stream_for_a_resume(anyio_backend, db_session: Session, people, delivery):
+    dispatcher = people[0]
+    for _ in range(5):
+        record_delivery_event(db_session, DeliveryEventType.ASSIGNED, delivery.id, delivery.driver_id,
+                              delivery.client_id)
+    db_session.commit()
+    ids = [event.id for event in db_session.scalars(select(DeliveryEvent).order_by(DeliveryEvent.id))]
+
+    bus = EventBus()
+    subscription, backlog = await open_event_stream(bus, db_session, as_user(dispatcher), ids[0] - 1, 2)
+    # newer than the events left out of the replay, so it must not be yielded in their place
+    bus.publish([{"id": ids[-1] + 1, "type": "delivery.assigned", "driver_id": None, "client_id": None}])
+    await asyncio.sleep(0)
+    received = [event["id"] async for event in iter_events(subscription, backlog, idle_timeout=0.01)]
+    subscription.close()
+    assert subscription.truncated
+    assert received == ids[:2]
+
+    # the reconnect picks up where the replay stopped
+    subscription, backlog = await open_event_stream(bus, db_session, as_user(dispatcher), received[-1], 5)
+    subscription.close()
+    assert not subscription.truncated
+    assert [event["id"] for event in backlog] == ids[2:]
+
+
+@pytest.mark.anyio
+async def test_sse_stream_starts_with_the_backlog(anyio_backend, db_session: Session, people, delivery):
+    dispatcher = people[0]
+    event = record_delivery_event(db_session, DeliveryEventType.CREATED, delivery.id, delivery.driver_id,
+                                  delivery.client_id)
+    db_session.commit()
+
+    response = await events.delivery_events(
+        last_event_id=event.id - 1, last_event_id_header=None, user=as_user(dispatcher), db=db_session
+    )
+    body = response.body_iterator
+    try:
+        assert await body.__anext__() == "retry: 3000\n\n"
+        chunk = await body.__anext__()
+    finally:
+        await body.aclose()
+
+    assert response.media_type == "text/event-stream"
+    assert chunk.startswith(f"id: {event.id}\nevent: delivery.created\ndata: ")
+
+
+def test_sse_rejects_invalid_last_event_id(people):
+    response = client.get(
+        "/events/deliveries",
+        params={"token": token_for(people[0])},
+        headers={"Last-Event-ID": "latest"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_sse_requires_a_token():
+    assert client.get("/events/deliveries").status_code == 401
+
+
+@pytest.mark.anyio
+async def test_websocket_stream_resumes_from_last_event_id(anyio_backend, db_session: Session, people, delivery):
+    _, first, second, _ = people
+    mine = record_delivery_event(db_session, DeliveryEventType.ASSIGNED, delivery.id, first.id, delivery.client_id)
+    record_delivery_event(db_session, DeliveryEventType.ASSIGNED, delivery.id, second.id, delivery.client_id)
+    db_session.commit()
+
+    socket = ASGIWebSocket(first.id, "driver", path="/ws/events", query=f"&last_event_id={mine.id - 1}")
+    await socket.connect()
+    try:
+        received = await socket.receive()
+        # the other driver's event is filtered out, nothing else arrives
+        await asyncio.sleep(0.05)
+        assert socket.outgoing.empty()
+    finally:
+        await socket.disconnect()
+
+    assert received["id"] == mine.id
+    assert received["driver_id"] == first.id
+
+
+@pytest.mark.anyio
+async def test_websocket_stream_closes_after_a_truncated_backlog(anyio_backend, monkeypatch, db_session: Session,
+                                                                 people, delivery):
+    dispatcher = people[0]
+    monkeypatch.setattr(events.settings.event_stream, "event_stream_backlog_limit", 1)
+    first = record_delivery_event(db_session, DeliveryEventType.CREATED, delivery.id, delivery.driver_id,
+                                  delivery.client_id)
+    record_delivery_event(db_session, DeliveryEventType.ASSIGNED, delivery.id, delivery.driver_id,
+                          delivery.client_id)
+    db_session.commit()
+
+    socket = ASGIWebSocket(dispatcher.id, "dispatcher", path="/ws/events", query=f"&last_event_id={first.id - 1}")
+    await socket.connect()
+    try:
+        received = await socket.receive()
+        closed = await asyncio.wait_for(socket.outgoing.get(), 5)
+    finally:
+        await socket.disconnect()
+
+    assert received["id"] == first.id
+    assert closed == {"type": "websocket.close", "code": status.WS_1013_TRY_AGAIN_LATER, "reason": ""}
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Dispatcher, Driver, Message
+from app.utils.security import hash_password
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def test_dispatcher(db_session: Session):
+    dispatcher = Dispatcher(
+        email="dispatcher@example.com",
+        password_hash=hash_password("dispatcherpass123"),
+        first_name="Dispatcher",
+        last_name="Test"
+    )
+    db_session.add(dispatcher)
+    db_session.commit()
+    return dispatcher
+
+
+@pytest.fixture
+def test_drivers(db_session: Session):
+    drivers = [
+        Driver(
+            email=f"driver{i}@example.com",
+            password_hash=hash_password("driverpass123"),
+            first_name="Driver",
+            last_name=str(i),
+            license_number=f"DL{i}"
+        )
+        for i in range(2)
+    ]
+    db_session.add_all(drivers)
+    db_session.commit()
+    return drivers
+
+
+@pytest.fixture
+def test_messages(db_session: Session, test_dispatcher, test_drivers):
+    driver, other_driver = test_drivers
+    start = datetime(2026, 1, 1, 9, 0)
+    messages = [
+        Message(text="Where are you?", sender_id=test_dispatcher.id, receiver_id=driver.id,
+                created_at=start),
+        Message(text="On my way", sender_id=driver.id, receiver_id=test_dispatcher.id,
+                created_at=start + timedelta(minutes=1)),
+        Message(text="Someone else", sender_id=test_dispatcher.id, receiver_id=other_driver.id,
+                created_at=start + timedelta(minutes=2)),
+        Message(text="To all dispatchers", sender_id=driver.id, receiver_id=None,
+                created_at=start + timedelta(minutes=3)),
+        Message(text="Thanks", sender_id=test_dispatcher.id, receiver_id=driver.id,
+                created_at=start + timedelta(minutes=4)),
+    ]
+    db_session.add_all(messages)
+    db_session.commit()
+    return messages
+
+
+@pytest.fixture
+def statements(db_session: Session):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", record)
+    yield executed
+    event.remove(connection, "before_cursor_execute", record)
+
+
+def test_conversation_between_two_users(db_session: Session, test_dispatcher, test_drivers, test_messages,
+                                        statements):
+    driver_id, dispatcher_id = test_drivers[0].id, test_dispatcher.id
+    db_session.expunge_all()
+    statements.clear()
+
+    response = client.get(
+        "/messages/conversation",
+        params={"sender_id": driver_id, "receiver_id": dispatcher_id}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [m["text"] for m in data] == ["Thanks", "On my way", "Where are you?"]
+    assert data[0]["sender"]["id"] == dispatcher_id
+    assert data[0]["receiver"]["id"] == driver_id
+    # sender and receiver come back in the same query
+    assert statements == ["SELECT"]
+
+
+def test_conversation_key_ignores_direction(test_dispatcher, test_drivers, test_messages):
+    driver = test_drivers[0]
+
+    assert test_messages[0].conversation_key == test_messages[1].conversation_key
+    assert test_messages[0].conversation_key == Message.conversation_key_for(driver.id, test_dispatcher.id)
+    assert test_messages[2].conversation_key != test_messages[0].conversation_key
+    assert test_messages[3].conversation_key is None
+
+
+def test_conversation_for_one_user(test_drivers, test_messages):
+    response = client.get("/messages/conversation", params={"sender_id": test_drivers[0].id})
+
+    assert response.status_code == 200
+    assert [m["text"] for m in response.json()] == ["Thanks", "To all dispatchers", "On my way", "Where are you?"]
+
+
+def test_conversation_cursor_pagination(test_dispatcher, test_drivers, test_messages):
+    params = {"sender_id": test_dispatcher.id, "receiver_id": test_drivers[0].id, "limit": 2}
+
+    first = client.get("/messages/conversation", params=params)
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/messages/conversation", params={**params, "cursor": cursor})
+
+    assert [m["text"] for m in first.json()] == ["Thanks", "On my way"]
+    assert [m["text"] for m in second.json()] == ["Where are you?"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_conversation_requires_a_participant(test_messages):
+    response = client.get("/messages/conversation")
+
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,88 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.db import engine, engine_options
+from app.main import app
+from app.settings import settings
+from app.utils.db_instrumentation import InstrumentedQueuePool, instrument_engine, pool_checkout_wait, slow_queries
+from app.utils.metrics import MetricsRegistry
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_exposes_pool_metrics():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'db_pool_checked_out{engine="sync"} 1.0' in response.text
+    assert "db_pool_saturation" in response.text
+    assert "db_pool_checkout_wait_seconds_bucket" in response.text
+
+
+def test_pool_checkout_wait_is_recorded():
+    before = pool_checkout_wait.count(engine="sync")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert pool_checkout_wait.count(engine="sync") == before + 1
+
+
+def test_engine_options_from_settings(monkeypatch):
+    monkeypatch.setattr(settings.database, "database_pool_size", 3)
+    monkeypatch.setattr(settings.database, "database_max_overflow", 1)
+    monkeypatch.setattr(settings.database, "database_statement_timeout_ms", 1500)
+    monkeypatch.setattr(settings.database, "database_echo", None)
+    monkeypatch.setattr(settings.app, "environment", "production")
+
+    options = engine_options("postgresql://user@localhost/db")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 1
+    assert options["echo"] is False
+    assert options["connect_args"] == {"options": "-c statement_timeout=1500"}
+
+    async_options = engine_options("postgresql+asyncpg://user@localhost/db", is_async=True)
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "1500"}}
+
+
+def test_echo_enabled_in_development(monkeypatch):
+    monkeypatch.setattr(settings.database, "database_echo", None)
+    monkeypatch.setattr(settings.app, "environment", "development")
+    assert engine_options("postgresql://user@localhost/db")["echo"] is True
+
+    monkeypatch.setattr(settings.database, "database_echo", False)
+    assert engine_options("postgresql://user@localhost/db")["echo"] is False
+
+
+def test_slow_query_logging(caplog):
+    slow_engine = create_engine(settings.database.test_database_connection_string)
+    instrument_engine(slow_engine, "slow_test", slow_query_ms=0)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        with slow_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert slow_queries.value(engine="slow_test") == 1
+    assert "SELECT 1" in caplog.text
+    slow_engine.dispose()
+
+
+def test_registry_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.5)
+
+    output = registry.render()
+
+    assert 'requests_total{route="/a"} 3.0' in output
+    assert 'latency_seconds_bucket{le="0.1"} 0' in output
+    assert 'latency_seconds_bucket{le="1.0"} 1' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in output
+    assert "latency_seconds_count 1" in output
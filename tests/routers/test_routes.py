@@ -0,0 +1,131 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Client, Delivery, Driver, Location
+from app.models.delivery import DeliveryStatus
+from app.routers import deliveries, drivers
+from app.sequencing.planner import RoutePlanner, route_cache_lookups
+from app.telemetry.positions import Position
+from app.utils.jwt import create_access_token
+
+client = TestClient(app)
+
+
+def auth_headers(user_id: int, role: str) -> dict:
+    token = create_access_token({"sub": f"{role}{user_id}@example.com", "id": user_id, "type": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    planner = RoutePlanner()
+    monkeypatch.setattr(deliveries, "get_route_planner", lambda: planner)
+    monkeypatch.setattr(drivers, "get_route_planner", lambda: planner)
+    return planner
+
+
+@pytest.fixture
+def driver(db_session: Session) -> Driver:
+    driver = Driver(email="route@example.com", password_hash="x", first_name="R", last_name="T",
+                    license_number="DLROUTE")
+    db_session.add(driver)
+    db_session.commit()
+    return driver
+
+
+def add_delivery(db_session: Session, driver: Driver, pickup: tuple, dropoff: tuple,
+                 status: DeliveryStatus = DeliveryStatus.PENDING) -> Delivery:
+    customer = db_session.query(Client).first() or Client(
+        email="customer@example.com", password_hash="x", first_name="C", last_name="C", phone_number="+380000000000"
+    )
+    delivery = Delivery(package_details="Box", status=status, driver=driver, client=customer,
+                        pickup_location=Location(latitude=pickup[0], longitude=pickup[1]),
+                        dropoff_location=Location(latitude=dropoff[0], longitude=dropoff[1]))
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+def test_route_orders_stops_along_the_way(db_session: Session, planner, driver, monkeypatch):
+    # driver at the west end; every stop lies further east
+    monkeypatch.setattr(deliveries, "get_recent_position",
+                        lambda driver_id: Position(driver_id, 50.45, 30.40, datetime.now(timezone.utc)))
+    far = add_delivery(db_session, driver, (50.45, 30.44), (50.45, 30.60))
+    near = add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+    on_board = add_delivery(db_session, driver, (50.0, 30.0), (50.45, 30.55), DeliveryStatus.IN_TRANSIT)
+    add_delivery(db_session, driver, (50.45, 30.41), (50.45, 30.43), DeliveryStatus.DELIVERED)
+
+    response = client.get("/deliveries/driver/me/route", headers=auth_headers(driver.id, "driver"))
+
+    assert response.status_code == 200
+    route = response.json()
+    assert [(stop["delivery_id"], stop["kind"]) for stop in route["stops"]] == [
+        (near.id, "pickup"), (far.id, "pickup"), (near.id, "dropoff"), (on_board.id, "dropoff"), (far.id, "dropoff")
+    ]
+    assert route["from_position"]
+    assert route["stops"][0]["leg_km"] > 0
+    assert route["total_km"] == route["stops"][-1]["cumulative_km"]
+    assert 13 < route["total_km"] < 15
+
+
+def test_route_starts_at_the_unrounded_position(db_session: Session, planner, driver):
+    add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+    position = Position(driver.id, 50.45, 30.4149, datetime.now(timezone.utc))
+
+    plan = planner.plan(db_session, driver.id, position)
+
+    # about 0.36 km from the real position, 0.70 km from its rounded cell at 30.41
+    assert plan.stops[0].leg_km == pytest.approx(0.36, abs=0.01)
+
+
+def test_route_is_cached_until_the_deliveries_change(db_session: Session, planner, driver, monkeypatch):
+    monkeypatch.setattr(deliveries, "get_recent_position", lambda driver_id: None)
+    delivery = add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+    headers = auth_headers(driver.id, "driver")
+    hits = route_cache_lookups.value(result="hit")
+
+    first = client.get("/deliveries/driver/me/route", headers=headers).json()
+    second = client.get("/deliveries/driver/me/route", headers=headers).json()
+    assert first == second
+    assert route_cache_lookups.value(result="hit") == hits + 1
+
+    client.patch(f"/deliveries/{delivery.id}/status", json={"new_status": "In-Transit"},
+                 headers=auth_headers(driver.id, "driver"))
+    third = client.get("/deliveries/driver/me/route", headers=headers).json()
+    assert [stop["kind"] for stop in third["stops"]] == ["dropoff"]
+    assert not third["from_position"]
+
+
+def test_geocoded_addresses_replace_the_cached_plan(db_session: Session, planner, driver):
+    delivery = add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+    assert planner.plan(db_session, driver.id).stops[0].address is None
+
+    delivery.pickup_location.address = "Khreshchatyk 1"
+    db_session.commit()
+
+    assert planner.plan(db_session, driver.id).stops[0].address == "Khreshchatyk 1"
+
+
+def test_delivery_events_invalidate_the_drivers_entry(db_session: Session, planner, driver):
+    add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+    planner.plan(db_session, driver.id)
+    assert len(planner) == 1
+
+    planner.on_events([{"type": "delivery.assigned", "driver_id": 999, "data": {"previous_driver_id": driver.id}}])
+
+    assert len(planner) == 0
+
+
+def test_dispatcher_sees_a_drivers_route(db_session: Session, planner, driver):
+    add_delivery(db_session, driver, (50.45, 30.42), (50.45, 30.50))
+
+    response = client.get(f"/drivers/{driver.id}/route", headers=auth_headers(1, "dispatcher"))
+    missing = client.get("/drivers/999999/route", headers=auth_headers(1, "dispatcher"))
+
+    assert response.status_code == 200
+    assert len(response.json()["stops"]) == 2
+    assert missing.status_code == 404
@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import AuthSession, Dispatcher, Driver
+from app.services.session_service import SessionService
+from app.sessions.revocation import RevocationList
+from app.utils.jwt import create_access_token
+from app.utils.security import hash_password
+
+client = TestClient(app)
+
+DRIVER_LOGIN = {"email": "driver@example.com", "password": "driverpass123"}
+
+
+@pytest.fixture
+def driver(db_session: Session):
+    driver = Driver(email=DRIVER_LOGIN["email"], password_hash=hash_password(DRIVER_LOGIN["password"]),
+                    first_name="Driver", last_name="Test", license_number="DL1")
+    db_session.add(driver)
+    db_session.commit()
+    return driver
+
+
+@pytest.fixture
+def dispatcher_headers(db_session: Session):
+    dispatcher = Dispatcher(email="dispatcher@example.com", password_hash="x", first_name="D", last_name="D")
+    db_session.add(dispatcher)
+    db_session.commit()
+    token = create_access_token({"sub": dispatcher.email, "id": dispatcher.id, "type": "dispatcher"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def login() -> dict:
+    response = client.post("/auth/login", json=DRIVER_LOGIN)
+    assert response.status_code == 200
+    return response.json()
+
+
+def me(access_token: str) -> int:
+    return client.get("/auth/me", headers={"Authorization": f"Bearer {access_token}"}).status_code
+
+
+def test_refresh_rotates_both_tokens(db_session: Session, driver):
+    tokens = login()
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert me(rotated["access_token"]) == 200
+    # the session's previous access token and refresh token are spent
+    assert me(tokens["access_token"]) == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_logout_ends_the_session(db_session: Session, driver):
+    tokens = login()
+
+    response = client.post("/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 204
+    assert me(tokens["access_token"]) == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_unknown_refresh_token_is_rejected(db_session: Session):
+    response = client.post("/auth/refresh", json={"refresh_token": "not-a-token"})
+
+    assert response.status_code == 401
+
+
+def test_deleted_driver_is_locked_out_immediately(db_session: Session, driver, dispatcher_headers):
+    first, second = login(), login()
+    assert db_session.query(AuthSession).filter_by(user_id=driver.id).count() == 2
+
+    assert client.delete(f"/drivers/{driver.id}", headers=dispatcher_headers).status_code == 204
+
+    assert me(first["access_token"]) == 401
+    assert me(second["access_token"]) == 401
+
+
+def test_revoking_a_user_publishes_only_after_commit(db_session: Session, driver):
+    login()
+    revocations = RevocationList()
+    sessions = SessionService(db_session, revocations)
+
+    staged = sessions.revoke_user(driver.id)
+
+    # a delete failing after this point must not leave a revocation behind on any worker
+    assert len(staged) == 1 and len(revocations) == 0
+    db_session.commit()
+    sessions.publish(staged)
+    assert revocations.is_revoked(staged[0][0])
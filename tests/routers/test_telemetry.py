@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import async_engine
+from app.main import app
+from app.routers import telemetry, websocket
+from app.telemetry.positions import PositionTable
+from app.telemetry.writer import TelemetryWriter
+from app.utils.jwt import create_access_token
+from tests.realtime.fakes import ASGIWebSocket
+
+client = TestClient(app)
+
+
+def auth_headers(user_id: int, role: str) -> dict:
+    token = create_access_token({"sub": f"{role}{user_id}@example.com", "id": user_id, "type": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def pings(count: int, latitude: float = 50.45) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {"latitude": latitude, "longitude": 30.52, "recorded_at": (now - timedelta(seconds=count - i)).isoformat()}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    # never started: pings stay in the buffer, which is all the routes touch
+    writer = TelemetryWriter(async_engine, PositionTable(), max_pending=100)
+    monkeypatch.setattr(telemetry, "get_telemetry_writer", lambda: writer)
+    monkeypatch.setattr(telemetry, "get_position_table", lambda: writer.positions)
+    monkeypatch.setattr(websocket, "telemetry_writer", writer)
+    return writer
+
+
+def test_driver_posts_a_batch(writer):
+    response = client.post("/telemetry/pings", json={"pings": pings(3)}, headers=auth_headers(7, "driver"))
+
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 3, "rejected": 0}
+    assert len(writer) == 3
+    assert writer.positions.get(7).latitude == 50.45
+
+
+def test_only_drivers_post_pings(writer):
+    response = client.post("/telemetry/pings", json={"pings": pings(1)}, headers=auth_headers(1, "dispatcher"))
+
+    assert response.status_code == 403
+
+
+def test_invalid_ping_is_rejected(writer):
+    batch = pings(1)
+    batch[0]["latitude"] = 91
+
+    response = client.post("/telemetry/pings", json={"pings": batch}, headers=auth_headers(7, "driver"))
+
+    assert response.status_code == 422
+    assert len(writer) == 0
+
+
+def test_full_buffer_answers_503(writer):
+    client.post("/telemetry/pings", json={"pings": pings(100)}, headers=auth_headers(7, "driver"))
+
+    response = client.post("/telemetry/pings", json={"pings": pings(1)}, headers=auth_headers(8, "driver"))
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_dispatcher_reads_latest_positions(writer):
+    client.post("/telemetry/pings", json={"pings": pings(5, latitude=50.1)}, headers=auth_headers(7, "driver"))
+    client.post("/telemetry/pings", json={"pings": pings(1, latitude=50.2)}, headers=auth_headers(8, "driver"))
+    headers = auth_headers(1, "dispatcher")
+
+    positions = client.get("/telemetry/positions", headers=headers).json()
+    single = client.get("/telemetry/positions/8", headers=headers)
+
+    assert sorted((p["driver_id"], p["latitude"]) for p in positions) == [(7, 50.1), (8, 50.2)]
+    assert single.json()["latitude"] == 50.2
+    assert client.get("/telemetry/positions/9", headers=headers).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_pings_over_the_chat_socket(anyio_backend, writer):
+    driver = ASGIWebSocket(7, "driver")
+    dispatcher = ASGIWebSocket(1, "dispatcher")
+    await driver.connect()
+    await dispatcher.connect()
+    try:
+        await driver.send({"type": "telemetry", "pings": pings(2)})
+        await driver.send({"type": "telemetry", "pings": [{"latitude": 50}]})
+        await dispatcher.send({"type": "telemetry", "pings": pings(1)})
+
+        # accepted pings get no reply, only the malformed batch and the dispatcher do
+        assert (await driver.receive())["error"] == "invalid telemetry"
+        assert (await dispatcher.receive())["error"] == "only drivers report telemetry"
+    finally:
+        await driver.disconnect()
+        await dispatcher.disconnect()
+
+    assert len(writer) == 2
+    assert writer.positions.get(7) is not None
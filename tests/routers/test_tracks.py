@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import Client, Delivery, DeliveryEvent, DeliveryTrack, Dispatcher, Driver, DriverPing, Location, \
+    LogBreak
+from app.routers import deliveries
+from app.schemas.delivery import DeliveryStatus
+from app.telemetry.writer import create_partition
+from app.tracks.store import TrackStore
+from app.utils.jwt import create_access_token
+
+client = TestClient(app)
+
+
+def auth_headers(user) -> dict:
+    token = create_access_token({"sub": user.email, "id": user.id, "type": user.type})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def people(db_session: Session):
+    dispatcher = Dispatcher(email="dispatcher@example.com", password_hash="x", first_name="D", last_name="D")
+    driver = Driver(email="driver@example.com", password_hash="x", first_name="D", last_name="1",
+                    license_number="DL1")
+    other = Driver(email="other@example.com", password_hash="x", first_name="D", last_name="2",
+                   license_number="DL2")
+    customer = Client(email="client@example.com", password_hash="x", first_name="C", last_name="C",
+                      phone_number="+1234567890")
+    db_session.add_all([dispatcher, driver, other, customer])
+    db_session.commit()
+    return dispatcher, driver, other, customer
+
+
+@pytest.fixture
+def delivery(db_session: Session, people):
+    _, driver, _, customer = people
+    delivery = Delivery(
+        package_details="Box",
+        status=DeliveryStatus.PENDING,
+        driver_id=driver.id,
+        client_id=customer.id,
+        pickup_location=Location(latitude=50.45, longitude=30.52, address="Pickup"),
+        dropoff_location=Location(latitude=50.459, longitude=30.534, address="Dropoff")
+    )
+    db_session.add(delivery)
+    db_session.commit()
+    return delivery
+
+
+@pytest.fixture(autouse=True)
+def builds(db_session: Session, monkeypatch):
+    # the background build opens its own session; run it on the test transaction instead
+    built = []
+
+    def build(delivery_id: int):
+        TrackStore(db_session).build(db_session.get(Delivery, delivery_id))
+        db_session.commit()
+        built.append(delivery_id)
+
+    monkeypatch.setattr(deliveries, "build_delivery_track", build)
+    monkeypatch.setattr(deliveries, "enqueue_geocoding", lambda *ids: None)
+    return built
+
+
+def set_status(delivery, driver, new_status: str):
+    response = client.patch(f"/deliveries/{delivery.id}/status", json={"new_status": new_status},
+                            headers=auth_headers(driver))
+    assert response.status_code == 200
+
+
+def drive(db_session: Session, delivery, driver):
+    """Start the delivery five minutes ago and record an L-shaped drive since then, one ping a second."""
+    set_status(delivery, driver, "In-Transit")
+    started = datetime.now(timezone.utc) - timedelta(seconds=300)
+    db_session.execute(
+        update(DeliveryEvent).where(DeliveryEvent.delivery_id == delivery.id)
+        .values(created_at=started.astimezone().replace(tzinfo=None))
+    )
+    for day in {started.date(), datetime.now(timezone.utc).date()}:
+        db_session.execute(text(create_partition(day)))
+    pings = []
+    for second in range(1, 301):
+        # east for the first half, then north
+        east, north = min(second, 150), max(second - 150, 0)
+        pings.append({
+            "driver_id": driver.id, "recorded_at": started + timedelta(seconds=second),
+            "latitude": 50.45 + north * 0.00006, "longitude": 30.52 + east * 0.00009,
+        })
+    db_session.execute(insert(DriverPing), pings)
+    db_session.commit()
+    return started
+
+
+def test_finished_delivery_stores_simplified_tiers(db_session: Session, people, delivery, builds):
+    dispatcher, driver, _, _ = people
+    drive(db_session, delivery, driver)
+
+    set_status(delivery, driver, "Delivered")
+    response = client.get(f"/deliveries/{delivery.id}/track", headers=auth_headers(dispatcher))
+
+    assert builds == [delivery.id]
+    stored = db_session.scalars(select(DeliveryTrack).where(DeliveryTrack.delivery_id == delivery.id)).all()
+    assert len(stored) == 5
+    body = response.json()
+    assert response.status_code == 200
+    # 300 pings on two straight legs come back as the two ends and the corner
+    assert [(lat, lon) for _, lat, lon in body["points"]] == [
+        pytest.approx((50.45, 30.52009)), pytest.approx((50.45, 30.5335)), pytest.approx((50.459, 30.5335)),
+    ]
+    assert body["tier"] == 0
+    assert body["pickup_location"]["address"] == "Pickup"
+
+
+def test_timeline_places_events_and_breaks_on_the_track(db_session: Session, people, delivery):
+    dispatcher, driver, _, _ = people
+    started = drive(db_session, delivery, driver).astimezone().replace(tzinfo=None)
+    db_session.add(LogBreak(
+        delivery_id=delivery.id, cost=5.0,
+        start_time=started + timedelta(minutes=2), end_time=started + timedelta(minutes=3),
+        location=Location(latitude=50.45, longitude=30.53, address="Gas station")
+    ))
+    db_session.commit()
+    set_status(delivery, driver, "Delivered")
+
+    timeline = client.get(f"/deliveries/{delivery.id}/track", headers=auth_headers(dispatcher)).json()["timeline"]
+
+    assert [entry["type"] for entry in timeline] == [
+        "delivery.status_changed", "break", "delivery.status_changed"
+    ]
+    assert timeline[1]["address"] == "Gas station"
+    assert timeline[2]["data"]["status"] == "Delivered"
+    # started at the first ping and marked delivered at the last one
+    assert (timeline[0]["latitude"], timeline[0]["longitude"]) == pytest.approx((50.45, 30.52009))
+    assert (timeline[2]["latitude"], timeline[2]["longitude"]) == pytest.approx((50.459, 30.5335))
+
+
+def test_delivery_in_transit_is_simplified_on_read(db_session: Session, people, delivery, builds):
+    _, driver, _, _ = people
+    drive(db_session, delivery, driver)
+
+    response = client.get(f"/deliveries/{delivery.id}/track", headers=auth_headers(driver))
+
+    assert response.status_code == 200
+    assert len(response.json()["points"]) == 3
+    assert builds == []
+    assert db_session.scalars(select(DeliveryTrack)).all() == []
+
+
+def test_finished_delivery_is_served_before_its_build_lands(db_session: Session, people, delivery, monkeypatch):
+    dispatcher, driver, _, _ = people
+    drive(db_session, delivery, driver)
+    monkeypatch.setattr(deliveries, "build_delivery_track", lambda delivery_id: None)
+    set_status(delivery, driver, "Delivered")
+
+    response = client.get(f"/deliveries/{delivery.id}/track", headers=auth_headers(dispatcher))
+
+    assert response.status_code == 200
+    assert len(response.json()["points"]) == 3
+    # reads never write, so they cannot collide with the background build
+    assert db_session.scalars(select(DeliveryTrack)).all() == []
+
+
+def test_rebuilding_a_track_overwrites_it(db_session: Session, people, delivery, builds):
+    _, driver, _, _ = people
+    drive(db_session, delivery, driver)
+    set_status(delivery, driver, "Delivered")
+
+    TrackStore(db_session).build(delivery)
+    db_session.commit()
+
+    stored = db_session.scalars(select(DeliveryTrack).where(DeliveryTrack.delivery_id == delivery.id)).all()
+    assert [row.tier for row in stored] == [0, 1, 2, 3, 4]
+
+
+def test_point_budget_and_zoom_pick_the_resolution(db_session: Session, people, delivery):
+    dispatcher, driver, _, _ = people
+    drive(db_session, delivery, driver)
+    set_status(delivery, driver, "Delivered")
+    url = f"/deliveries/{delivery.id}/track"
+
+    assert len(client.get(url, params={"max_points": 2}, headers=auth_headers(dispatcher)).json()["points"]) == 2
+    assert client.get(url, params={"zoom": 5}, headers=auth_headers(dispatcher)).json()["tier"] == 4
+    assert client.get(url, params={"zoom": 23}, headers=auth_headers(dispatcher)).status_code == 422
+
+
+def test_only_the_delivery_parties_see_its_track(people, delivery):
+    _, driver, other, customer = people
+    url = f"/deliveries/{delivery.id}/track"
+
+    assert client.get(url, headers=auth_headers(driver)).status_code == 200
+    assert client.get(url, headers=auth_headers(customer)).status_code == 200
+    assert client.get(url, headers=auth_headers(other)).status_code == 403
+    assert client.get("/deliveries/999999/track", headers=auth_headers(driver)).status_code == 404
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.db import async_engine, engine, engine_options, to_async_url
+from app.models import Dispatcher, Driver, Message, User
+from app.realtime import get_connection_manager
+from app.realtime.message_writer import MessageWriter
+from app.routers import websocket
+from app.settings import settings
+from tests.realtime.fakes import ASGIWebSocket
+
+pytestmark = pytest.mark.anyio
+
+SOCKETS = 1000
+DISPATCHERS = 10
+
+
+@pytest.fixture
+def users(engine):
+    # committed for real: the message writer inserts from its own connections
+    session = Session(bind=engine)
+    dispatchers = [
+        Dispatcher(email=f"dispatcher{i}@example.com", password_hash="x", first_name="D", last_name=str(i))
+        for i in range(DISPATCHERS)
+    ]
+    drivers = [
+        Driver(email=f"driver{i}@example.com", password_hash="x", first_name="D", last_name=str(i),
+               license_number=f"DL{i}")
+        for i in range(SOCKETS - DISPATCHERS)
+    ]
+    session.add_all(dispatchers + drivers)
+    session.commit()
+    ids = {"dispatcher": [u.id for u in dispatchers], "driver": [u.id for u in drivers]}
+    yield ids
+
+    every_id = ids["dispatcher"] + ids["driver"]
+    session.execute(delete(Message).where(Message.sender_id.in_(every_id)))
+    session.execute(delete(Driver.__table__).where(Driver.__table__.c.id.in_(ids["driver"])))
+    session.execute(delete(Dispatcher.__table__).where(Dispatcher.__table__.c.id.in_(ids["dispatcher"])))
+    session.execute(delete(User.__table__).where(User.__table__.c.id.in_(every_id)))
+    session.commit()
+    session.close()
+
+
+@pytest.fixture
+async def message_writer(anyio_backend, monkeypatch):
+    url = settings.database.test_database_connection_string
+    test_engine = create_async_engine(to_async_url(url), **engine_options(url, is_async=True))
+    writer = MessageWriter(async_sessionmaker(test_engine, expire_on_commit=False))
+    monkeypatch.setattr(websocket, "writer", writer)
+    writer.start()
+    yield writer, test_engine
+    await writer.stop()
+    await test_engine.dispose()
+
+
+@pytest.fixture
+def connections_in_use(message_writer):
+    _, test_engine = message_writer
+    in_use = {"now": 0, "peak": 0}
+
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        in_use["now"] += 1
+        in_use["peak"] = max(in_use["peak"], in_use["now"])
+
+    def checkin(dbapi_connection, connection_record):
+        in_use["now"] -= 1
+
+    engines = [engine, async_engine.sync_engine, test_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "checkout", checkout)
+        event.listen(target, "checkin", checkin)
+    yield in_use
+    for target in engines:
+        event.remove(target, "checkout", checkout)
+        event.remove(target, "checkin", checkin)
+
+
+async def test_idle_sockets_do_not_hold_database_connections(db_session, users, message_writer,
+                                                             connections_in_use):
+    writer, _ = message_writer
+    dispatchers = [ASGIWebSocket(user_id, "dispatcher") for user_id in users["dispatcher"]]
+    drivers = [ASGIWebSocket(user_id, "driver") for user_id in users["driver"]]
+    sockets = dispatchers + drivers
+    try:
+        for socket in sockets:
+            await socket.connect()
+        # every driver chats once, then all sockets sit idle
+        for driver in drivers:
+            await driver.send({"message": "hello"})
+            assert (await driver.receive())["text"] == "hello"
+        await writer.stop()
+        await asyncio.sleep(0.1)
+
+        manager = get_connection_manager()
+        assert len(manager.active_drivers) + len(manager.active_dispatchers) == SOCKETS
+        assert connections_in_use["now"] == 0
+        assert connections_in_use["peak"] < 5
+        assert db_session.scalar(
+            select(func.count()).select_from(Message).where(Message.sender_id.in_(users["driver"]))
+        ) == len(drivers)
+    finally:
+        for socket in sockets:
+            if socket.task is not None:
+                await socket.disconnect()
+
+
+async def test_malformed_driver_id_is_refused_and_chat_continues(db_session, users, message_writer):
+    writer, _ = message_writer
+    dispatcher = ASGIWebSocket(users["dispatcher"][0], "dispatcher")
+    driver_id = users["driver"][0]
+    await dispatcher.connect()
+    try:
+        for malformed in ["5", "abc", 2 ** 31, -1, 1.5, True]:
+            await dispatcher.send({"message": "lost", "driver_id": malformed})
+            assert "error" in await dispatcher.receive()
+
+        await dispatcher.send({"message": "delivered", "driver_id": driver_id})
+        assert (await dispatcher.receive())["receiver_id"] == driver_id
+        await writer.stop()
+
+        texts = db_session.scalars(
+            select(Message.text).where(Message.sender_id == users["dispatcher"][0])
+        ).all()
+        assert texts == ["delivered"]
+    finally:
+        await dispatcher.disconnect()
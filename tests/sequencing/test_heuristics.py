@@ -0,0 +1,76 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from app.assignment.solver import haversine_matrix
+from app.sequencing.heuristics import is_feasible, nearest_neighbour, path_length, sequence
+
+
+def instance(rng, deliveries: int, on_board: int = 0, with_start: bool = False):
+    points, pickup_of = [], []
+    for _ in range(deliveries):
+        points.append(rng.uniform(0, 0.1, 2))
+        pickup_of.append(-1)
+        points.append(rng.uniform(0, 0.1, 2))
+        pickup_of.append(len(points) - 2)
+    for _ in range(on_board):
+        points.append(rng.uniform(0, 0.1, 2))
+        pickup_of.append(-1)
+    n = len(points)
+    if with_start:
+        points.append(rng.uniform(0, 0.1, 2))
+    points = np.array(points)
+    distances = haversine_matrix(points[:, 0], points[:, 1], points[:, 0], points[:, 1])
+    return distances, np.array(pickup_of), n if with_start else None
+
+
+def test_pickups_come_before_dropoffs():
+    rng = np.random.default_rng(0)
+    for deliveries in range(1, 15):
+        distances, pickup_of, start = instance(rng, deliveries, on_board=2, with_start=deliveries % 2 == 0)
+
+        order = sequence(distances, pickup_of, start)
+
+        assert sorted(order) == list(range(len(pickup_of)))
+        assert is_feasible(order, pickup_of)
+
+
+def test_close_to_optimal_on_small_routes():
+    rng = np.random.default_rng(1)
+    gaps = []
+    for case in range(100):
+        distances, pickup_of, start = instance(rng, rng.integers(1, 4), rng.integers(0, 2), case % 2 == 0)
+        prefix = [start] if start is not None else []
+        best = min(
+            path_length(distances, prefix + list(order))
+            for order in itertools.permutations(range(len(pickup_of)))
+            if is_feasible(list(order), pickup_of)
+        )
+
+        found = path_length(distances, prefix + sequence(distances, pickup_of, start))
+
+        gaps.append(found / best - 1)
+    assert np.mean(gaps) < 0.02
+    assert max(gaps) < 0.25
+
+
+def test_improves_on_nearest_neighbour():
+    rng = np.random.default_rng(2)
+    distances, pickup_of, _ = instance(rng, 30)
+
+    order = sequence(distances, pickup_of)
+
+    assert path_length(distances, order) < path_length(distances, nearest_neighbour(distances, pickup_of, None))
+
+
+@pytest.mark.benchmark
+def test_thirty_deliveries_sequence_quickly():
+    rng = np.random.default_rng(2)
+    distances, pickup_of, _ = instance(rng, 30)
+
+    started = time.perf_counter()
+    sequence(distances, pickup_of)
+
+    assert time.perf_counter() - started < 0.5
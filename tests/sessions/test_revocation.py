@@ -0,0 +1,83 @@
+import asyncio
+import time
+from contextlib import nullcontext
+
+import pytest
+from sqlalchemy import make_url
+from sqlalchemy.orm import Session
+
+from app.models import RevokedToken
+from app.realtime.broker import MemoryBroker, PostgresBroker
+from app.realtime.connections import ConnectionManager
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+from app.sessions.revocation import RevocationList
+from app.settings import settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_live_until_the_token_expires():
+    clock = Clock()
+    revocations = RevocationList(clock=clock)
+    revocations.revoke([("a", 1010), ("b", 2000), ("already-expired", 900)])
+
+    assert revocations.is_revoked("a") and revocations.is_revoked("b")
+    assert not revocations.is_revoked("already-expired")
+    assert not revocations.is_revoked(None)
+
+    clock.now = 1500
+    assert revocations.compact() == 1
+    assert not revocations.is_revoked("a")
+    assert len(revocations) == 1
+
+
+def test_loads_unexpired_rows_and_purges_the_rest(db_session: Session):
+    now = time.time()
+    repository = RevokedTokenRepository(db_session)
+    repository.add([("live", now + 600), ("stale", now - 600)])
+    db_session.commit()
+
+    revocations = RevocationList(lambda: nullcontext(db_session))
+    revocations.load()
+
+    assert revocations.is_revoked("live")
+    assert not revocations.is_revoked("stale")
+    assert repository.purge_expired() == 1
+    assert [row.jti for row in db_session.query(RevokedToken)] == ["live"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", ["memory", "postgres"])
+async def test_revocations_replicate_through_the_broker(backend, anyio_backend, tables):
+    shared = MemoryBroker()
+    dsn = make_url(settings.database.test_database_connection_string) \
+        .set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def broker():
+        return PostgresBroker(dsn, channel_prefix="test-revocations") if backend == "postgres" else shared
+
+    managers = [ConnectionManager(broker=broker()) for _ in range(2)]
+    lists = [RevocationList() for _ in managers]
+    notified = [[], []]
+    for manager, revocations, seen in zip(managers, lists, notified):
+        await manager.start()
+        revocations.bind(manager, asyncio.get_running_loop())
+        revocations.listen(seen.extend)
+    try:
+        lists[0].revoke([("fired-driver", time.time() + 600)])
+
+        deadline = asyncio.get_running_loop().time() + 2
+        while not lists[1].is_revoked("fired-driver"):
+            assert asyncio.get_running_loop().time() < deadline, "revocation never reached the other worker"
+            await asyncio.sleep(0.01)
+        # both workers get to close the connections opened with the token
+        assert notified == [["fired-driver"], ["fired-driver"]]
+    finally:
+        for manager in managers:
+            await manager.stop()
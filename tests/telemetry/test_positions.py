@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import make_url
+
+from app.realtime.broker import MemoryBroker, PostgresBroker
+from app.realtime.connections import ConnectionManager
+from app.settings import settings
+from app.telemetry.positions import Position, PositionTable
+from app.telemetry.spatial import GridIndex
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", ["memory", "postgres"])
+async def test_positions_replicate_through_the_broker(backend, anyio_backend, tables):
+    shared = MemoryBroker()
+    dsn = make_url(settings.database.test_database_connection_string) \
+        .set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def broker():
+        return PostgresBroker(dsn, channel_prefix="test-positions") if backend == "postgres" else shared
+
+    managers = [ConnectionManager(broker=broker()) for _ in range(2)]
+    workers = [PositionTable() for _ in managers]
+    index = GridIndex()
+    workers[1].subscribe(index.move)
+    for manager, positions in zip(managers, workers):
+        await manager.start()
+        positions.bind(manager, asyncio.get_running_loop())
+    try:
+        now = datetime.now(timezone.utc)
+        # a batch relays each driver's newest position
+        workers[0].report([Position(7, 50.45, 30.52, now - timedelta(seconds=5)),
+                           Position(7, 50.46, 30.53, now, 12.5)])
+
+        deadline = asyncio.get_running_loop().time() + 2
+        while workers[1].get(7) is None:
+            assert asyncio.get_running_loop().time() < deadline, "position never reached the other worker"
+            await asyncio.sleep(0.01)
+        assert workers[1].get(7) == Position(7, 50.46, 30.53, now, 12.5)
+        # the other worker's nearest-driver index follows it as well
+        assert [p.driver_id for _, p in index.nearest(50.46, 30.53, 1, 1)] == [7]
+    finally:
+        for manager in managers:
+            await manager.stop()
@@ -0,0 +1,93 @@
+import random
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.telemetry.positions import Position, PositionTable
+from app.telemetry.spatial import GridIndex, haversine_km
+
+
+def scatter(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    # a city-sized area around Kyiv
+    return [Position(i, 50.45 + rng.uniform(-0.2, 0.2), 30.52 + rng.uniform(-0.3, 0.3), now) for i in range(count)]
+
+
+def brute_force(positions, latitude, longitude, k, max_distance_km, accept=lambda position: True):
+    matches = sorted(
+        (haversine_km(latitude, longitude, p.latitude, p.longitude), p.driver_id) for p in positions
+        if accept(p) and haversine_km(latitude, longitude, p.latitude, p.longitude) <= max_distance_km
+    )
+    return [driver_id for _, driver_id in matches[:k]]
+
+
+def test_haversine_kyiv_lviv():
+    assert abs(haversine_km(50.4501, 30.5234, 49.8397, 24.0297) - 468.5) < 2
+
+
+def test_nearest_matches_brute_force():
+    positions = scatter(3000)
+    index = GridIndex()
+    for position in positions:
+        index.move(position)
+    rng = random.Random(2)
+
+    for _ in range(200):
+        latitude, longitude = 50.45 + rng.uniform(-0.3, 0.3), 30.52 + rng.uniform(-0.4, 0.4)
+        k, radius = rng.choice([1, 5, 20]), rng.choice([0.5, 3, 50])
+        accept = (lambda position: position.driver_id % 3 != 0) if rng.random() < 0.5 else None
+        found = [p.driver_id for _, p in index.nearest(latitude, longitude, k, radius, accept)]
+        assert found == brute_force(positions, latitude, longitude, k, radius, accept or (lambda position: True))
+
+
+def test_nearest_matches_brute_force_far_north():
+    # cells narrow quickly up here, so the early stop must use the narrowest one the radius reaches
+    rng = random.Random(3)
+    now = datetime.now(timezone.utc)
+    positions = [Position(i, rng.uniform(74, 81), rng.uniform(5, 35), now) for i in range(3000)]
+    index = GridIndex(cell_degrees=0.5)
+    for position in positions:
+        index.move(position)
+
+    for _ in range(50):
+        latitude, longitude = rng.uniform(76, 79), rng.uniform(10, 30)
+        k, radius = rng.choice([1, 5, 20]), rng.choice([100, 300])
+        found = [p.driver_id for _, p in index.nearest(latitude, longitude, k, radius)]
+        assert found == brute_force(positions, latitude, longitude, k, radius)
+
+
+def test_index_follows_moves_and_removals():
+    positions = PositionTable()
+    index = GridIndex()
+    positions.subscribe(index.move)
+    now = datetime.now(timezone.utc)
+
+    positions.update(Position(1, 50.45, 30.52, now))
+    positions.update(Position(2, 50.46, 30.53, now))
+    positions.update(Position(1, 50.47, 30.54, now.replace(microsecond=0)))  # older: ignored
+    assert [p.driver_id for _, p in index.nearest(50.45, 30.52, 1, 10)] == [1]
+
+    positions.update(Position(1, 50.60, 30.80, now.replace(year=now.year + 1)))
+    assert [p.driver_id for _, p in index.nearest(50.45, 30.52, 2, 10)] == [2]
+
+    index.remove(2)
+    assert index.nearest(50.45, 30.52, 2, 10) == []
+    assert len(index) == 1
+
+
+@pytest.mark.benchmark
+def test_nearest_is_sub_millisecond():
+    index = GridIndex()
+    for position in scatter(5000):
+        index.move(position)
+    rng = random.Random(3)
+    queries = [(50.45 + rng.uniform(-0.2, 0.2), 30.52 + rng.uniform(-0.3, 0.3)) for _ in range(500)]
+
+    started = time.perf_counter()
+    for latitude, longitude in queries:
+        assert len(index.nearest(latitude, longitude, 5, 50)) == 5
+    per_query = (time.perf_counter() - started) / len(queries)
+
+    assert per_query < 0.001, f"{per_query * 1000:.3f} ms per query"
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import engine_options, to_async_url
+from app.schemas.telemetry import GpsPing
+from app.settings import settings
+from app.telemetry.positions import PositionTable
+from app.telemetry.writer import TelemetryOverloaded, TelemetryWriter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def test_engine(anyio_backend, tables):
+    # COPY needs its own connections, so rows are committed for real and truncated afterwards
+    url = settings.database.test_database_connection_string
+    engine = create_async_engine(to_async_url(url), **engine_options(url, is_async=True))
+    yield engine
+    async with engine.begin() as connection:
+        await connection.execute(text("TRUNCATE driver_pings"))
+    await engine.dispose()
+
+
+@pytest.fixture
+async def writers(test_engine):
+    created = []
+
+    def make(**kwargs) -> TelemetryWriter:
+        kwargs.setdefault("max_age", timedelta(days=3))
+        writer = TelemetryWriter(test_engine, PositionTable(), **kwargs)
+        writer.start()
+        created.append(writer)
+        return writer
+
+    yield make
+    for writer in created:
+        await writer.stop()
+
+
+def ping(recorded_at: datetime, latitude: float = 50.45, longitude: float = 30.52) -> GpsPing:
+    return GpsPing(latitude=latitude, longitude=longitude, recorded_at=recorded_at, speed=8.5)
+
+
+async def stored(engine, query: str = "SELECT count(*) FROM driver_pings"):
+    async with engine.connect() as connection:
+        return (await connection.execute(text(query))).all()
+
+
+async def test_pings_land_in_day_partitions(test_engine, writers):
+    writer = writers(flush_interval=10)
+    now = datetime.now(timezone.utc)
+    two_days_ago = now - timedelta(days=2)
+
+    assert writer.submit(7, [ping(two_days_ago), ping(now)]) == (2, 0)
+    await writer.stop()
+
+    rows = await stored(test_engine, "SELECT tableoid::regclass::text, driver_id FROM driver_pings ORDER BY recorded_at")
+    assert rows == [
+        (f"driver_pings_p{two_days_ago:%Y%m%d}", 7),
+        (f"driver_pings_p{now:%Y%m%d}", 7),
+    ]
+
+
+async def test_resent_pings_are_written_once(test_engine, writers):
+    writer = writers(flush_interval=10)
+    pings = [ping(datetime.now(timezone.utc) - timedelta(seconds=i)) for i in range(3)]
+
+    writer.submit(7, pings)
+    await writer.stop()
+    writer.start()
+    writer.submit(7, pings)
+    await writer.stop()
+
+    assert await stored(test_engine) == [(3,)]
+
+
+async def test_implausible_timestamps_are_rejected(writers):
+    writer = writers(flush_interval=10)
+    now = datetime.now(timezone.utc)
+
+    accepted = writer.submit(7, [ping(now - timedelta(days=30)), ping(now + timedelta(hours=1)), ping(now)])
+
+    assert accepted == (1, 2)
+    assert len(writer) == 1
+
+
+async def test_latest_position_survives_out_of_order_pings(writers):
+    writer = writers(flush_interval=10)
+    now = datetime.now(timezone.utc)
+
+    writer.submit(7, [ping(now, latitude=50.0)])
+    # a phone flushing its offline buffer after the live ping
+    writer.submit(7, [ping(now - timedelta(minutes=5), latitude=49.0)])
+
+    position = writer.positions.get(7)
+    assert (position.latitude, position.recorded_at) == (50.0, now)
+
+
+async def test_full_buffer_rejects_new_pings(writers):
+    writer = writers(flush_interval=10, max_pending=2)
+    now = datetime.now(timezone.utc)
+    writer.submit(7, [ping(now - timedelta(seconds=1)), ping(now)])
+
+    with pytest.raises(TelemetryOverloaded):
+        writer.submit(8, [ping(now)])
+    assert writer.positions.get(8) is None
+
+
+@pytest.mark.benchmark
+async def test_sustains_ten_thousand_pings_per_second(test_engine, writers):
+    writer = writers()
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    # 500 drivers posting batches of 100 pings, one ping per second each
+    batches = [
+        (driver_id, [ping(start + timedelta(seconds=second + batch * 100), latitude=50 + driver_id / 1000)
+                     for second in range(100)])
+        for batch in range(2)
+        for driver_id in range(500)
+    ]
+
+    started = time.perf_counter()
+    for driver_id, pings in batches:
+        writer.submit(driver_id, pings)
+    await writer.stop()
+    elapsed = time.perf_counter() - started
+
+    assert await stored(test_engine) == [(100000,)]
+    assert len(writer.positions) == 500
+    assert 100000 / elapsed > 10000, f"{100000 / elapsed:.0f} pings/s"
@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.tracks.simplify import douglas_peucker, limit_points, project, segment_distances, visvalingam
+from app.tracks.store import Tier, build_tiers, choose_tier
+
+
+def l_shaped(n: int = 201) -> np.ndarray:
+    # 1 km east, then 1 km north, in metres
+    half = n // 2
+    east = np.column_stack((np.linspace(0, 1000, half + 1), np.zeros(half + 1)))
+    north = np.column_stack((np.full(n - half - 1, 1000.0), np.linspace(0, 1000, n - half)[1:]))
+    return np.vstack((east, north))
+
+
+def test_douglas_peucker_keeps_only_the_corner_of_straight_legs():
+    xy = l_shaped()
+
+    keep = douglas_peucker(xy, tolerance=1.0)
+
+    assert xy[keep].tolist() == [[0, 0], [1000, 0], [1000, 1000]]
+
+
+def test_douglas_peucker_stays_within_tolerance():
+    rng = np.random.default_rng(1)
+    xy = np.cumsum(rng.normal(0, 5, size=(2000, 2)), axis=0)
+
+    keep = douglas_peucker(xy, tolerance=10.0)
+    kept = np.flatnonzero(keep)
+
+    assert keep[0] and keep[-1] and keep.sum() < len(xy)
+    for first, last in zip(kept, kept[1:]):
+        if last - first > 1:
+            assert segment_distances(xy[first + 1:last], xy[first], xy[last]).max() <= 10.0
+
+
+def test_visvalingam_ranks_the_corner_above_collinear_points():
+    areas = visvalingam(l_shaped())
+
+    assert np.isinf(areas[0]) and np.isinf(areas[-1])
+    assert int(np.argmax(areas[1:-1])) + 1 == 100
+
+
+def test_limit_points_honours_the_budget_and_keeps_endpoints():
+    rng = np.random.default_rng(2)
+    xy = np.cumsum(rng.normal(0, 5, size=(500, 2)), axis=0)
+
+    keep = limit_points(xy, 50)
+
+    assert keep.sum() == 50
+    assert keep[0] and keep[-1]
+
+
+def random_walk(n: int = 20000) -> np.ndarray:
+    rng = np.random.default_rng(3)
+    steps = rng.normal(0, 0.0002, size=(n, 2))
+    return np.column_stack((np.arange(float(n)), 50.45 + np.cumsum(steps[:, 0]), 30.52 + np.cumsum(steps[:, 1])))
+
+
+def test_tiers_get_coarser_and_zoom_picks_a_matching_one():
+    raw = random_walk()
+    tiers = build_tiers(raw)
+
+    counts = [len(tier.points) for tier in tiers]
+    assert counts == sorted(counts, reverse=True) and counts[0] < len(raw)
+    # ~1.5 m per pixel at zoom 16, ~100 m at zoom 10
+    assert choose_tier(tiers, zoom=16, max_points=None).tier == 0
+    assert choose_tier(tiers, zoom=10, max_points=None).tier == 2
+    assert choose_tier(tiers, zoom=None, max_points=counts[3]).tier == 3
+    assert len(choose_tier(tiers, zoom=None, max_points=10).points) == 10
+
+
+@pytest.mark.benchmark
+def test_tiers_of_a_long_track_build_quickly():
+    raw = random_walk()
+
+    started = time.perf_counter()
+    build_tiers(raw)
+
+    assert time.perf_counter() - started < 2
+
+
+def test_empty_track_has_empty_tiers():
+    tiers = build_tiers(np.empty((0, 3)))
+
+    assert all(isinstance(tier, Tier) and len(tier.points) == 0 for tier in tiers)
+    assert len(project([], [])) == 0
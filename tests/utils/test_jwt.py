@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from jose import jwt
+
+from app.utils.jwt import ALGORITHM, SECRET_KEY, TokenCache, create_access_token, decode_access_token, \
+    decode_jose, decode_native, token_cache
+
+CLAIMS = {"sub": "driver@example.com", "id": 7, "type": "driver"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_native_backend_agrees_with_jose():
+    token = create_access_token(CLAIMS)
+    assert decode_native(token) == decode_jose(token)
+
+    expired = create_access_token(CLAIMS, expires_delta=-1)
+    forged = jwt.encode({**CLAIMS, "exp": time.time() + 60}, "another secret", algorithm=ALGORITHM)
+    unsigned = jwt.encode({**CLAIMS, "exp": time.time() + 60}, SECRET_KEY, algorithm="HS512")
+    header, payload, signature = token.split(".")
+    for bad in (expired, forged, unsigned, f"{header}.{payload}.", f"{header}.{payload}", "garbage", ""):
+        assert decode_native(bad) is None
+        assert decode_jose(bad) is None
+
+
+def test_cache_honours_token_expiry_and_size():
+    clock = Clock()
+    cache = TokenCache(max_size=2, clock=clock)
+    cache.set("a", {"exp": 1010})
+    cache.set("b", {"exp": 2000})
+    cache.set("never", {"sub": "x"})
+
+    assert cache.get("a") == {"exp": 1010}
+    assert cache.get("never") is None
+    clock.now = 1010
+    assert cache.get("a") is None
+
+    cache.set("c", {"exp": 2000})
+    cache.set("d", {"exp": 2000})
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_invalid_tokens_are_not_cached():
+    token_cache.clear()
+    assert decode_access_token("garbage") is None
+    assert len(token_cache) == 0
+
+    token = create_access_token(CLAIMS)
+    assert decode_access_token(token)["id"] == 7
+    assert len(token_cache) == 1
+
+
+@pytest.mark.benchmark
+def test_benchmark_auth_overhead_per_request():
+    token = create_access_token(CLAIMS)
+    rounds = 2000
+
+    def per_call(decode) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            decode(token)
+        return (time.perf_counter() - started) / rounds
+
+    token_cache.clear()
+    decode_access_token(token)
+    jose_s, native_s, cached_s = per_call(decode_jose), per_call(decode_native), per_call(decode_access_token)
+
+    assert native_s < jose_s
+    assert cached_s * 5 < jose_s